@@ -0,0 +1,252 @@
+"""Normaliserte svar og skrivefeiltolerant sammenligning for ASK123.
+
+Svarene normaliseres én gang (Unicode NFC, casefold, sammenslåtte mellomrom), så "Blåbær",
+"blåbær" med dekomponert å og "blå  bær" regnes som samme svar. Et svar som er noen få
+tegn unna fasiten, og ikke er et annet ord i vokabularet, klassifiseres som nesten riktig.
+"""
+import re
+import unicodedata
+from bisect import bisect_left
+from functools import lru_cache
+
+CORRECT = "correct"
+ALMOST = "almost"
+WRONG = "wrong"
+
+# Hvor mange skrivefeil som godtas per vanskelighetsgrad
+TYPO_TOLERANCE = {"easy": 2, "medium": 1, "hard": 0}
+# Korte ord tåler færre feil: ett tegn per tredje bokstav i fasiten
+LETTERS_PER_TYPO = 3
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_answer(text):
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text).casefold()).strip()
+
+
+def normalize_prefix(text):
+    # Som normalize_answer, men et mellomrom på slutten beholdes: "god " skal bare treffe "god morgen"
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text).casefold()).lstrip()
+
+
+def edit_distance(a, b, max_distance):
+    """Levenshtein-avstanden mellom a og b, eller max_distance + 1 hvis den er større.
+    Regner bare ut et bånd rundt diagonalen, så prisen er O(len * max_distance)."""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    if len(a) < len(b):
+        a, b = b, a
+    too_far = max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        low = max(1, i - max_distance)
+        high = min(len(b), i + max_distance)
+        current = [too_far] * (len(b) + 1)
+        current[0] = i if i <= max_distance else too_far
+        row_min = current[0]
+        for j in range(low, high + 1):
+            cost = previous[j - 1] + (char_a != b[j - 1])
+            cost = min(cost, previous[j] + 1, current[j - 1] + 1)
+            current[j] = cost
+            if cost < row_min:
+                row_min = cost
+        if row_min > max_distance:
+            return too_far
+        previous = current
+    return min(previous[len(b)], too_far)
+
+
+def _deletes(word, depth):
+    variants = {word}
+    frontier = {word}
+    for _ in range(depth):
+        frontier = {variant[:i] + variant[i + 1:] for variant in frontier for i in range(len(variant))}
+        variants |= frontier
+    return variants
+
+
+# Vokabularet med normaliserte former og en slette-indeks (symmetric delete) for oppslag
+# av nære ord. Indeksen holder slettinger opp til max_distance - 1 tegn: for å avgjøre om en
+# skrivefeil på avstand d er nærmere et annet ord enn fasiten, trengs bare ord på avstand < d.
+# Med tegn-ID-er blir det også én hash-tabell fra normalisert svar til tegnene som godtar det,
+# så et tegn kan ha mange alias uten at rettingen blir tregere.
+class AnswerIndex:
+    def __init__(self, answers=(), max_distance=max(TYPO_TOLERANCE.values())):
+        """`answers` er svar, eller (svar, tegn-ID)-par når alias skal knyttes til tegn."""
+        self.depth = max(0, max_distance - 1)
+        self.forms = {}  # normalisert form -> de opprinnelige svarene med den formen
+        self.signs = {}  # normalisert form -> tegn-ID-er som godtar svaret
+        self.forms_by_sign = {}  # tegn-ID -> alle normaliserte svar tegnet godtar
+        self._words = []
+        self._deletes = {}  # slettet variant -> indekser i self._words
+        for answer in answers:
+            if isinstance(answer, tuple):
+                self.add(*answer)
+            else:
+                self.add(answer)
+
+    def __len__(self):
+        return len(self.forms)
+
+    def __contains__(self, text):
+        return normalize_answer(text) in self.forms
+
+    def add(self, answer, sign_id=None):
+        form = normalize_answer(answer)
+        if sign_id is not None:
+            self.signs.setdefault(form, set()).add(sign_id)
+            self.forms_by_sign.setdefault(sign_id, set()).add(form)
+        originals = self.forms.get(form)
+        if originals is not None:
+            originals.add(answer)
+            return
+        self.forms[form] = {answer}
+        word_id = len(self._words)
+        self._words.append(form)
+        for variant in _deletes(form, self.depth):
+            self._deletes.setdefault(variant, []).append(word_id)
+
+    def neighbours(self, text, max_distance):
+        """Normaliserte ord i vokabularet innen max_distance (høyst indeksdybden) fra text, som (avstand, ord)."""
+        form = normalize_answer(text)
+        max_distance = min(max_distance, self.depth)
+        candidates = set()
+        for variant in _deletes(form, max_distance):
+            candidates.update(self._deletes.get(variant, ()))
+        found = []
+        for word_id in candidates:
+            word = self._words[word_id]
+            distance = edit_distance(form, word, max_distance)
+            if distance <= max_distance:
+                found.append((distance, word))
+        return sorted(found)
+
+    def pairs(self):
+        """(svar, tegn-ID) for hele vokabularet; AnswerIndex(pairs) bygger en likeverdig indeks."""
+        for form, originals in self.forms.items():
+            answer = min(originals)
+            for sign_id in sorted(self.signs.get(form, ())) or [None]:
+                yield answer, sign_id
+
+    def accepts(self, text, sign_id):
+        return sign_id in self.signs.get(normalize_answer(text), ())
+
+    def classify(self, user_input, expected, tolerance=0, sign_id=None):
+        """(CORRECT/ALMOST/WRONG, avstand) for et svar mot fasiten (og aliasene til sign_id)."""
+        return classify_answer(user_input, expected, tolerance, self, sign_id)
+
+
+def tolerance_for(expected_form, tolerance):
+    return min(tolerance, len(expected_form) // LETTERS_PER_TYPO)
+
+
+def classify_answer(user_input, expected, tolerance=0, index=None, sign_id=None):
+    form = normalize_answer(user_input)
+    expected_forms = {normalize_answer(expected)}
+    if index is not None and sign_id is not None:
+        if sign_id in index.signs.get(form, ()):
+            return CORRECT, 0  # Ett oppslag uansett hvor mange alias tegnet har
+        expected_forms |= index.forms_by_sign.get(sign_id, set())
+    if form in expected_forms:
+        return CORRECT, 0
+    if not form:
+        return WRONG, None
+    # Nærmeste godkjente svar innenfor toleransen (som avhenger av lengden på hvert svar)
+    distance = None
+    for expected_form in expected_forms:
+        limit = tolerance_for(expected_form, tolerance)
+        if limit > 0:
+            d = edit_distance(form, expected_form, limit)
+            if d <= limit and (distance is None or d < distance):
+                distance = d
+    if distance is None:
+        return WRONG, None
+    if index is not None:
+        # Et annet gyldig svar, eller et som ligger nærmere enn fasiten, er ikke en skrivefeil
+        if form in index.forms or index.neighbours(form, distance - 1):
+            return WRONG, None
+    return ALMOST, distance
+
+
+# Autofullføring: de normaliserte svarene i sortert rekkefølge, så alle svar som starter
+# med et prefiks ligger etter hverandre og finnes med ett binærsøk
+class PrefixIndex:
+    def __init__(self, answers=()):
+        by_form = {}
+        for answer in answers:
+            by_form.setdefault(normalize_answer(answer), answer)
+        self._forms = sorted(by_form)
+        self._answers = [by_form[form] for form in self._forms]
+
+    def __len__(self):
+        return len(self._forms)
+
+    def complete(self, prefix, limit=5):
+        """Inntil `limit` svar (i opprinnelig skrivemåte) som starter med prefix, alfabetisk."""
+        prefix = normalize_prefix(prefix)
+        if not prefix:
+            return []
+        forms = self._forms
+        result = []
+        start = bisect_left(forms, prefix)
+        for i in range(start, min(len(forms), start + limit)):
+            if not forms[i].startswith(prefix):
+                break
+            result.append(self._answers[i])
+        return result
+
+
+# Hvor mange svar i poolen et hint høyst skal passe til; lavere tall gir mer hjelp
+HINT_TARGETS = {"easy": 1, "medium": 2, "hard": 4}
+
+
+# Hint som viser akkurat nok av svaret til å skille det fra de andre i poolen. Et trie over
+# de normaliserte svarene teller hvor mange svar som deler hvert prefiks; prefikslengden for
+# hvert svar og hver vanskelighetsgrad regnes ut én gang, så et hint er bare et oppslag.
+class HintIndex:
+    def __init__(self, answers=(), targets=None):
+        self.targets = targets if targets is not None else HINT_TARGETS
+        forms = {normalize_answer(answer) for answer in answers}
+        trie = [0, {}]  # [antall svar under noden, barn]
+        for form in forms:
+            node = trie
+            for char in form:
+                node[0] += 1
+                node = node[1].setdefault(char, [0, {}])
+            node[0] += 1
+        self._lengths = {form: {difficulty: self._prefix_length(trie, form, target)
+                                for difficulty, target in self.targets.items()}
+                         for form in forms}
+
+    @staticmethod
+    def _prefix_length(trie, form, target):
+        node = trie
+        for length, char in enumerate(form, 1):
+            node = node[1][char]
+            if node[0] <= target:
+                break
+        # Aldri hele svaret: korte ord får bare første bokstav, lengre ord alt unntatt den siste
+        longest = 1 if len(form) <= 3 else len(form) - 1
+        return max(1, min(length, longest)) if form else 0
+
+    def hint(self, answer, difficulty):
+        """Begynnelsen av svaret, lang nok til å skille det fra de andre svarene i poolen."""
+        # Lengden er regnet på normalize_answer-formen, så svaret vises med samme mellomrom og NFC-form
+        # (men med store bokstaver) og kuttes etter like mange tegn som i den formen
+        text = _WHITESPACE.sub(" ", unicodedata.normalize("NFC", answer)).strip()
+        lengths = self._lengths.get(normalize_answer(answer))
+        if lengths is None:
+            return text[:1]
+        wanted, folded = lengths.get(difficulty, 1), 0
+        for end, char in enumerate(text, 1):
+            folded += len(char.casefold())  # "ß" blir "ss" i normalize_answer
+            if folded >= wanted:
+                return text[:end]
+        return text
+
+
+@lru_cache(maxsize=16)
+def hint_index_for(answers):
+    """Delt HintIndex for en pool (frozenset av svar), så samme kategori bare bygges én gang."""
+    return HintIndex(answers)
@@ -0,0 +1,495 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+
+from PIL import Image
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # watchdog er valgfritt; uten den bruker vi polling
+    FileSystemEventHandler = object
+    Observer = None
+
+from image_pipeline import user_cache_dir
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+MANIFEST_VERSION = 2
+
+# Manifestet som følger med PyInstaller-pakken, der hvert bilde bare ligger én gang
+INDEX_FILE = "asset_index.json"
+# Valgfri fil i hver kategorimappe med flere godkjente svar per tegn, f.eks.
+# {"Kle på": ["kle på seg", "kle på deg"]}. Nøkkelen er filnavnet med eller uten filendelse.
+ALIAS_FILE = "aliases.json"
+
+
+def hash_file(file_path):
+    """Innholds-ID for en bildefil (SHA-1 av bytene)."""
+    digest = hashlib.sha1()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def is_image_file(filename):
+    return filename.lower().endswith(IMAGE_EXTENSIONS)
+
+
+def answer_for_filename(filename):
+    return os.path.splitext(filename)[0]
+
+
+def describe_signs(jobs):
+    """Beskriver en liste (sti, filnavn) i rekkefølge, med None for filer som ikke kunne leses.
+    Kan byttes ut med en parallell variant."""
+    return [describe_sign(file_path, filename) for file_path, filename in jobs]
+
+
+def describe_sign(file_path, filename):
+    """Manifestoppføring for ett bilde: svar, innholds-ID, dimensjoner og filstørrelse.
+    None hvis filen ikke kan leses, f.eks. fordi den ble slettet etter at mappen ble skannet."""
+    try:
+        st = os.stat(file_path)
+        content_id = hash_file(file_path)
+    except OSError as e:
+        logging.warning(f"Hopper over {file_path}: {e}")
+        return None
+    try:
+        with Image.open(file_path) as img:
+            width, height = img.size  # Leser bare headeren
+    except OSError as e:
+        logging.warning(f"Kunne ikke lese bildet {file_path}: {e}")
+        width = height = 0
+    return {
+        "answer": answer_for_filename(filename),
+        "content_id": content_id,
+        "width": width,
+        "height": height,
+        "bytes": st.st_size,
+        "mtime": st.st_mtime_ns,
+    }
+
+
+# Hva som ble endret ved en revalidering, slik at spillet kan oppdatere seg bit for bit
+class AssetChanges:
+    def __init__(self):
+        self.added = []  # (kategori, filnavn)
+        self.removed = []  # (kategori, filnavn)
+        self.changed = []  # (kategori, filnavn)
+        self.added_categories = []
+        self.removed_categories = []
+        self.stale_content_ids = set()  # Innholds-ID-er som ikke lenger gjelder
+        self.alias_categories = []  # Kategorier der aliasfilen er endret
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed or self.added_categories or self.removed_categories
+                    or self.alias_categories)
+
+    def __repr__(self):
+        return (f"AssetChanges(added={len(self.added)}, removed={len(self.removed)}, changed={len(self.changed)}, "
+                f"added_categories={self.added_categories}, removed_categories={self.removed_categories}, "
+                f"alias_categories={self.alias_categories})")
+
+
+def default_manifest_path(base_folder, cache_dir=None):
+    key = hashlib.sha1(os.path.abspath(base_folder).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir or user_cache_dir(), "manifests", f"{key}.json")
+
+
+# Innholdsadressert bildelager: hver (kategori, filnavn) peker på én innholds-ID,
+# slik at like tegn i Tilfeldig og manedens_tegn bare dekodes og caches én gang.
+# Alt slås opp i et manifest som lagres på disk og bare skannes på nytt for mapper
+# som har endret mtime, i stedet for å liste Kategorier hver gang.
+class AssetStore:
+    def __init__(self, base_folder, manifest_path=None, describe=describe_signs):
+        self.base_folder = base_folder
+        self.describe = describe  # describe([(sti, filnavn), ...]) -> manifestoppføringer
+        bundled_index = os.path.join(self.base_folder, INDEX_FILE)
+        # I PyInstaller-pakken er manifestet bygget på forhånd og innholdet kan ikke endres
+        self.read_only = os.path.exists(bundled_index)
+        self.manifest_path = bundled_index if self.read_only else (manifest_path or default_manifest_path(base_folder))
+        self.manifest = self.load_manifest()
+        self._generation = 0  # Økes hver gang et skann tas i bruk, så et skann fra før det kan forkastes
+        # Aliasene holdes utenfor manifestet, så de kan lastes på nytt uten å skanne bildene
+        self.aliases = {}  # kategori -> {filnavn eller svar: [alias, ...]}
+        self._alias_mtimes = {}
+        if self.read_only:
+            logging.info(f"Bruker pakket bildeindeks med {len(self.manifest['blobs'])} unike bilder.")
+        else:
+            self.refresh()
+        self.reload_aliases()
+
+    def load_manifest(self):
+        empty = {"version": MANIFEST_VERSION, "root_mtime": None, "categories": {}, "blobs": {}}
+        if not os.path.exists(self.manifest_path):
+            return empty
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logging.error(f"Kunne ikke lese bildemanifestet {self.manifest_path}: {e}")
+            return empty
+        if manifest.get("version") != MANIFEST_VERSION:
+            return empty
+        return manifest
+
+    def save_manifest(self):
+        tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.manifest, f, ensure_ascii=False)
+            os.replace(tmp_path, self.manifest_path)
+        except OSError as e:
+            logging.warning(f"Kunne ikke lagre bildemanifestet {self.manifest_path}: {e}")
+
+    def refresh(self, deep=False, only_categories=None):
+        """Revaliderer manifestet med mtime på mappene og skanner bare det som er endret.
+        Med `deep` sjekkes også hver fil, så bilder som er overskrevet på stedet oppdages.
+        Returnerer et AssetChanges-objekt (usant hvis ingenting er endret)."""
+        return self.apply_scan(self.scan(deep, only_categories))
+
+    def scan(self, deep=False, only_categories=None):
+        """Diskarbeidet i refresh() (stat, listing og hashing) mot en kopi av manifestet, uten å endre det,
+        så det kan gjøres i en annen tråd. Resultatet tas i bruk med apply_scan() på tråden som eier lageret."""
+        if self.read_only:
+            return None
+        changes = AssetChanges()
+        generation = self._generation
+        categories = dict(self.manifest["categories"])  # Oppføringene kopieres før de endres
+        mtimes_changed = False
+        root_mtime = os.stat(self.base_folder).st_mtime_ns
+        if root_mtime != self.manifest["root_mtime"]:
+            mtimes_changed = True
+            present = {d for d in os.listdir(self.base_folder) if os.path.isdir(os.path.join(self.base_folder, d))}
+            for category in list(categories):
+                if category not in present:
+                    for filename, sign in categories.pop(category)["signs"].items():
+                        changes.removed.append((category, filename))
+                        changes.stale_content_ids.add(sign["content_id"])
+                    changes.removed_categories.append(category)
+            for category in sorted(present - set(categories)):
+                categories[category] = {"mtime": None, "signs": {}}
+                changes.added_categories.append(category)
+
+        scanned = []  # (kategori, gamle oppføringer, nye oppføringer)
+        pending = []  # (kategori, filnavn, sti) som må hashes på nytt
+        for category, entry in categories.items():
+            if only_categories is not None and category not in only_categories and entry["mtime"] is not None:
+                continue
+            folder_path = os.path.join(self.base_folder, category)
+            try:
+                mtime = os.stat(folder_path).st_mtime_ns
+            except FileNotFoundError:
+                continue  # Mappen er nettopp slettet; fanges opp av neste revalidering
+            if mtime != entry["mtime"] or deep:
+                mtimes_changed = mtimes_changed or mtime != entry["mtime"]
+                old_signs = entry["signs"]
+                categories[category] = {"mtime": mtime,
+                                        "signs": self._scan_category(category, folder_path, old_signs, pending)}
+                scanned.append((category, old_signs, categories[category]["signs"]))
+
+        # Alle nye og endrede filer beskrives samlet, slik at det kan gjøres parallelt
+        if pending:
+            described = self.describe([(file_path, filename) for _, filename, file_path in pending])
+            for (category, filename, _), sign in zip(pending, described):
+                entry = categories[category]
+                if sign is None:
+                    # Plassholderen fjernes, og mappen skannes på nytt neste gang i stedet for å bli stående
+                    del entry["signs"][filename]
+                    entry["mtime"] = None
+                else:
+                    entry["signs"][filename] = sign
+        for category, old_signs, new_signs in scanned:
+            self._diff_category(category, old_signs, new_signs, changes)
+        return generation, root_mtime, categories, changes, mtimes_changed
+
+    def apply_scan(self, scan):
+        """Tar i bruk resultatet fra scan() og lagrer manifestet. Returnerer AssetChanges, eller None hvis
+        manifestet er endret siden skanningen begynte; da må det skannes på nytt."""
+        if scan is None:
+            return AssetChanges()
+        generation, root_mtime, categories, changes, mtimes_changed = scan
+        if generation != self._generation:
+            return None
+        self._generation += 1
+        self.manifest["categories"] = categories
+        self.manifest["root_mtime"] = root_mtime
+        if changes or mtimes_changed:
+            self._rebuild_blobs()
+            self.save_manifest()
+        if changes:
+            total = sum(len(entry["signs"]) for entry in categories.values())
+            logging.info(f"Bildemanifest oppdatert: {len(categories)} kategorier, {total} tegn ({changes}).")
+        return changes
+
+    def _diff_category(self, category, old_signs, new_signs, changes):
+        for filename, sign in new_signs.items():
+            old = old_signs.get(filename)
+            if old is None:
+                changes.added.append((category, filename))
+            elif old["content_id"] != sign["content_id"]:
+                changes.changed.append((category, filename))
+                changes.stale_content_ids.add(old["content_id"])
+        for filename, old in old_signs.items():
+            if filename not in new_signs:
+                changes.removed.append((category, filename))
+                changes.stale_content_ids.add(old["content_id"])
+
+    def _scan_category(self, category, folder_path, old_signs, pending):
+        signs = {}
+        for filename in sorted(os.listdir(folder_path)):
+            if not is_image_file(filename):
+                continue
+            file_path = os.path.join(folder_path, filename)
+            old = old_signs.get(filename)
+            try:
+                st = os.stat(file_path)
+            except FileNotFoundError:
+                continue  # Slettet mens vi skannet
+            # Uendrede filer (samme størrelse og mtime) trenger ikke hashes på nytt
+            if old is not None and old["bytes"] == st.st_size and old["mtime"] == st.st_mtime_ns:
+                signs[filename] = old
+            else:
+                signs[filename] = None  # Fylles inn når de ventende filene er beskrevet
+                pending.append((category, filename, file_path))
+        return signs
+
+    def reload_aliases(self):
+        """Leser aliasfilene som er nye, endret eller slettet (bare en stat per kategori).
+        Returnerer kategoriene der aliasene er endret."""
+        changed = []
+        for category in set(self.manifest["categories"]) | set(self._alias_mtimes):
+            alias_path = os.path.join(self.base_folder, category, ALIAS_FILE)
+            try:
+                mtime = os.stat(alias_path).st_mtime_ns
+            except OSError:
+                mtime = None
+            if mtime == self._alias_mtimes.get(category):
+                continue
+            aliases = {}
+            if mtime is not None:
+                try:
+                    with open(alias_path, "r", encoding="utf-8") as f:
+                        aliases = json.load(f)
+                    if not isinstance(aliases, dict):
+                        raise ValueError("forventet et objekt med filnavn som nøkler")
+                except (OSError, ValueError) as e:
+                    logging.warning(f"Kunne ikke lese aliasfilen {alias_path}: {e}")
+                    continue  # Prøver igjen ved neste revalidering
+                self._alias_mtimes[category] = mtime
+            else:
+                self._alias_mtimes.pop(category, None)
+            self.aliases[category] = {key: [alias for alias in values if isinstance(alias, str)]
+                                      for key, values in aliases.items() if isinstance(values, list)}
+            changed.append(category)
+        return changed
+
+    def _rebuild_blobs(self):
+        blobs = {}
+        for category in sorted(self.manifest["categories"]):
+            for filename, sign in self.manifest["categories"][category]["signs"].items():
+                # Første forekomst (sortert) blir den kanoniske filen
+                blobs.setdefault(sign["content_id"], f"{category}/{filename}")
+        self.manifest["blobs"] = blobs
+
+    def categories(self):
+        return list(self.manifest["categories"])
+
+    def list_images(self, category):
+        entry = self.manifest["categories"].get(category)
+        return list(entry["signs"]) if entry else []
+
+    def image_count(self, category):
+        entry = self.manifest["categories"].get(category)
+        return len(entry["signs"]) if entry else 0
+
+    def accepted_answers(self, category, filename):
+        """Svaret fra filnavnet pluss eventuelle alias fra aliasfilen i kategorien."""
+        answer = self.answer(category, filename)
+        aliases = self.aliases.get(category, {})
+        return [answer] + aliases.get(filename, aliases.get(answer, []))
+
+    def answers(self):
+        """(svar, innholds-ID) for alle godkjente svar, alias inkludert, på tvers av kategoriene."""
+        for category in self.manifest["categories"]:
+            for filename in self.list_images(category):
+                content_id = self.content_id(category, filename)
+                for answer in self.accepted_answers(category, filename):
+                    yield answer, content_id
+
+    def sign(self, category, filename):
+        return self.manifest["categories"][category]["signs"][filename]
+
+    def answer(self, category, filename):
+        return self.sign(category, filename)["answer"]
+
+    def content_id(self, category, filename):
+        return self.sign(category, filename)["content_id"]
+
+    def image_path(self, category, filename):
+        """Stien til bytene for et tegn. I pakken deler like bilder samme fil."""
+        return self.path_for_content(self.content_id(category, filename))
+
+    def path_for_content(self, content_id):
+        """En fil som inneholder bildet med denne innholds-ID-en."""
+        return os.path.join(self.base_folder, *self.manifest["blobs"][content_id].split("/"))
+
+
+class _CategoryEventHandler(FileSystemEventHandler):
+    """Noterer hvilke kategorimapper watchdog har sett endringer i (kjører i watchdog-tråden)."""
+
+    def __init__(self, watcher):
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        for path in (event.src_path, getattr(event, "dest_path", "")):
+            if path:
+                self.watcher.mark_dirty(path)
+
+
+# Følger med på Kategorier mens spillet kjører, så nye eller slettede tegn dukker opp uten omstart.
+# Bruker watchdog (inotify o.l.) når den er installert, ellers polling med jevne mellomrom.
+# Selve skanningen (stat og hashing av hver fil) gjøres i en egen tråd; Tk-tråden tar bare i bruk resultatet.
+class AssetWatcher:
+    def __init__(self, root, assets, on_change, poll_ms=5000, event_poll_ms=1000, use_watchdog=True):
+        self.root = root
+        self.assets = assets
+        self.on_change = on_change  # Kalles på Tk-tråden med et AssetChanges-objekt
+        self.poll_ms = poll_ms
+        self.event_poll_ms = event_poll_ms
+        self.use_watchdog = use_watchdog and Observer is not None
+        self._observer = None
+        self._dirty = set()  # Kategorier (eller "" for rotmappen) med endringer fra watchdog
+        self._lock = threading.Lock()
+        self._after_id = None
+        self._scan_thread = None  # Skanningen som pågår, med kategoriene den gjelder (None = alle)
+        self._scan_categories = None
+        self._scan_result = None  # Resultatet fra scan(), eller unntaket den kastet
+
+    def start(self):
+        if self.assets.read_only or self._after_id is not None:
+            return
+        if self.use_watchdog:
+            try:
+                self._observer = Observer()
+                self._observer.schedule(_CategoryEventHandler(self), self.assets.base_folder, recursive=True)
+                self._observer.start()
+                logging.info("Følger med på Kategorier med watchdog.")
+            except Exception as e:
+                logging.warning(f"Kunne ikke starte watchdog, bruker polling: {e}")
+                self._observer = None
+        if self._observer is None:
+            logging.info(f"Følger med på Kategorier med polling hvert {self.poll_ms / 1000:g}. sekund.")
+        self._schedule()
+
+    def stop(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=2)
+            self._observer = None
+
+    def mark_dirty(self, path):
+        relative_path = os.path.relpath(path, self.assets.base_folder)
+        parts = relative_path.split(os.sep)
+        category = parts[0] if len(parts) > 1 else ""
+        with self._lock:
+            self._dirty.add(category)
+
+    def _schedule(self):
+        # Mens en skanning pågår, sjekkes det oftere om den er ferdig
+        polling = self._observer is None and self._scan_thread is None
+        self._after_id = self.root.after(self.poll_ms if polling else self.event_poll_ms, self._tick)
+
+    def _start_scan(self, only_categories):
+        self._scan_categories = only_categories
+        self._scan_result = None
+        self._scan_thread = threading.Thread(target=self._scan, args=(only_categories,), name="asset-scan",
+                                             daemon=True)
+        self._scan_thread.start()
+
+    def _scan(self, only_categories):
+        # Kjører i skannetråden og endrer ikke manifestet
+        try:
+            self._scan_result = self.assets.scan(deep=True, only_categories=only_categories)
+        except Exception as e:
+            self._scan_result = e
+
+    def _finish_scan(self):
+        # Kjører på Tk-tråden når skannetråden er ferdig
+        result, only_categories = self._scan_result, self._scan_categories
+        self._scan_thread = self._scan_result = self._scan_categories = None
+        if isinstance(result, Exception):
+            if only_categories:
+                with self._lock:
+                    self._dirty |= only_categories  # Prøves igjen ved neste runde
+            raise result
+        changes = self.assets.apply_scan(result)
+        if changes is None:
+            # Manifestet ble revalidert på Tk-tråden mens vi skannet; skann på nytt neste runde
+            if only_categories:
+                with self._lock:
+                    self._dirty |= only_categories
+            return AssetChanges()
+        return changes
+
+    def _tick(self):
+        # Kjører på Tk-tråden, så manifestet og spilltilstanden bare endres herfra
+        self._after_id = None
+        try:
+            changes = AssetChanges()
+            if self._scan_thread is not None:
+                if not self._scan_thread.is_alive():
+                    changes = self._finish_scan()
+            elif self._observer is not None:
+                with self._lock:
+                    dirty, self._dirty = self._dirty, set()
+                if dirty:
+                    self._start_scan(dirty)
+            else:
+                self._start_scan(None)
+            changes.alias_categories = self.assets.reload_aliases()
+            if changes:
+                self.on_change(changes)
+        except OSError as e:
+            logging.warning(f"Feil under skanning av Kategorier: {e}")
+        except Exception:
+            # En feil i spillets oppdatering skal ikke stoppe overvåkingen resten av økten
+            logging.exception("Feil under oppdatering etter endringer i Kategorier")
+        finally:
+            self._schedule()
+
+
+def build_bundle_datas(base_folder, staging_dir, dest="Kategorier"):
+    """Lager PyInstaller-`datas` uten dupliserte bilder, pluss manifestet som peker like tegn til samme fil."""
+    assets = AssetStore(base_folder, manifest_path=os.path.join(staging_dir, "manifest.json"))
+    os.makedirs(staging_dir, exist_ok=True)
+    index_path = os.path.join(staging_dir, INDEX_FILE)
+    with open(index_path, "w", encoding="utf-8") as f:
+        json.dump(assets.manifest, f, ensure_ascii=False)
+
+    # Distraktortabellen for flervalg bygges også på forhånd og legges ved siden av indeksen.
+    # Bildehashene blir liggende i staging-mappen, så neste bygg bare hasher nye bilder.
+    from distractors import DISTRACTOR_FILE, build_distractors  # distractors importerer assets
+    from image_hashes import HASH_FILE, open_hash_index
+    hashes = open_hash_index(assets, path=os.path.join(staging_dir, HASH_FILE))
+    distractor_path = os.path.join(staging_dir, DISTRACTOR_FILE)
+    build_distractors(assets, hashes).save(distractor_path)
+
+    datas = [(index_path, dest), (distractor_path, dest)]
+    for relative_path in assets.manifest["blobs"].values():
+        category, filename = relative_path.split("/", 1)
+        datas.append((os.path.join(base_folder, category, filename), f"{dest}/{category}"))
+    for category in assets.categories():
+        alias_path = os.path.join(base_folder, category, ALIAS_FILE)
+        if os.path.exists(alias_path):
+            datas.append((alias_path, f"{dest}/{category}"))
+    total = sum(assets.image_count(category) for category in assets.categories())
+    logging.info(f"Pakker {len(assets.manifest['blobs'])} unike bilder for {total} tegn.")
+    return datas
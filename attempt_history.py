@@ -0,0 +1,242 @@
+"""Hvert svarforsøk for alle spillere i ASK123, lagret kolonnevis som NumPy-tabeller.
+
+Et forsøk er én post på 16 byte (spiller, tegn, tidspunkt, svartid, riktig/hint/nesten og
+vanskelighetsgrad) i en strukturert NumPy-tabell. Nye forsøk samles i en buffer og legges
+til på slutten av filen i biter, så et år med daglig bruk for en klasse er noen få MB.
+Analysene ("hvilke tegn bommer barnet på", "hvor raskt svarer det") er vektoriserte
+operasjoner over kolonnene, uten en løkke i Python per forsøk.
+
+Tegnene lagres som indekser i en egen tegntabell (én innholds-ID per linje), så hver post
+bare trenger fire byte for tegnet.
+
+    python attempt_history.py [--players players] [--player NAVN] [--count 10]
+"""
+import argparse
+import logging
+import os
+import struct
+import time
+
+import numpy as np
+
+from assets import AssetStore, answer_for_filename
+from player_store import PLAYER_DB, PlayerStore
+
+ATTEMPT_MAGIC = b"ASKTRIES"
+ATTEMPT_VERSION = 1
+ATTEMPT_FILE = "attempts.bin"
+SIGN_TABLE_FILE = "attempts.signs"
+ATTEMPT_CHUNK = 256  # Forsøk i bufferen før de skrives til disk
+DIFFICULTIES = ("easy", "medium", "hard")
+MAX_LATENCY_MS = np.iinfo(np.uint16).max  # Lengre svartid (barnet gikk fra) lagres som dette
+_HEADER = struct.Struct("<8sII")  # magic, versjon, bytes per post
+
+# Flagg i "flags"-kolonnen
+CORRECT = 1
+HINT_USED = 2
+ALMOST = 4
+
+ATTEMPT_DTYPE = np.dtype([
+    ("player", "<u4"),  # Spiller-ID i spillerdatabasen
+    ("sign", "<u4"),  # Indeks i tegntabellen
+    ("time", "<u4"),  # Sekunder siden 1970
+    ("latency_ms", "<u2"),  # Fra spørsmålet (eller forrige forsøk) til svaret
+    ("flags", "u1"),
+    ("difficulty", "u1"),  # Indeks i DIFFICULTIES
+])
+
+
+class AttemptLog:
+    def __init__(self, directory, chunk=ATTEMPT_CHUNK):
+        self.path = os.path.join(directory, ATTEMPT_FILE)
+        self.sign_table_path = os.path.join(directory, SIGN_TABLE_FILE)
+        self.chunk = chunk
+        self._buffer = np.zeros(chunk, dtype=ATTEMPT_DTYPE)
+        self._buffered = 0
+        self.sign_ids = []  # Indeks -> innholds-ID
+        self._sign_index = {}
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.sign_table_path):
+            with open(self.sign_table_path, "r", encoding="ascii") as f:
+                self.sign_ids = f.read().split()
+            self._sign_index = {sign_id: index for index, sign_id in enumerate(self.sign_ids)}
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as f:
+                header = f.read(_HEADER.size)
+            if len(header) == _HEADER.size and _HEADER.unpack(header) != self._header_fields():
+                raise ValueError(f"Ukjent format på forsøkshistorikken i {self.path}")
+
+    @staticmethod
+    def _header_fields():
+        return ATTEMPT_MAGIC, ATTEMPT_VERSION, ATTEMPT_DTYPE.itemsize
+
+    def sign_index(self, sign_id):
+        """Indeksen til tegnet i tegntabellen. Et nytt tegn skrives til tabellen før et forsøk kan peke på det."""
+        index = self._sign_index.get(sign_id)
+        if index is None:
+            with open(self.sign_table_path, "a", encoding="ascii") as f:
+                f.write(sign_id + "\n")
+            index = self._sign_index[sign_id] = len(self.sign_ids)
+            self.sign_ids.append(sign_id)
+        return index
+
+    def record(self, player_id, sign_id, latency_ms, correct, hint_used=False, almost=False, difficulty="easy",
+               now=None):
+        """Legger forsøket i bufferen. Bufferen skrives til disk når den er full, eller ved flush()."""
+        row = self._buffer[self._buffered]
+        row["player"] = player_id
+        row["sign"] = self.sign_index(sign_id)
+        row["time"] = int(time.time() if now is None else now)
+        row["latency_ms"] = min(max(int(latency_ms), 0), MAX_LATENCY_MS)
+        row["flags"] = (CORRECT if correct else 0) | (HINT_USED if hint_used else 0) | (ALMOST if almost else 0)
+        row["difficulty"] = DIFFICULTIES.index(difficulty)
+        self._buffered += 1
+        if self._buffered == self.chunk:
+            self.flush()
+
+    def flush(self):
+        """Legger bufferen til på slutten av filen som én bit."""
+        if not self._buffered:
+            return
+        try:
+            with open(self.path, "ab") as f:
+                size = f.tell()
+                if size == 0:
+                    f.write(_HEADER.pack(*self._header_fields()))
+                elif (size - _HEADER.size) % ATTEMPT_DTYPE.itemsize:
+                    # En avbrutt post fra en krasj kuttes, ellers ville alle nye poster bli forskjøvet
+                    f.truncate(size - (size - _HEADER.size) % ATTEMPT_DTYPE.itemsize)
+                f.write(self._buffer[:self._buffered].tobytes())
+            self._buffered = 0
+        except OSError as e:
+            logging.error(f"Kunne ikke lagre forsøkshistorikken i {self.path}: {e}")
+
+    def load(self):
+        """Alle forsøk (på disk og i bufferen) som én strukturert tabell."""
+        parts = []
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()[_HEADER.size:]
+            usable = len(data) - len(data) % ATTEMPT_DTYPE.itemsize  # En avbrutt siste post hoppes over
+            parts.append(np.frombuffer(data, dtype=ATTEMPT_DTYPE, count=usable // ATTEMPT_DTYPE.itemsize))
+        except FileNotFoundError:
+            pass
+        parts.append(self._buffer[:self._buffered].copy())
+        return AttemptHistory(np.concatenate(parts), self.sign_ids)
+
+    def delete_player(self, player_id):
+        """Fjerner alle forsøkene til spilleren (filen skrives på nytt)."""
+        self.flush()
+        history = self.load()
+        kept = history.attempts[history.attempts["player"] != player_id]
+        if len(kept) == len(history.attempts):
+            return
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(*self._header_fields()))
+            f.write(kept.tobytes())
+        os.replace(tmp_path, self.path)
+
+
+class AttemptHistory:
+    def __init__(self, attempts, sign_ids):
+        self.attempts = attempts  # Strukturert tabell med ATTEMPT_DTYPE
+        self.sign_ids = sign_ids
+
+    def __len__(self):
+        return len(self.attempts)
+
+    def for_player(self, player_id):
+        return AttemptHistory(self.attempts[self.attempts["player"] == player_id], self.sign_ids)
+
+    def since(self, timestamp):
+        return AttemptHistory(self.attempts[self.attempts["time"] >= timestamp], self.sign_ids)
+
+    def correct(self):
+        return (self.attempts["flags"] & CORRECT).astype(bool)
+
+    def summary(self):
+        """Antall forsøk, andel riktige, andel med hint og median/p90 svartid."""
+        attempts = self.attempts
+        if not len(attempts):
+            return {"attempts": 0}
+        latency = attempts["latency_ms"]
+        return {
+            "attempts": len(attempts),
+            "accuracy": round(float(self.correct().mean()), 3),
+            "hint_rate": round(float((attempts["flags"] & HINT_USED).astype(bool).mean()), 3),
+            "median_latency_ms": int(np.median(latency)),
+            "p90_latency_ms": int(np.percentile(latency, 90)),
+            "signs": int(np.unique(attempts["sign"]).size),
+        }
+
+    def by_sign(self):
+        """(tegnindekser, forsøk, gale, gjennomsnittlig svartid) per tegn, med bincount over sign-kolonnen."""
+        signs = self.attempts["sign"]
+        length = len(self.sign_ids)
+        tries = np.bincount(signs, minlength=length)
+        wrong = np.bincount(signs, weights=~self.correct(), minlength=length).astype(np.int64)
+        latency = np.bincount(signs, weights=self.attempts["latency_ms"], minlength=length)
+        seen = np.nonzero(tries)[0]
+        return seen, tries[seen], wrong[seen], latency[seen] / tries[seen]
+
+    def most_missed(self, count=10, min_attempts=2):
+        """Tegnene med flest gale svar i forhold til forsøk, som (innholds-ID, gale, forsøk), verst først."""
+        signs, tries, wrong, _ = self.by_sign()
+        keep = (tries >= min_attempts) & (wrong > 0)
+        signs, tries, wrong = signs[keep], tries[keep], wrong[keep]
+        order = np.lexsort((-tries, -wrong / tries))[:count]
+        return [(self.sign_ids[signs[i]], int(wrong[i]), int(tries[i])) for i in order]
+
+    def slowest(self, count=10, min_attempts=2):
+        """Tegnene med lengst gjennomsnittlig svartid, som (innholds-ID, ms, forsøk)."""
+        signs, tries, _, latency = self.by_sign()
+        keep = tries >= min_attempts
+        signs, tries, latency = signs[keep], tries[keep], latency[keep]
+        order = np.argsort(-latency, kind="stable")[:count]
+        return [(self.sign_ids[signs[i]], int(latency[i]), int(tries[i])) for i in order]
+
+    def daily(self):
+        """(dag som sekunder siden 1970, forsøk, riktige) per dag med forsøk."""
+        days = self.attempts["time"] // 86400
+        unique_days, inverse = np.unique(days, return_inverse=True)
+        tries = np.bincount(inverse, minlength=len(unique_days))
+        correct = np.bincount(inverse, weights=self.correct(), minlength=len(unique_days)).astype(np.int64)
+        return unique_days * 86400, tries, correct
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Viser forsøkshistorikken for spillerne i ASK123.")
+    parser.add_argument("--players", default="players", help="Mappen med spillerdatabasen")
+    parser.add_argument("--base", default="Kategorier", help="Mappen med kategoriene, for navn på tegnene")
+    parser.add_argument("--player", help="Bare denne spilleren (standard: alle)")
+    parser.add_argument("--count", type=int, default=10, help="Antall tegn i listene")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    history = AttemptLog(args.players).load()
+    if args.player:
+        store = PlayerStore(os.path.join(args.players, PLAYER_DB))
+        player_id = store.player_id(args.player)
+        store.close()
+        if player_id is None:
+            parser.error(f"Fant ikke spilleren {args.player}")
+        history = history.for_player(player_id)
+    assets = AssetStore(args.base)
+
+    def sign_name(content_id):
+        if content_id not in assets.manifest["blobs"]:
+            return content_id[:12]  # Tegnet er fjernet fra Kategorier siden
+        return answer_for_filename(os.path.basename(assets.path_for_content(content_id)))
+
+    print(history.summary())
+    print("Flest gale svar:")
+    for content_id, wrong, tries in history.most_missed(args.count):
+        print(f"  {sign_name(content_id):<24} {wrong}/{tries} gale")
+    print("Lengst svartid:")
+    for content_id, latency_ms, tries in history.slowest(args.count):
+        print(f"  {sign_name(content_id):<24} {latency_ms / 1000:.1f} s ({tries} forsøk)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Måler oppbygging og retting med AnswerIndex for store vokabularer.
+
+    python benchmarks/bench_answer_index.py [--sizes 500,50000] [--queries 5000]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from answer_index import AnswerIndex, TYPO_TOLERANCE
+
+LETTERS = "abcdefghijklmnopqrstuvwxyzæøå"
+
+
+def make_vocabulary(count, rng):
+    words = set()
+    while len(words) < count:
+        words.add("".join(rng.choice(LETTERS) for _ in range(rng.randint(3, 12))))
+    return sorted(words)
+
+
+def typo(word, rng):
+    i = rng.randrange(len(word))
+    kind = rng.choice(("replace", "delete", "insert", "swap"))
+    if kind == "replace":
+        return word[:i] + rng.choice(LETTERS) + word[i + 1:]
+    if kind == "delete":
+        return word[:i] + word[i + 1:]
+    if kind == "insert":
+        return word[:i] + rng.choice(LETTERS) + word[i:]
+    return word[:i] + word[i + 1:i + 2] + word[i:i + 1] + word[i + 2:]
+
+
+def percentile(ordered, p):
+    return round(ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))], 4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="500,50000")
+    parser.add_argument("--queries", type=int, default=5000)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    results = []
+    for size in (int(size) for size in args.sizes.split(",")):
+        vocabulary = make_vocabulary(size, rng)
+        start = time.perf_counter()
+        index = AnswerIndex(vocabulary)
+        build_s = time.perf_counter() - start
+
+        samples_ms = []
+        verdicts = {}
+        for _ in range(args.queries):
+            expected = rng.choice(vocabulary)
+            user_input = typo(expected, rng) if rng.random() < 0.5 else rng.choice(vocabulary)
+            start = time.perf_counter()
+            verdict, _ = index.classify(user_input, expected, TYPO_TOLERANCE["easy"])
+            samples_ms.append((time.perf_counter() - start) * 1000)
+            verdicts[verdict] = verdicts.get(verdict, 0) + 1
+        samples_ms.sort()
+        results.append({"vocabulary": size, "build_s": round(build_s, 3),
+                        "p50_ms": percentile(samples_ms, 50), "p99_ms": percentile(samples_ms, 99),
+                        "verdicts": verdicts})
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Måler forsøkshistorikken for et år med daglig bruk i en klasse.
+
+Skriver `--players` x `--days` x `--per-day` forsøk gjennom AttemptLog (i biter, som i spillet),
+og måler filstørrelse, lasting og analysene: sammendrag, mest bommede og tregeste tegn og
+forsøk per dag, både for hele klassen og for én elev.
+
+    python benchmarks/bench_attempt_history.py [--players 25] [--days 200] [--per-day 60]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from attempt_history import DIFFICULTIES, AttemptLog
+
+
+def timed_ms(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return round((time.perf_counter() - start) * 1000 / repeat, 3), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=25)
+    parser.add_argument("--days", type=int, default=200)
+    parser.add_argument("--per-day", type=int, default=60, help="Forsøk per elev per skoledag")
+    parser.add_argument("--signs", type=int, default=1500)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    sign_ids = [f"{i:040x}" for i in range(args.signs)]
+    hard_signs = set(rng.sample(sign_ids, 20))  # Tegn alle bommer på oftere, skal toppe listen
+    start_day = 1767225600  # 1. januar 2026
+    total = args.players * args.days * args.per_day
+    result = {"attempts": total}
+    with tempfile.TemporaryDirectory() as players_dir:
+        log = AttemptLog(players_dir)
+        start = time.perf_counter()
+        for day in range(args.days):
+            for player_id in range(1, args.players + 1):
+                now = start_day + day * 86400 + 9 * 3600 + player_id * 60
+                for _ in range(args.per_day):
+                    sign_id = rng.choice(sign_ids)
+                    correct = rng.random() < (0.3 if sign_id in hard_signs else 0.85)
+                    log.record(player_id, sign_id, rng.lognormvariate(8, 0.6), correct, rng.random() < 0.1,
+                               False, rng.choice(DIFFICULTIES), now)
+                    now += 20
+        log.flush()
+        elapsed = time.perf_counter() - start
+        result["record_us"] = round(elapsed * 1e6 / total, 2)
+        result["file_mb"] = round((os.path.getsize(log.path) + os.path.getsize(log.sign_table_path)) / 2 ** 20, 2)
+
+        result["load_ms"], history = timed_ms(lambda: AttemptLog(players_dir).load(), args.repeat)
+        assert len(history) == total
+        result["class_summary_ms"], _ = timed_ms(history.summary, args.repeat)
+        result["class_most_missed_ms"], missed = timed_ms(lambda: history.most_missed(10), args.repeat)
+        result["class_daily_ms"], _ = timed_ms(history.daily, args.repeat)
+        result["hard_signs_in_top10"] = sum(sign_id in hard_signs for sign_id, _, _ in missed)
+        result["player_filter_ms"], pupil = timed_ms(lambda: history.for_player(1), args.repeat)
+        result["player_most_missed_ms"], _ = timed_ms(lambda: pupil.most_missed(10), args.repeat)
+        result["player_slowest_ms"], _ = timed_ms(lambda: pupil.slowest(10), args.repeat)
+        result["player_summary"] = pupil.summary()
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Måler dekodetid og minnetopp for bildelasteren med og uten redusert JPEG-dekoding.
+
+Kjør fra prosjektmappen:
+    python benchmarks/bench_decode.py --count 20 --width 3000 --height 4000
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+
+from image_pipeline import load_resized_image, QUIZ_SIZE, THUMBNAIL_SIZE
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def make_synthetic_images(folder, count, width, height):
+    """Lager store «mobilbilder» (JPEG) og noen PNG-er med støy, så dekoderen får ordentlig arbeid.
+    Hvert femte bilde er PNG, og det siste er alltid PNG, så begge formatene er med fra to bilder."""
+    paths = []
+    for i in range(count):
+        img = Image.effect_noise((width, height), 64).convert("RGB")
+        ext = "png" if i % 5 == 4 or (i == count - 1 and count < 5) else "jpg"
+        path = os.path.join(folder, f"stort_{i:03d}.{ext}")
+        img.save(path, quality=90) if ext == "jpg" else img.save(path, compress_level=1)
+        paths.append(path)
+    return paths
+
+
+def peak_rss_kb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS rapporterer bytes, Linux kilobytes
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def run_variant(paths, reduced_decode):
+    """Kjøres i en egen prosess, så minnetoppen gjelder bare denne varianten og dette formatet."""
+    if not paths:
+        return {"images": 0, "skipped": "ingen bilder i dette formatet"}
+    baseline_kb = peak_rss_kb()
+    timings = []
+    for path in paths:
+        for size in (QUIZ_SIZE, THUMBNAIL_SIZE):
+            start = time.perf_counter()
+            load_resized_image(path, size, reduced_decode=reduced_decode)
+            timings.append((time.perf_counter() - start) * 1000)
+    peak_kb = peak_rss_kb()
+    return {
+        "images": len(paths),
+        "median_ms": round(statistics.median(timings), 2),
+        "total_ms": round(sum(timings), 1),
+        "peak_rss_kb": peak_kb,
+        "peak_rss_growth_kb": None if peak_kb is None else peak_kb - baseline_kb,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=10)
+    parser.add_argument("--width", type=int, default=3000)
+    parser.add_argument("--height", type=int, default=4000)
+    parser.add_argument("--generate", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--variant", choices=["full", "reduced"], help=argparse.SUPPRESS)
+    parser.add_argument("--ext", help=argparse.SUPPRESS)
+    parser.add_argument("--folder", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.generate:
+        make_synthetic_images(args.folder, args.count, args.width, args.height)
+        return
+    if args.variant:
+        paths = sorted(os.path.join(args.folder, f) for f in os.listdir(args.folder) if f.endswith(args.ext))
+        print(json.dumps(run_variant(paths, reduced_decode=args.variant == "reduced")))
+        return
+
+    with tempfile.TemporaryDirectory() as folder:
+        # Alt tungt skjer i barneprosesser: Linux arver minnetoppen fra forelderen ved fork
+        subprocess.run([sys.executable, __file__, "--generate", "--folder", folder, "--count", str(args.count),
+                        "--width", str(args.width), "--height", str(args.height)], check=True)
+        results = {}
+        for ext in ("jpg", "png"):
+            for variant in ("full", "reduced"):
+                output = subprocess.run([sys.executable, __file__, "--variant", variant, "--folder", folder, "--ext", ext],
+                                        check=True, capture_output=True, text=True).stdout
+                results[f"{ext}_{variant}"] = json.loads(output)
+    print(json.dumps({"images": args.count, "source_size": [args.width, args.height], "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
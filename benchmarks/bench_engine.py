@@ -0,0 +1,85 @@
+"""Simulerer hele quizøkter mot spillmotoren uten vindu og måler økter og svar per sekund.
+
+Hver simulert spiller svarer riktig med en gitt sannsynlighet og ellers feil, tar hint eller
+hopper over, slik at alle greiner i motoren (poeng, rekke, vanskelighetsgrad, repetisjon) brukes.
+Med --record tas øktene opp, så samlingen kan spilles av igjen med session_replay.py.
+
+    python benchmarks/bench_engine.py [--sessions 10000] [--questions 20] [--signs 300] [--record FIL]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quiz_engine import PlayerProgress, QuizSession, ReviewStore, ShuffledDeck, seeded_rng
+from session_replay import SessionLog, SessionRecorder
+
+
+def simulate_session(pool, answers, rng, questions, accuracy, seed, log=None):
+    progress = PlayerProgress()
+    session = QuizSession(pool, answers, progress, "Simulert", rng=seeded_rng(seed, "choices"))
+    recorder = SessionRecorder(session, seed) if log is not None else None
+    session.start()
+    for _ in range(questions):
+        if session.finished:
+            break
+        if rng.random() < accuracy:
+            session.submit(session.correct_answer)
+            continue
+        session.submit("feil")
+        choice = rng.random()
+        if choice < 0.4:
+            session.hint()
+            session.submit(session.correct_answer)
+        elif choice < 0.7:
+            session.skip()
+        else:
+            session.submit(session.correct_answer)
+    if recorder is not None:
+        log.append(recorder)
+    return session.answered_questions
+
+
+def run(mode, sessions, questions, signs, accuracy, seed, record_path=None):
+    answers = {f"tegn{i:05d}.jpg": f"ord{i}" for i in range(signs)}
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as work_dir:
+        store = ReviewStore(os.path.join(work_dir, "simulert.reviews.jsonl")) if mode == "review" else None
+        log = SessionLog(record_path) if record_path else None
+        answered = 0
+        start = time.perf_counter()
+        for _ in range(sessions):
+            session_seed = rng.getrandbits(32)
+            if store is not None:
+                pool = store.queue(answers, sign_id_for=lambda entry: entry, rng=seeded_rng(session_seed, "pool"))
+            else:
+                pool = ShuffledDeck(answers, rng=seeded_rng(session_seed, "pool"))
+            answered += simulate_session(pool, answers, rng, questions, accuracy, session_seed, log)
+        elapsed = time.perf_counter() - start
+    return {"mode": mode, "sessions": sessions, "answers": answered, "seconds": round(elapsed, 3),
+            "sessions_per_s": round(sessions / elapsed, 1), "answers_per_s": round(answered / elapsed, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=10000)
+    parser.add_argument("--questions", type=int, default=20, help="Spørsmål per økt")
+    parser.add_argument("--signs", type=int, default=300, help="Tegn i poolen")
+    parser.add_argument("--accuracy", type=float, default=0.7, help="Andel riktige svar på første forsøk")
+    parser.add_argument("--modes", default="deck,review", help="Kommaseparert: deck, review")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--record", metavar="FIL", help="Ta opp øktene i denne filen (*.sessions.jsonl)")
+    args = parser.parse_args()
+
+    results = [run(mode, args.sessions, args.questions, args.signs, args.accuracy, args.seed, args.record)
+               for mode in args.modes.split(",")]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
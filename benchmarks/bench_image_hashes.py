@@ -0,0 +1,94 @@
+"""Måler bygging og spørringer mot bildehashene for et stort, syntetisk bildesett.
+
+Lager `--images` små JPEG-er (hvert tiende er en omkodet kopi av et annet), hasher alle
+parallelt, legger så til én prosent nye bilder og måler den inkrementelle oppdateringen,
+og til slutt "k mest like" og "nesten like" over hele settet.
+
+    python benchmarks/bench_image_hashes.py [--images 10000] [--workers N] [--queries 1000]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from multiprocessing import Pool
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+
+from assets import AssetStore
+from image_hashes import DUPLICATE_DISTANCE, update_hash_index
+
+IMAGE_SIZE = (96, 96)
+
+
+def make_images(folder, start, count, rng):
+    os.makedirs(folder, exist_ok=True)
+    for i in range(start, start + count):
+        path = os.path.join(folder, f"tegn{i:05d}.jpg")
+        if i % 10 == 9:
+            # Omkodet og litt forminsket kopi av forrige bilde: skal fanges som nesten likt
+            with Image.open(os.path.join(folder, f"tegn{i - 1:05d}.jpg")) as original:
+                original.resize((IMAGE_SIZE[0] - 8, IMAGE_SIZE[1] - 8)).save(path, quality=60)
+            continue
+        img = Image.effect_noise((IMAGE_SIZE[0] // 8, IMAGE_SIZE[1] // 8), rng.randint(20, 90))
+        img.resize(IMAGE_SIZE, Image.Resampling.BILINEAR).convert("RGB").save(path, quality=85)
+
+
+def percentile(ordered, p):
+    return round(ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))], 4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=None, help="Antall prosesser (standard: alle kjerner)")
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    result = {"images": args.images}
+    with tempfile.TemporaryDirectory() as work_dir, Pool(processes=args.workers) as pool:
+        base = os.path.join(work_dir, "Kategorier")
+        folder = os.path.join(base, "Syntetisk")
+        make_images(folder, 0, args.images, rng)
+        assets = AssetStore(base, manifest_path=os.path.join(work_dir, "manifest.json"))
+        parallel_map = lambda func, items: pool.map(func, items, chunksize=32)
+
+        start = time.perf_counter()
+        index = update_hash_index(assets, None, parallel_map)
+        elapsed = time.perf_counter() - start
+        result["build_s"] = round(elapsed, 3)
+        result["build_images_per_s"] = round(len(index) / elapsed, 1)
+
+        added = max(1, args.images // 100)
+        make_images(folder, args.images, added, rng)
+        assets.refresh()
+        start = time.perf_counter()
+        index = update_hash_index(assets, index, parallel_map)
+        result["incremental_images"] = added
+        result["incremental_s"] = round(time.perf_counter() - start, 3)
+
+        samples_ms = []
+        for content_id in rng.choices(index.content_ids, k=args.queries):
+            start = time.perf_counter()
+            index.most_similar(content_id, 8)
+            samples_ms.append((time.perf_counter() - start) * 1000)
+        samples_ms.sort()
+        result["most_similar_p50_ms"] = percentile(samples_ms, 50)
+        result["most_similar_p99_ms"] = percentile(samples_ms, 99)
+
+        start = time.perf_counter()
+        pairs = index.near_duplicates(DUPLICATE_DISTANCE)
+        result["near_duplicates_s"] = round(time.perf_counter() - start, 3)
+        result["near_duplicate_pairs"] = len(pairs)
+        result["planted_copies"] = (args.images + added) // 10
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""Benchmark for bildeløypa i ASK123 (load_new_image / show_monthly_signs) uten vindu.
+
+Måler åpning, dekoding, skalering, PhotoImage og cacheoppslag med kald og varm cache,
+over den ekte Kategorier-mappen og syntetiske sett med blandede bildestørrelser.
+Skriver JSON, så resultatene kan sammenlignes mellom versjoner:
+
+    python benchmarks/bench_image_pipeline.py --sets kategorier,synthetic-1k > resultat.json
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+
+from assets import AssetStore
+from pixel_atlas import atlas_variants
+from image_pipeline import ImageCache, ThumbnailDiskCache, REDUCING_GAP
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SYNTHETIC_SETS = {"synthetic-1k": 1000, "synthetic-10k": 10000}
+# Blanding av typiske tegnbilder og store mobilbilder
+SYNTHETIC_SIZES = [((240, 250), 0.7), ((1024, 768), 0.25), ((3000, 4000), 0.05)]
+
+
+def percentiles(samples_ms):
+    if not samples_ms:
+        return None
+    ordered = sorted(samples_ms)
+
+    def pick(p):
+        return round(ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))], 3)
+
+    return {"count": len(ordered), "p50_ms": pick(50), "p95_ms": pick(95), "p99_ms": pick(99),
+            "throughput_per_s": round(len(ordered) / (sum(ordered) / 1000), 1) if sum(ordered) > 0 else None}
+
+
+def peak_rss_kb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def make_synthetic_set(folder, count, seed=1):
+    rng = random.Random(seed)
+    sizes, weights = zip(*SYNTHETIC_SIZES)
+    per_category = 100
+    for i in range(count):
+        category = os.path.join(folder, f"Kategori{i // per_category:03d}")
+        os.makedirs(category, exist_ok=True)
+        size = rng.choices(sizes, weights)[0]
+        img = Image.effect_noise(size, 48).convert("RGB")
+        img.save(os.path.join(category, f"tegn{i:05d}.jpg"), quality=85)
+
+
+class _PhotoStandIn:
+    """Erstatning for PhotoImage når det ikke finnes en skjerm; ImageCache trenger bare width()/height()."""
+
+    def __init__(self, img):
+        self.img = img
+
+    def width(self):
+        return self.img.width
+
+    def height(self):
+        return self.img.height
+
+
+def make_photo_factory():
+    """ImageTk.PhotoImage hvis Tk kan startes (krever skjerm), ellers None."""
+    try:
+        import tkinter as tk
+        from PIL import ImageTk
+        root = tk.Tk()
+        root.withdraw()
+    except Exception:
+        return None
+    return lambda img: ImageTk.PhotoImage(img, master=root)
+
+
+def timed(func, samples):
+    start = time.perf_counter()
+    result = func()
+    samples.append((time.perf_counter() - start) * 1000)
+    return result
+
+
+def run_set(base_folder, cache_dir):
+    """Kjøres i en egen prosess per sett, så minnetoppen gjelder bare dette settet."""
+    assets = AssetStore(base_folder, manifest_path=os.path.join(cache_dir, "manifest.json"))
+    # Det spillet faktisk laster: hvert unike tegn i quizstørrelse, månedens tegn også som miniatyr
+    jobs = list(atlas_variants(assets).values())
+
+    photo_factory = make_photo_factory()
+    disk_cache = ThumbnailDiskCache(base_folder, cache_dir)
+    memory_cache = ImageCache()
+    stages = {name: [] for name in ("open", "decode", "resize", "photo", "cold_total",
+                                    "warm_disk_total", "warm_memory_lookup")}
+
+    # Kald cache: hele løypa, med hvert steg målt for seg
+    for content_id, size in jobs:
+        image_path = assets.path_for_content(content_id)
+        start = time.perf_counter()
+        img = timed(lambda: Image.open(image_path), stages["open"])
+        if img.format == "JPEG":
+            img.draft(img.mode, size)
+        timed(img.load, stages["decode"])
+        resized = timed(lambda: img.resize(size, Image.Resampling.LANCZOS, reducing_gap=REDUCING_GAP), stages["resize"])
+        img.close()
+        photo = timed(lambda: photo_factory(resized), stages["photo"]) if photo_factory else _PhotoStandIn(resized)
+        memory_cache.put(content_id, size, photo)
+        stages["cold_total"].append((time.perf_counter() - start) * 1000)
+        # Fyller diskcachen til den varme runden (ikke med i målingen)
+        disk_cache.load(image_path, size, content_id=content_id)
+
+    # Varm diskcache: ny prosess ville lest de ferdig skalerte pikslene rett fra disk
+    for content_id, size in jobs:
+        image_path = assets.path_for_content(content_id)
+        timed(lambda: disk_cache.load(image_path, size, content_id=content_id), stages["warm_disk_total"])
+
+    # Varm minnecache: oppslag i LRU-cachen
+    for content_id, size in jobs:
+        timed(lambda: memory_cache.get(content_id, size), stages["warm_memory_lookup"])
+
+    return {
+        "images": len(jobs),
+        "photoimage": photo_factory is not None,
+        "stages": {name: percentiles(samples) for name, samples in stages.items()},
+        "cache": memory_cache.stats(),
+        "peak_rss_kb": peak_rss_kb(),
+    }
+
+
+def run_in_subprocess(base_folder, cache_dir):
+    output = subprocess.run([sys.executable, __file__, "--run-set", base_folder, "--cache-dir", cache_dir],
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sets", default="kategorier,synthetic-1k",
+                        help="Kommaseparert: kategorier, synthetic-1k, synthetic-10k")
+    parser.add_argument("--output", help="Skriv JSON til fil i stedet for stdout")
+    parser.add_argument("--run-set", help=argparse.SUPPRESS)
+    parser.add_argument("--generate", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--folder", help=argparse.SUPPRESS)
+    parser.add_argument("--cache-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.generate:
+        make_synthetic_set(args.folder, args.generate)
+        return
+    if args.run_set:
+        print(json.dumps(run_set(args.run_set, args.cache_dir)))
+        return
+
+    results = {"python": sys.version.split()[0], "pillow": Image.__version__, "sets": {}}
+    for name in args.sets.split(","):
+        with tempfile.TemporaryDirectory() as work_dir:
+            if name == "kategorier":
+                base_folder = os.path.join(PROJECT_DIR, "Kategorier")
+            elif name in SYNTHETIC_SETS:
+                base_folder = os.path.join(work_dir, "bilder")
+                # Egen prosess: Linux arver minnetoppen fra forelderen, og den skal ikke telle med
+                subprocess.run([sys.executable, __file__, "--generate", str(SYNTHETIC_SETS[name]),
+                                "--folder", base_folder], check=True)
+            else:
+                parser.error(f"Ukjent sett: {name}")
+            results["sets"][name] = run_in_subprocess(base_folder, os.path.join(work_dir, "cache"))
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
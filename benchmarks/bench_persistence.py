@@ -0,0 +1,92 @@
+"""Måler hvor lenge Tk-tråden blokkeres per svar når progresjonen lagres, med og uten skrivetråd.
+
+Spiller `--answers` svar med `--gap-ms` mellom hvert (barnet skriver), og lagrer progresjonen
+etter hvert svar gjennom ProgressJournal: direkte på tråden, og via BackgroundWriter med hver
+av lagringsreglene. `--fsync-ms` legger en kunstig forsinkelse i hver fsync, som en treg
+minnepinne. Til slutt sjekkes det at filene på disk gir samme progresjon som i minnet.
+
+    python benchmarks/bench_persistence.py [--answers 500] [--gap-ms 2] [--fsync-ms 20]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from persistence import DURABILITY_POLICIES, BackgroundWriter
+from quiz_engine import ProgressJournal
+
+
+def percentile(ordered, p):
+    return round(ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))], 4)
+
+
+def slow_fsync(delay_s):
+    # Erstatter os.fsync for hele prosessen; write_atomic og append_text slår den opp ved hvert kall
+    real_fsync = os.fsync
+
+    def fsync(fd):
+        real_fsync(fd)
+        time.sleep(delay_s)
+    return fsync
+
+
+def play(work_dir, name, writer, args):
+    rng = random.Random(args.seed)
+    snapshot_path = os.path.join(work_dir, f"{name}.json")
+    journal = ProgressJournal(snapshot_path, os.path.join(work_dir, f"{name}.progress.jsonl"), writer=writer)
+    progress = journal.load()
+    journal.snapshot(progress)
+    samples_ms = []
+    start_all = time.perf_counter()
+    for _ in range(args.answers):
+        time.sleep(args.gap_ms / 1000)
+        category = f"Kategori {rng.randrange(20):02d}"
+        progress.score += 1
+        progress.streak = progress.streak + 1 if rng.random() < 0.8 else 0
+        progress.high_score = max(progress.high_score, progress.streak)
+        progress.category_stats[category] = progress.category_stats.get(category, 0) + 1
+        start = time.perf_counter()
+        journal.append(progress, category)
+        samples_ms.append((time.perf_counter() - start) * 1000)
+    journal.snapshot(progress)
+    start = time.perf_counter()
+    if writer is not None:
+        writer.close()
+    close_ms = (time.perf_counter() - start) * 1000
+    total_s = time.perf_counter() - start_all
+    loaded = ProgressJournal(snapshot_path, journal.journal_path).load()
+    assert loaded.to_dict() == progress.to_dict(), f"{name}: progresjonen på disk stemmer ikke"
+    samples_ms.sort()
+    result = {"save_p50_ms": percentile(samples_ms, 50), "save_p99_ms": percentile(samples_ms, 99),
+              "save_max_ms": round(samples_ms[-1], 4), "close_ms": round(close_ms, 2), "total_s": round(total_s, 3)}
+    if writer is not None:
+        stats = writer.stats()
+        result.update({key: stats[key] for key in ("max_queue_depth", "coalesced", "writes", "write_p99_ms")})
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--answers", type=int, default=500)
+    parser.add_argument("--gap-ms", type=float, default=2.0, help="Tid mellom svarene")
+    parser.add_argument("--fsync-ms", type=float, default=20.0, help="Kunstig forsinkelse per fsync (treg disk)")
+    parser.add_argument("--interval", type=float, default=0.5, help="Sekunder mellom skrivingene for interval")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    os.fsync = slow_fsync(args.fsync_ms / 1000)
+    result = {"answers": args.answers, "fsync_ms": args.fsync_ms}
+    with tempfile.TemporaryDirectory() as work_dir:
+        result["direct"] = play(work_dir, "direct", None, args)
+        for durability in DURABILITY_POLICIES:
+            result[durability] = play(work_dir, durability, BackgroundWriter(durability, args.interval), args)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
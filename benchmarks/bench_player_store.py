@@ -0,0 +1,149 @@
+"""Måler spillerdatabasen med mange elever på samme maskin.
+
+Lager `--players` gamle JSON-spillere, flytter dem inn i databasen og måler så de tre
+operasjonene spillet gjør: liste spillerne, laste en profil og lagre et svar (direkte og via
+AnswerWriter med hver av lagringsreglene, målt som tiden kallet tar for Tk-tråden). Til sammenligning måles listing og lasting slik det ble gjort med JSON-filene.
+Til slutt spilles `--backup-days` dager for én elev med en sikkerhetskopi per økt, og plassen
+kopiene tar måles mot hele kopier, sammen med tiden det tar å gjenopprette den eldste.
+
+    python benchmarks/bench_player_store.py [--players 500] [--answers 5000] [--backup-days 120]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from persistence import DURABILITY_POLICIES
+from player_store import PLAYER_DB, AnswerWriter, PlayerStore, migrate_json_players
+from quiz_engine import PlayerProgress
+
+
+def percentile(ordered, p):
+    return round(ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))], 4)
+
+
+def timings(samples_ms):
+    samples_ms.sort()
+    return {"p50_ms": percentile(samples_ms, 50), "p99_ms": percentile(samples_ms, 99)}
+
+
+def make_json_players(players_dir, count, categories, rng):
+    os.makedirs(players_dir, exist_ok=True)
+    names = [f"Elev {i:04d}" for i in range(count)]
+    for name in names:
+        data = {"category_stats": {category: rng.randrange(50) for category in categories},
+                "score": rng.randrange(100), "streak": rng.randrange(10), "high_score": rng.randrange(200)}
+        for filename in (f"{name}.json", f"{name}_backup.json"):
+            with open(os.path.join(players_dir, filename), "w", encoding="utf-8") as f:
+                json.dump(data, f)
+    return names
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=500)
+    parser.add_argument("--categories", type=int, default=12)
+    parser.add_argument("--answers", type=int, default=5000)
+    parser.add_argument("--signs", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=200, help="Målinger av listing og lasting")
+    parser.add_argument("--backup-days", type=int, default=120, help="Skoledager med én sikkerhetskopi hver")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    categories = [f"Kategori {i:02d}" for i in range(args.categories)]
+    sign_ids = [f"{i:040x}" for i in range(args.signs)]
+    result = {"players": args.players}
+    with tempfile.TemporaryDirectory() as players_dir:
+        names = make_json_players(players_dir, args.players, categories, rng)
+
+        list_ms, load_ms = [], []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            [f.replace(".json", "") for f in os.listdir(players_dir) if f.endswith(".json")]
+            list_ms.append((time.perf_counter() - start) * 1000)
+            start = time.perf_counter()
+            with open(os.path.join(players_dir, f"{rng.choice(names)}.json"), "r") as f:
+                json.load(f)
+            load_ms.append((time.perf_counter() - start) * 1000)
+        result["json_list"] = timings(list_ms)
+        result["json_load"] = timings(load_ms)
+
+        store = PlayerStore(os.path.join(players_dir, PLAYER_DB))
+        start = time.perf_counter()
+        migrated = migrate_json_players(store, players_dir)
+        result["migrate_s"] = round(time.perf_counter() - start, 3)
+        assert migrated == args.players and store.player_names() == names
+
+        list_ms, load_ms = [], []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            store.player_names()
+            list_ms.append((time.perf_counter() - start) * 1000)
+            start = time.perf_counter()
+            store.load_player(rng.choice(names))
+            load_ms.append((time.perf_counter() - start) * 1000)
+        result["sqlite_list"] = timings(list_ms)
+        result["sqlite_load"] = timings(load_ms)
+        store.close()
+
+        for durability in ("direct",) + DURABILITY_POLICIES:
+            store = PlayerStore(os.path.join(players_dir, PLAYER_DB))
+            players = [store.load_player(name) for name in rng.sample(names, min(20, len(names)))]
+            answers_before = store._db.execute("SELECT SUM(correct + wrong) FROM sign_results").fetchone()[0] or 0
+            writer = None if durability == "direct" else AnswerWriter(store.path, durability, interval=0.5)
+            answer_ms = []
+            for _ in range(args.answers):
+                player_id, progress = rng.choice(players)
+                category = rng.choice(categories)
+                correct = rng.random() < 0.8
+                if correct:
+                    progress.score += 1
+                    progress.category_stats[category] += 1
+                start = time.perf_counter()
+                (writer or store).record_answer(player_id, progress, category, rng.choice(sign_ids), correct)
+                answer_ms.append((time.perf_counter() - start) * 1000)
+            start = time.perf_counter()
+            if writer is not None:
+                writer.close()
+            close_ms = round((time.perf_counter() - start) * 1000, 2)
+            answers = store._db.execute("SELECT SUM(correct + wrong) FROM sign_results").fetchone()[0]
+            assert answers - answers_before == args.answers, f"{durability}: ikke alle svarene ble lagret"
+            for player_id, progress in players:
+                assert store.snapshot(player_id)["score"] == progress.score, f"{durability}: feil poeng"
+            store.close()
+            result[f"sqlite_answer_{durability}"] = dict(timings(answer_ms), close_ms=close_ms,
+                                                         commits=writer.writes if writer else args.answers)
+
+        store = PlayerStore(os.path.join(players_dir, PLAYER_DB))
+        now = time.time() - args.backup_days * 86400
+        progress = PlayerProgress(category_stats={category: 0 for category in categories})
+        player_id = store.create_player("Sikkerhetskopi", progress, now)
+        full_bytes, backup_ms = {}, []  # Kopi-ID -> størrelsen som hel JSON-kopi
+        for _ in range(args.backup_days):
+            for _ in range(60):  # En økt: 60 svar på tegn spredt over hele samlingen
+                progress.score += 1
+                store.record_answer(player_id, progress, rng.choice(categories), rng.choice(sign_ids), True, now)
+            start = time.perf_counter()
+            backup_id = store.backup(player_id, now)
+            backup_ms.append((time.perf_counter() - start) * 1000)
+            full_bytes[backup_id] = len(json.dumps(store.snapshot(player_id)))
+            now += 86400
+        generations = store.backups(player_id)
+        kept_bytes = store._db.execute("SELECT SUM(LENGTH(data)) FROM backup_blocks").fetchone()[0]
+        start = time.perf_counter()
+        store.restore_backup(player_id, generations[-1][0])
+        result["backups"] = dict(timings(backup_ms), generations_kept=len(generations), block_bytes=kept_bytes,
+                                 full_copies_bytes=sum(full_bytes[backup_id] for backup_id, _ in generations),
+                                 restore_oldest_ms=round((time.perf_counter() - start) * 1000, 2))
+        store.close()
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Måler lagring og lasting av spillerprogresjon med øyeblikksbilde og journal.
+
+Måler kostnaden per svar (append) ved ulike historikklengder, så det synes at den ikke vokser
+med historikken, og lastetiden for en journal med `--events` svar som ikke er foldet inn,
+sammenlignet med et ferskt øyeblikksbilde og en kort journal.
+
+    python benchmarks/bench_progress_journal.py [--events 1000000] [--categories 40]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quiz_engine import PlayerProgress, ProgressJournal
+
+
+def percentile(ordered, p):
+    return round(ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))], 4)
+
+
+def answer(progress, categories, rng):
+    category = rng.choice(categories)
+    progress.score += 1
+    progress.streak = progress.streak + 1 if rng.random() < 0.8 else 0
+    progress.high_score = max(progress.high_score, progress.streak)
+    progress.category_stats[category] = progress.category_stats.get(category, 0) + 1
+    return category
+
+
+def write_journal(journal, progress, categories, count, rng):
+    """Skriver `count` svar direkte i journalen, raskere enn append per svar."""
+    with open(journal.journal_path, "a", encoding="utf-8") as f:
+        for _ in range(count):
+            category = answer(progress, categories, rng)
+            f.write(json.dumps([progress.score, progress.streak, progress.high_score,
+                                category, progress.category_stats[category]], ensure_ascii=False) + "\n")
+
+
+def timed_load(journal, expected):
+    start = time.perf_counter()
+    loaded = journal.load()
+    elapsed = time.perf_counter() - start
+    assert loaded.to_dict() == expected.to_dict(), "Lastet progresjon stemmer ikke"
+    return round(elapsed * 1000, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=1000000)
+    parser.add_argument("--categories", type=int, default=40)
+    parser.add_argument("--appends", type=int, default=2000, help="Målte svar per historikklengde")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    categories = [f"Kategori {i:02d}" for i in range(args.categories)]
+    result = {"events": args.events}
+    with tempfile.TemporaryDirectory() as work_dir:
+        snapshot_path = os.path.join(work_dir, "spiller.json")
+        journal_path = os.path.join(work_dir, "spiller.progress.jsonl")
+
+        # Kostnad per svar etter 0, 10 000, 100 000 ... svar i spillerens historikk
+        progress = PlayerProgress(category_stats={category: 0 for category in categories})
+        journal = ProgressJournal(snapshot_path, journal_path)
+        journal.snapshot(progress)
+        played = 0
+        for history in sorted({0, min(10000, args.events), min(100000, args.events), args.events}):
+            while played < history:
+                answer(progress, categories, rng)
+                played += 1
+            samples_ms = []
+            for _ in range(args.appends):
+                category = answer(progress, categories, rng)
+                start = time.perf_counter()
+                journal.append(progress, category)
+                samples_ms.append((time.perf_counter() - start) * 1000)
+            samples_ms.sort()
+            result[f"append_after_{history}"] = {"p50_ms": percentile(samples_ms, 50),
+                                                 "p99_ms": percentile(samples_ms, 99)}
+        journal.snapshot(progress)
+
+        # Verste tilfelle: spillet krasjet før noe ble foldet inn, hele journalen spilles av
+        progress = PlayerProgress(category_stats={category: 0 for category in categories})
+        journal = ProgressJournal(snapshot_path, journal_path)
+        journal.snapshot(progress)
+        write_journal(journal, progress, categories, args.events, rng)
+        result["journal_bytes"] = os.path.getsize(journal_path)
+        result["load_full_journal_ms"] = timed_load(ProgressJournal(snapshot_path, journal_path), progress)
+
+        # Vanlig tilfelle: øyeblikksbilde fra forrige avslutning og en kort journal
+        journal.snapshot(progress)
+        write_journal(journal, progress, categories, journal.compact_every - 1, rng)
+        result["load_snapshot_and_tail_ms"] = timed_load(ProgressJournal(snapshot_path, journal_path), progress)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Måler kostnaden per trekning for spørsmålsutvalget, gammel listebasert metode mot ShuffledDeck.
+
+Sjekker også at en stokk lagret midt i en runde (via JSON, som en lagret økt) trekker de samme
+kortene videre som originalen.
+
+    python benchmarks/bench_sampler.py [--sizes 1000,10000,100000]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quiz_engine import ShuffledDeck
+
+
+def old_get_unique_image(image_pool, images_used):
+    """Slik get_unique_image virket før: bygger listen over gjenstående bilder på nytt hver gang."""
+    remaining_images = [img for img in image_pool if img not in images_used]
+    if not remaining_images:
+        images_used.clear()
+        remaining_images = image_pool
+    selected_image = random.choice(remaining_images)
+    images_used.add(selected_image)
+    return selected_image
+
+
+def per_draw_us(draw, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        draw()
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def check_snapshot_round_trip(n):
+    """Lagrer stokken som JSON midt i en runde og sjekker at kopien trekker det samme videre."""
+    signs = [(f"Kategori {i % 20}", f"tegn{i}.jpg") for i in range(n)]  # Samme form som i spillet
+    deck = ShuffledDeck(signs, rng=random.Random(2))
+    for _ in range(n // 2):
+        deck.draw()
+    start = time.perf_counter()
+    saved = json.dumps(deck.snapshot())
+    copy = ShuffledDeck(rng=random.Random())
+    copy.restore(json.loads(saved))
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    assert [copy.draw() for _ in range(n)] == [deck.draw() for _ in range(n)], "Lagret stokk trekker annerledes"
+    return {"signs": n, "snapshot_bytes": len(saved), "snapshot_round_trip_ms": round(elapsed_ms, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--old-draws", type=int, default=200,
+                        help="Trekninger med gammel metode (den er O(n) per trekning, så hold tallet lavt)")
+    args = parser.parse_args()
+
+    results = []
+    for n in (int(size) for size in args.sizes.split(",")):
+        signs = [f"tegn{i}.jpg" for i in range(n)]
+        # En hel runde pluss litt, så stokkingen ved ny runde også er med
+        deck = ShuffledDeck(signs, rng=random.Random(1))
+        deck_us = per_draw_us(deck.draw, n + n // 10)
+        images_used = set()
+        old_us = per_draw_us(lambda: old_get_unique_image(signs, images_used), min(args.old_draws, n))
+        results.append({"signs": n, "deck_us_per_draw": round(deck_us, 3), "old_us_per_draw": round(old_us, 1),
+                        "old_full_pass_s_estimate": round(old_us * n / 2 / 1e6, 1)})
+    results.append(check_snapshot_round_trip(1000))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""Ferdig utvalgte gale svaralternativer (distraktorer) for flervalgsmodus i ASK123.
+
+For hvert tegn velges på forhånd de ordene som ligner mest: samme kategori, lik stavemåte
+og bilder som ser like ut. Tabellen lagres sammen med bildemanifestet, så spillet bare
+slår opp de k første alternativene for tegnet når et spørsmål vises.
+
+Bygg tabellen på forhånd (ellers bygges den i bakgrunnen ved første oppstart):
+    python distractors.py [--base Kategorier]
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import threading
+from bisect import bisect_left
+
+from answer_index import AnswerIndex, edit_distance, normalize_answer
+from assets import AssetStore
+from image_hashes import open_hash_index
+
+DISTRACTOR_VERSION = 2
+DISTRACTOR_FILE = "distractors.json"
+DISTRACTORS_PER_SIGN = 8
+SPELLING_NEIGHBOURS = 4  # Naboer på hver side i alfabetisk rekkefølge
+MAX_SPELLING_DISTANCE = 3
+MAX_VISUAL_DISTANCE = 16  # Bit i pHash som kan være ulike før bildene ikke regnes som like i det hele tatt
+VISUAL_NEIGHBOURS = 16  # De mest like bildene (fra hashindeksen) som tas med som kandidater
+# Kandidater fra hver kategori tegnet er med i. Større kategorier (som Tilfeldig, der alt ligger) gir bare
+# de alfabetisk nærmeste, ellers ville hvert tegn bli poengsatt mot hele vokabularet
+CATEGORY_NEIGHBOURS = 32
+# Vekter i poengsummen; samme kategori teller mest, så distraktorene er ord barnet kjenner fra samme tema
+SAME_CATEGORY_WEIGHT = 2.0
+SPELLING_WEIGHT = 1.0
+VISUAL_WEIGHT = 1.0
+
+
+def distractor_stamp(assets):
+    """Endres når et tegn, et svar eller et alias endres."""
+    digest = hashlib.sha1(f"distractors-v{DISTRACTOR_VERSION}".encode("ascii"))
+    for answer, content_id in sorted(assets.answers()):
+        digest.update(f"{content_id}:{answer}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def default_distractor_path(assets):
+    # Ved siden av manifestet; i pakken ligger den ferdig bygget sammen med den pakkede indeksen
+    if assets.read_only:
+        return os.path.join(assets.base_folder, DISTRACTOR_FILE)
+    return os.path.splitext(assets.manifest_path)[0] + ".distractors.json"
+
+
+class DistractorTable:
+    def __init__(self, stamp, distractors):
+        self.stamp = stamp
+        self.distractors = distractors  # innholds-ID -> svar, mest lignende først
+
+    def __len__(self):
+        return len(self.distractors)
+
+    def options(self, content_id, count, exclude=()):
+        """De `count` beste distraktorene for tegnet, minus normaliserte former i `exclude`. O(count)."""
+        result = []
+        for answer in self.distractors.get(content_id, ()):
+            if normalize_answer(answer) not in exclude:
+                result.append(answer)
+                if len(result) == count:
+                    break
+        return result
+
+    def save(self, path):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": DISTRACTOR_VERSION, "stamp": self.stamp, "distractors": self.distractors},
+                      f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != DISTRACTOR_VERSION:
+            return None
+        return cls(data["stamp"], data["distractors"])
+
+
+def build_distractors(assets, hashes=None, per_sign=DISTRACTORS_PER_SIGN):
+    """Velger distraktorer for hvert tegn. Kandidatene hentes fra samme kategori, alfabetiske og
+    stavemessige naboer og de mest like bildene i hashindeksen (`hashes`, en HashIndex). Fra
+    store kategorier tas bare CATEGORY_NEIGHBOURS alfabetiske naboer, så ingen tegn poengsettes
+    mot alle og byggingen vokser omtrent lineært med antall tegn."""
+    signs = {}  # innholds-ID -> [svar, normalisert form, kategorier, godkjente former]
+    members = {}  # kategori -> innholds-ID-er
+    for category in assets.categories():
+        for filename in assets.list_images(category):
+            content_id = assets.content_id(category, filename)
+            sign = signs.get(content_id)
+            if sign is None:
+                answer = assets.answer(category, filename)
+                sign = signs[content_id] = [answer, normalize_answer(answer), set(), set()]
+            sign[2].add(category)
+            sign[3].update(normalize_answer(answer) for answer in assets.accepted_answers(category, filename))
+            members.setdefault(category, []).append(content_id)
+
+    by_form = {}  # normalisert form -> innholds-ID-er med det svaret
+    for content_id, (_, form, _, _) in signs.items():
+        by_form.setdefault(form, []).append(content_id)
+    forms = sorted(by_form)
+    spelling = AnswerIndex(forms, max_distance=2)  # Slette-indeks for ord én skrivefeil unna
+    # kategori -> [(normalisert form, innholds-ID)] sortert, for naboene i store kategorier
+    category_order = {category: sorted((signs[member][1], member) for member in set(ids))
+                      for category, ids in members.items()}
+
+    distractors = {}
+    for content_id, (_, form, categories, accepted) in signs.items():
+        # Blandekategorier som Tilfeldig inneholder alt; en delt kategori teller etter hvor snever den er
+        narrowest = min(len(members[category]) for category in categories)
+        candidates = set()
+        for category in categories:
+            ordered = category_order[category]
+            if len(ordered) > CATEGORY_NEIGHBOURS:
+                position = bisect_left(ordered, (form, content_id))
+                start = max(0, min(position - CATEGORY_NEIGHBOURS // 2, len(ordered) - CATEGORY_NEIGHBOURS))
+                ordered = ordered[start:start + CATEGORY_NEIGHBOURS + 1]
+            candidates.update(member for _, member in ordered)
+        position = bisect_left(forms, form)
+        for neighbour in forms[max(0, position - SPELLING_NEIGHBOURS):position + SPELLING_NEIGHBOURS + 1]:
+            candidates.update(by_form[neighbour])
+        for _, neighbour in spelling.neighbours(form, 1):
+            candidates.update(by_form[neighbour])
+        visual = None
+        if hashes is not None and content_id in hashes:
+            # Avstanden til alle bildene i én vektorisert operasjon; de nærmeste blir kandidater
+            visual = hashes.distances(hashes.hash(content_id))
+            candidates.update(other for _, other in hashes.most_similar(content_id, VISUAL_NEIGHBOURS)
+                              if other in signs)
+
+        scored = {}  # normalisert form -> (poeng, svar); ett alternativ per ord
+        for other in candidates:
+            other_answer, other_form, other_categories, _ = signs[other]
+            if other_form in accepted:
+                continue
+            shared = categories & other_categories
+            score = SAME_CATEGORY_WEIGHT * narrowest / min(len(members[c]) for c in shared) if shared else 0.0
+            distance = edit_distance(form, other_form, MAX_SPELLING_DISTANCE)
+            if distance <= MAX_SPELLING_DISTANCE:
+                score += SPELLING_WEIGHT * (1.0 - distance / max(len(form), len(other_form), 1))
+            other_row = hashes.row(other) if visual is not None else None
+            if other_row is not None:
+                score += VISUAL_WEIGHT * max(0.0, 1.0 - int(visual[other_row]) / MAX_VISUAL_DISTANCE)
+            if score > scored.get(other_form, (-1.0,))[0]:
+                scored[other_form] = (score, other_answer)
+        ranked = sorted(scored.items(), key=lambda item: (-item[1][0], item[0]))
+        distractors[content_id] = [answer for _, (_, answer) in ranked[:per_sign]]
+
+    return DistractorTable(distractor_stamp(assets), distractors)
+
+
+def open_distractors(assets, path=None, on_built=None):
+    """Laster tabellen hvis den stemmer med bildene og svarene. Ellers bygges den i en
+    bakgrunnstråd, og `on_built(table)` kalles når den er klar."""
+    path = path or default_distractor_path(assets)
+    stamp = distractor_stamp(assets)
+    table = DistractorTable.load(path)
+    if table is not None and table.stamp == stamp:
+        return table
+    if assets.read_only:
+        logging.warning("Den pakkede distraktortabellen mangler eller er utdatert.")
+
+    def rebuild():
+        try:
+            table = build_distractors(assets, open_hash_index(assets))
+            if not assets.read_only:
+                table.save(path)
+            logging.info(f"Distraktorer bygget for {len(table)} tegn.")
+            if on_built is not None:
+                on_built(table)
+        except Exception as e:
+            logging.error(f"Feil under bygging av distraktorer: {e}")
+
+    threading.Thread(target=rebuild, name="distractor-build", daemon=True).start()
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bygger distraktortabellen for flervalgsmodus i ASK123.")
+    parser.add_argument("--base", default="Kategorier", help="Mappen med kategoriene")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    assets = AssetStore(args.base)
+    table = build_distractors(assets, open_hash_index(assets))
+    table.save(default_distractor_path(assets))
+    logging.info(f"Distraktorer bygget for {len(table)} tegn: {default_distractor_path(assets)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""Perseptuelle bildehasher for alle tegn i ASK123, regnet ut med NumPy.
+
+Hvert unike bilde får tre 64-bits hasher (aHash, dHash og pHash), lagret i én pakket
+uint64-tabell. "Finn nesten like bilder" og "de k mest like tegnene" blir da XOR og
+bittelling over hele settet i én vektorisert operasjon, uten en løkke i Python per bilde.
+Tabellen er nøklet på innholds-ID, så bare nye bilder i manifestet hashes på nytt.
+
+    python image_hashes.py [--base Kategorier] [--duplicates] [--confusable] [--similar FILNAVN]
+"""
+import argparse
+import io
+import logging
+import os
+from multiprocessing import Pool
+
+import numpy as np
+from PIL import Image
+
+from assets import AssetStore
+from image_pipeline import load_resized_image
+
+HASH_VERSION = 1
+HASH_FILE = "hashes.npz"
+HASH_KINDS = ("ahash", "dhash", "phash")
+HASH_BITS = 8  # 8x8 = 64 bit per hash
+PHASH_SIZE = 32  # pHash tar de laveste 8x8 frekvensene fra en DCT av 32x32-bildet
+DUPLICATE_DISTANCE = 4  # Så få ulike bit i pHash regnes som samme bilde lastet opp på nytt
+CONFUSABLE_DISTANCE = 12  # Tegn med så like bilder kan forveksles av barnet
+_PAIR_BLOCK = 512  # Rader per blokk i parvis sammenligning, så minnet holdes på O(blokk * n)
+
+# DCT-II som matrise, så pHash for et bilde er to matriseprodukter
+_DCT = np.cos(np.pi / PHASH_SIZE * np.arange(HASH_BITS)[:, None] * (np.arange(PHASH_SIZE)[None, :] + 0.5))
+
+if hasattr(np, "bitwise_count"):
+    _popcount = np.bitwise_count
+else:  # NumPy < 2.0: tell bit per byte med en oppslagstabell
+    _BYTE_BITS = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _popcount(values):
+        values = np.ascontiguousarray(values)
+        return _BYTE_BITS[values.view(np.uint8)].reshape(values.shape + (8,)).sum(axis=-1, dtype=np.uint8)
+
+
+def _pack(bits):
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), "big")
+
+
+def image_hashes(image_path):
+    """(aHash, dHash, pHash) for et bilde, som heltall. Bildet dekodes bare én gang."""
+    gray = load_resized_image(image_path, (PHASH_SIZE, PHASH_SIZE)).convert("L")
+    pixels = np.asarray(gray, dtype=np.float64)
+    block = PHASH_SIZE // HASH_BITS
+    means = pixels.reshape(HASH_BITS, block, HASH_BITS, block).mean(axis=(1, 3))
+    ahash = _pack(means > means.mean())
+    wide = np.asarray(gray.resize((HASH_BITS + 1, HASH_BITS), Image.Resampling.BOX), dtype=np.int16)
+    dhash = _pack(wide[:, 1:] > wide[:, :-1])
+    frequencies = _DCT @ pixels @ _DCT.T
+    phash = _pack(frequencies > np.median(frequencies))
+    return ahash, dhash, phash
+
+
+class HashIndex:
+    def __init__(self, content_ids=(), hashes=None):
+        self.content_ids = list(content_ids)
+        # Én rad per bilde, én kolonne per hashtype i HASH_KINDS
+        self.hashes = hashes if hashes is not None else np.zeros((0, len(HASH_KINDS)), dtype=np.uint64)
+        self._rows = {content_id: row for row, content_id in enumerate(self.content_ids)}
+
+    def __len__(self):
+        return len(self.content_ids)
+
+    def __contains__(self, content_id):
+        return content_id in self._rows
+
+    def row(self, content_id):
+        return self._rows.get(content_id)
+
+    def hash(self, content_id, kind="phash"):
+        return int(self.hashes[self._rows[content_id], HASH_KINDS.index(kind)])
+
+    def distances(self, value, kind="phash"):
+        """Antall ulike bit mellom `value` og hvert bilde i indeksen, i radrekkefølge."""
+        return _popcount(self.hashes[:, HASH_KINDS.index(kind)] ^ np.uint64(value))
+
+    def most_similar(self, content_id, k=5, kind="phash"):
+        """De k bildene som ligner mest på content_id, som (avstand, innholds-ID), nærmeste først."""
+        distances = self.distances(self.hash(content_id, kind), kind).astype(np.int16)
+        distances[self._rows[content_id]] = np.iinfo(np.int16).max  # Ikke seg selv
+        k = min(k, len(self) - 1)
+        if k <= 0:
+            return []
+        nearest = np.argpartition(distances, k - 1)[:k]
+        nearest = nearest[np.lexsort((nearest, distances[nearest]))]
+        return [(int(distances[row]), self.content_ids[row]) for row in nearest]
+
+    def near_duplicates(self, max_distance=DUPLICATE_DISTANCE, kind="phash"):
+        """Alle par av ulike bilder innen max_distance bit, som (avstand, innholds-ID, innholds-ID)."""
+        column = self.hashes[:, HASH_KINDS.index(kind)]
+        pairs = []
+        for start in range(0, len(column), _PAIR_BLOCK):
+            block = column[start:start + _PAIR_BLOCK]
+            # Bare øvre trekant: hver rad sammenlignes med bildene etter seg
+            distances = _popcount(block[:, None] ^ column[None, start:])
+            rows, columns = np.nonzero(distances <= max_distance)
+            keep = columns > rows
+            for row, column_offset in zip(rows[keep], columns[keep]):
+                pairs.append((int(distances[row, column_offset]),
+                              self.content_ids[start + row], self.content_ids[start + column_offset]))
+        return sorted(pairs)
+
+    def save(self, path):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        buffer = io.BytesIO()  # np.savez legger til .npz på filnavn, så vi skriver via en buffer
+        np.savez(buffer, version=np.array(HASH_VERSION), kinds=np.array(HASH_KINDS),
+                 content_ids=np.array(self.content_ids, dtype="U40"), hashes=self.hashes)
+        with open(tmp_path, "wb") as f:
+            f.write(buffer.getvalue())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if int(data["version"]) != HASH_VERSION or tuple(data["kinds"]) != HASH_KINDS:
+                    return None
+                return cls(data["content_ids"].tolist(), data["hashes"].astype(np.uint64))
+        except (OSError, ValueError, KeyError):
+            return None
+
+
+def default_hash_path(assets):
+    if assets.read_only:
+        return os.path.join(assets.base_folder, HASH_FILE)
+    return os.path.splitext(assets.manifest_path)[0] + ".hashes.npz"
+
+
+def missing_hashes(assets, index):
+    """Innholds-ID-er i manifestet som ikke er hashet ennå."""
+    return [content_id for content_id in sorted(assets.manifest["blobs"]) if content_id not in index]
+
+
+def update_hash_index(assets, index=None, map_func=map):
+    """Ny indeks for bildene i manifestet. Hasher som finnes fra før gjenbrukes, bare nye
+    bilder dekodes. `map_func` kan være pool.map for å hashe parallelt."""
+    index = index or HashIndex()
+    missing = missing_hashes(assets, index)
+    computed = dict(zip(missing, map_func(image_hashes, [assets.path_for_content(c) for c in missing])))
+    content_ids = sorted(assets.manifest["blobs"])
+    hashes = np.empty((len(content_ids), len(HASH_KINDS)), dtype=np.uint64)
+    for row, content_id in enumerate(content_ids):
+        old_row = index.row(content_id)
+        hashes[row] = index.hashes[old_row] if old_row is not None else computed[content_id]
+    return HashIndex(content_ids, hashes)
+
+
+def open_hash_index(assets, path=None, map_func=map):
+    """Laster indeksen og hasher bilder som er kommet til siden sist. Lagres bare hvis noe endret seg."""
+    path = path or default_hash_path(assets)
+    index = HashIndex.load(path)
+    if index is not None and len(index) == len(assets.manifest["blobs"]) and not missing_hashes(assets, index):
+        return index
+    index = update_hash_index(assets, index, map_func)
+    if not assets.read_only:
+        try:
+            index.save(path)
+        except OSError as e:
+            logging.warning(f"Kunne ikke lagre bildehashene {path}: {e}")
+    return index
+
+
+def sign_locations(assets):
+    """{innholds-ID: ["kategori/filnavn", ...]} for rapportene."""
+    locations = {}
+    for category in assets.categories():
+        for filename in assets.list_images(category):
+            locations.setdefault(assets.content_id(category, filename), []).append(f"{category}/{filename}")
+    return locations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bygger bildehashene for ASK123 og finner like tegn.")
+    parser.add_argument("--base", default="Kategorier", help="Mappen med kategoriene")
+    parser.add_argument("--workers", type=int, default=None, help="Antall prosesser (standard: alle kjerner)")
+    parser.add_argument("--duplicates", action="store_true", help="Vis bilder som trolig er lastet opp to ganger")
+    parser.add_argument("--confusable", action="store_true", help="Vis tegn med så like bilder at de kan forveksles")
+    parser.add_argument("--similar", metavar="FILNAVN", help="Vis tegnene som ligner mest på dette")
+    parser.add_argument("--count", type=int, default=5, help="Antall treff for --similar")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    assets = AssetStore(args.base)
+    with Pool(processes=args.workers) as pool:
+        index = open_hash_index(assets, map_func=lambda func, items: pool.map(func, items, chunksize=8))
+    logging.info(f"{len(index)} bilder hashet: {default_hash_path(assets)}")
+    locations = sign_locations(assets)
+
+    reports = []
+    if args.duplicates:
+        reports.append(("Trolig samme bilde", DUPLICATE_DISTANCE))
+    if args.confusable:
+        reports.append(("Kan forveksles", CONFUSABLE_DISTANCE))
+    for title, max_distance in reports:
+        pairs = index.near_duplicates(max_distance)
+        print(f"{title} ({len(pairs)} par, høyst {max_distance} bit ulike):")
+        for distance, first, second in pairs:
+            print(f"  {distance:>2}  {locations[first][0]}  <->  {locations[second][0]}")
+    if args.similar:
+        matches = [content_id for content_id, paths in locations.items()
+                   if any(path.endswith("/" + args.similar) or path == args.similar for path in paths)]
+        if not matches:
+            parser.error(f"Fant ikke tegnet {args.similar}")
+        print(f"Ligner mest på {args.similar}:")
+        for distance, content_id in index.most_similar(matches[0], args.count):
+            print(f"  {distance:>2}  {', '.join(locations[content_id])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+import hashlib
+import logging
+import os
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+
+# Størrelsene spillet viser bildene i
+QUIZ_SIZE = (400, 400)
+THUMBNAIL_SIZE = (200, 200)
+
+# Minnebudsjett (bytes) per størrelsesklasse, regnet som bredde * høyde * 4
+DEFAULT_CACHE_BUDGETS = {
+    QUIZ_SIZE: 64 * 1024 * 1024,
+    THUMBNAIL_SIZE: 8 * 1024 * 1024,
+}
+
+
+# Forminsk med heltallsfaktor før LANCZOS så lenge bildet er minst så mange ganger større enn målet
+REDUCING_GAP = 3.0
+
+
+def load_resized_image(image_path, size, reduced_decode=True):
+    """Åpner og skalerer et bilde. Rører ikke Tk, så den kan kjøres i en arbeidstråd."""
+    with Image.open(image_path) as img:
+        if not reduced_decode:
+            return img.resize(size, Image.Resampling.LANCZOS)
+        if img.format == "JPEG":
+            # libjpeg kan dekode direkte i 1/2, 1/4 eller 1/8 oppløsning, men aldri mindre enn `size`
+            img.draft(img.mode, size)
+        # For PNG og andre formater gjør reducing_gap en rask boksforminskning før LANCZOS
+        return img.resize(size, Image.Resampling.LANCZOS, reducing_gap=REDUCING_GAP)
+
+
+def user_cache_dir():
+    """Brukerens cachekatalog for ASK123 (overlever at _MEIPASS er en ny temp-katalog hver gang)."""
+    # ASK123_CACHE_DIR lar en server eller et kiosk-oppsett peke på ferdig forhåndsbehandlede filer
+    if os.environ.get("ASK123_CACHE_DIR"):
+        return os.environ["ASK123_CACHE_DIR"]
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "ASK123")
+
+
+# Varig cache på disk for ferdig skalerte bilder, så varme oppstarter slipper LANCZOS
+class ThumbnailDiskCache:
+    def __init__(self, base_folder, cache_dir=None):
+        self.base_folder = base_folder
+        self.cache_dir = os.path.join(cache_dir or user_cache_dir(), "thumbnails")
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def load(self, image_path, size, content_id=None):
+        """Henter et skalert bilde fra disk, eller skalerer og lagrer det hvis det mangler eller er utdatert."""
+        if content_id is not None:
+            # Innholds-ID-en endres med bytene, så den er både nøkkel og stempel
+            entry_path = self._entry_path_for_key(content_id, size)
+            stamp = content_id
+        else:
+            entry_path = self._entry_path(image_path, size)
+            stamp = self._source_stamp(image_path)
+        img = self._read(entry_path, stamp)
+        if img is None:
+            img = load_resized_image(image_path, size)
+            self._write(entry_path, stamp, img)
+        return img
+
+    def contains(self, image_path, size, content_id=None):
+        """Sjekker om et gyldig skalert bilde allerede ligger på disk, uten å lese pikslene."""
+        if content_id is not None:
+            entry_path, stamp = self._entry_path_for_key(content_id, size), content_id
+        else:
+            entry_path, stamp = self._entry_path(image_path, size), self._source_stamp(image_path)
+        try:
+            with open(entry_path, "rb") as f:
+                return f.readline().decode("ascii").split()[:1] == [stamp]
+        except OSError:
+            return False
+
+    def _entry_path(self, image_path, size):
+        # Relativ sti, slik at nøkkelen er den samme selv om _MEIPASS flytter seg
+        relative_path = os.path.relpath(image_path, self.base_folder).replace(os.sep, "/")
+        return self._entry_path_for_key(relative_path, size)
+
+    def _entry_path_for_key(self, key, size):
+        digest = hashlib.sha1(f"{key}|{size[0]}x{size[1]}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], digest + ".raw")
+
+    def _source_stamp(self, image_path):
+        st = os.stat(image_path)
+        mtime = st.st_mtime_ns
+        if getattr(sys, "frozen", False):
+            # PyInstaller pakker ut filene på nytt ved hver start, så mtime er alltid ny.
+            # Innholdet kan bare endres sammen med exe-filen, så vi bruker dens mtime i stedet.
+            mtime = os.stat(sys.executable).st_mtime_ns
+        return f"{st.st_size}:{mtime}"
+
+    def _read(self, entry_path, stamp):
+        try:
+            with open(entry_path, "rb") as f:
+                header = f.readline().decode("ascii").split()
+                pixels = f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logging.warning(f"Kunne ikke lese bildecache {entry_path}: {e}")
+            return None
+        # Header: kildestempel, modus, bredde, høyde. Feil stempel betyr at kildefilen er endret.
+        if len(header) != 4 or header[0] != stamp:
+            return None
+        try:
+            return Image.frombytes(header[1], (int(header[2]), int(header[3])), pixels)
+        except ValueError:
+            return None
+
+    def _write(self, entry_path, stamp, img):
+        if img.mode not in ("RGB", "RGBA", "L"):
+            img = img.convert("RGBA" if "transparency" in img.info or img.mode in ("LA", "PA") else "RGB")
+        header = f"{stamp} {img.mode} {img.width} {img.height}\n".encode("ascii")
+        tmp_path = f"{entry_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(header)
+                f.write(img.tobytes())
+            os.replace(tmp_path, entry_path)
+        except OSError as e:
+            logging.warning(f"Kunne ikke skrive bildecache {entry_path}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+
+# LRU-cache for PhotoImage-objekter med eget minnebudsjett per størrelsesklasse,
+# slik at miniatyrene på startskjermen ikke skyver ut quizbildene
+class ImageCache:
+    def __init__(self, budgets=None, default_budget=16 * 1024 * 1024):
+        self.budgets = dict(DEFAULT_CACHE_BUDGETS if budgets is None else budgets)
+        self.default_budget = default_budget
+        self._entries = {}  # størrelse -> OrderedDict(nøkkel -> (photo, bytes))
+        self._used_bytes = {}  # størrelse -> bytes i bruk
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, size):
+        entries = self._entries.get(size)
+        if entries is not None and key in entries:
+            entries.move_to_end(key)
+            self.hits += 1
+            return entries[key][0]
+        self.misses += 1
+        return None
+
+    def contains(self, key, size):
+        """Sjekker om bildet finnes uten å påvirke teller eller LRU-rekkefølge."""
+        return key in self._entries.get(size, ())
+
+    def put(self, key, size, photo):
+        entries = self._entries.setdefault(size, OrderedDict())
+        if key in entries:
+            self._remove(size, key)
+        cost = photo.width() * photo.height() * 4
+        entries[key] = (photo, cost)
+        self._used_bytes[size] = self._used_bytes.get(size, 0) + cost
+        budget = self.budgets.get(size, self.default_budget)
+        # Det nyeste bildet kastes aldri ut, selv om det alene er større enn budsjettet
+        while self._used_bytes[size] > budget and len(entries) > 1:
+            oldest_key = next(iter(entries))
+            self._remove(size, oldest_key)
+            self.evictions += 1
+        return photo
+
+    def discard(self, key):
+        """Fjerner bildet fra alle størrelsesklasser, f.eks. når kildefilen er endret."""
+        for size, entries in self._entries.items():
+            if key in entries:
+                self._remove(size, key)
+
+    def _remove(self, size, key):
+        photo, cost = self._entries[size].pop(key)
+        self._used_bytes[size] -= cost
+        release_photo(photo)
+
+    def clear(self):
+        for size, entries in self._entries.items():
+            for photo, _ in entries.values():
+                release_photo(photo)
+            entries.clear()
+            self._used_bytes[size] = 0
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": sum(len(entries) for entries in self._entries.values()),
+            "bytes": sum(self._used_bytes.values()),
+        }
+
+
+def release_photo(photo):
+    """Sletter Tk-bildet bak en PhotoImage med en gang i stedet for å vente på søppeltømmingen."""
+    # Både ImageTk.PhotoImage og tk.PhotoImage kjører "image delete" i __del__, og tåler å bli kalt flere ganger
+    release = getattr(photo, "__del__", None)
+    if release is not None:
+        release()
+
+
+# Forhåndslaster de neste quizbildene mens barnet skriver svaret
+class ImagePrefetcher:
+    def __init__(self, root, on_ready, loader, depth=3, workers=2, size=QUIZ_SIZE, poll_ms=50):
+        self.root = root
+        self.on_ready = on_ready  # Kalles på Tk-tråden med (nøkkel, PIL-bilde)
+        self.loader = loader  # loader(nøkkel, størrelse) -> PIL-bilde, kjøres i en arbeidstråd
+        self.depth = depth
+        self.size = size
+        self.poll_ms = poll_ms
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+        self._pending = {}  # nøkkel -> Future
+        self._after_id = None
+
+    def schedule(self, keys):
+        """Starter dekoding og skalering av bildene i bakgrunnen (maks `depth` stykker)."""
+        for key in keys[:self.depth]:
+            if key not in self._pending:
+                self._pending[key] = self._executor.submit(self.loader, key, self.size)
+        if self._pending and self._after_id is None:
+            self._after_id = self.root.after(self.poll_ms, self._poll)
+
+    def take(self, key):
+        """Henter et forhåndslastet bilde. Venter på jobben hvis den allerede er startet, ellers None."""
+        future = self._pending.pop(key, None)
+        if future is None or future.cancelled():
+            return None
+        try:
+            return future.result()
+        except Exception as e:
+            logging.error(f"Feil under forhåndslasting av {key}: {e}")
+            return None
+
+    def _poll(self):
+        # Kjører på Tk-tråden: ferdige bilder leveres videre slik at PhotoImage lages her
+        self._after_id = None
+        for key, future in list(self._pending.items()):
+            if not future.done():
+                continue
+            del self._pending[key]
+            if future.cancelled():
+                continue
+            if future.exception() is not None:
+                logging.error(f"Feil under forhåndslasting av {key}: {future.exception()}")
+                continue
+            self.on_ready(key, future.result())
+        if self._pending:
+            self._after_id = self.root.after(self.poll_ms, self._poll)
+
+    def cancel(self):
+        """Avbryter alle ventende jobber, f.eks. når spilleren forlater quizen."""
+        for future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def shutdown(self):
+        self.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,243 @@
+"""Trygg lagring av spillerfiler for ASK123, utenfor Tk-tråden.
+
+`write_atomic` skriver til en midlertidig fil, tar fsync og bytter den inn med os.replace,
+så en krasj midt i skrivingen aldri etterlater en halv JSON-fil. `BackgroundWriter` gjør
+skrivingen i en egen tråd: Tk-tråden legger bare teksten i køen og går videre, og flere
+lagringer av samme fil rett etter hverandre slås sammen til én skriving. `AnswerWriter` i
+player_store bygger på den samme tråden for svarene i spillerdatabasen.
+
+Hvor ofte køen skrives til disk styres av `durability`:
+    "answer"    så snart noe ligger i køen (etter hvert svar)
+    "interval"  høyst hvert `interval` sekund
+    "exit"      bare ved flush() og close(), f.eks. når spillet avsluttes
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+DURABILITY_POLICIES = ("answer", "interval", "exit")
+SAVE_INTERVAL = 5.0  # Sekunder mellom skrivingene med durability="interval"
+RETRY_DELAY = 1.0  # Sekunder før en mislykket skriving prøves igjen, f.eks. når minnepinnen er borte
+FLUSH_TIMEOUT = 3.0  # Sekunder Tk-tråden venter på flush() før brukeren får beskjed om at lagringen henger
+LATENCY_SAMPLES = 1000  # Antall siste skrivetider som tas med i stats()
+
+
+def _fsync_dir(path):
+    # Selve omdøpingen er først trygg når mappen er synkronisert; går ikke på Windows
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def write_atomic(path, text):
+    """Erstatter filen med `text`: enten er hele den nye teksten på disk, eller den gamle filen står urørt."""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _fsync_dir(path)
+
+
+def append_text(path, text):
+    """Legger `text` til på slutten av filen. En avbrutt skriving kan bare kutte siste linje."""
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+class BackgroundWriter:
+    def __init__(self, durability="answer", interval=SAVE_INTERVAL, name="progress-writer"):
+        if durability not in DURABILITY_POLICIES:
+            raise ValueError(f"Ukjent durability {durability!r}, bruk en av {', '.join(DURABILITY_POLICIES)}")
+        self.durability = durability
+        self.interval = interval
+        self._pending = self._new_queue()
+        self._condition = threading.Condition()
+        self._writing = False
+        self._flush_waiters = 0  # Antall flush() som venter; køen skrives med en gang så lenge noen venter
+        self._closed = False
+        self._last_write = 0.0
+        self._retry_at = 0.0
+        self._latencies_ms = deque(maxlen=LATENCY_SAMPLES)
+        self.submitted = 0
+        self.coalesced = 0  # Lagringer som ble slått sammen med en annen før de nådde disken
+        self.writes = 0
+        self.failures = 0
+        self.bytes_written = 0
+        self.max_queue_depth = 0
+        self.last_error = None  # Siste feil ved skriving, til feilmeldingen når flush() gir opp
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, path, text, append=False):
+        """Legger en skriving i køen og returnerer med en gang. En ny hel fil erstatter det som
+        venter på samme sti og flyttes bakerst, så filer skrevet i rekkefølge A, B også havner på
+        disk i den rekkefølgen. Tillegg (append) til en sti som venter, hektes på den ventende teksten."""
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("BackgroundWriter er lukket")
+            self.submitted += 1
+            job = self._pending.get(path)
+            if job is not None:
+                self.coalesced += 1
+            if not append:
+                self._pending.pop(path, None)
+                self._pending[path] = [False, text]
+            elif job is not None:
+                job[1] += text
+            else:
+                self._pending[path] = [True, text]
+            self.max_queue_depth = max(self.max_queue_depth, len(self._pending))
+            self._condition.notify_all()
+
+    def flush(self, timeout=FLUSH_TIMEOUT):
+        """Skriver alt i køen nå og venter til det er på disk. False hvis det ikke ble ferdig innen `timeout`
+        (f.eks. fordi minnepinnen er borte og skrivingen prøves på nytt); da står `last_error` igjen.
+        timeout=None venter til alt er skrevet, og skal ikke brukes fra Tk-tråden."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            self._flush_waiters += 1
+            self._retry_at = 0.0
+            self._condition.notify_all()
+            try:
+                while self._pending or self._writing:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._condition.wait(remaining)
+                return True
+            finally:
+                self._flush_waiters -= 1
+
+    def close(self, timeout=10.0):
+        """Skriver det som står igjen og stopper tråden. Kalles når spillet avsluttes."""
+        done = self.flush(timeout)
+        with self._condition:
+            if not done:
+                logging.error(f"Ikke alt ble lagret før avslutning ({len(self._pending)} i køen): {self.last_error}")
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
+        return done
+
+    def _due_in(self):
+        # Sekunder til køen skal skrives (0 = nå, None = vent på flush), kalt med låsen holdt
+        if not self._pending:
+            return None
+        now = time.monotonic()
+        if now < self._retry_at:
+            return self._retry_at - now
+        if self._flush_waiters or self._closed:
+            return 0.0
+        if self.durability == "answer":
+            return 0.0
+        if self.durability == "interval":
+            return max(0.0, self._last_write + self.interval - now)
+        return None
+
+    def _run(self):
+        try:
+            self._serve()
+        finally:
+            self._finish()
+
+    def _serve(self):
+        while True:
+            with self._condition:
+                while True:
+                    due_in = self._due_in()
+                    if due_in == 0.0:
+                        break
+                    if self._closed and not self._pending:
+                        return
+                    self._condition.wait(due_in)
+                batch, self._pending = self._pending, self._new_queue()
+                self._writing = True
+            failed = self._write_batch(batch)
+            with self._condition:
+                if failed:
+                    self._requeue(failed)
+                    self._retry_at = time.monotonic() + RETRY_DELAY
+                    if self._closed:
+                        self._pending = self._new_queue()  # close() har gitt opp; feilen er logget
+                self._last_write = time.monotonic()
+                self._writing = False
+                self._condition.notify_all()
+
+    # Underklasser som skriver noe annet enn filer, overstyrer køen og disse fire metodene
+    def _new_queue(self):
+        return OrderedDict()  # sti -> [append?, tekst], i den rekkefølgen filene må skrives
+
+    def _requeue(self, failed):
+        # Kalt med låsen holdt: det som feilet, legges foran det som har kommet til siden
+        for path, (append, text) in reversed(failed.items()):
+            job = self._pending.get(path)
+            if job is None:
+                self._pending[path] = [append, text]
+                self._pending.move_to_end(path, last=False)
+            elif job[0]:
+                job[:] = [append, text + job[1]]  # Det som ikke kom ut, må komme før de nye linjene
+
+    def _finish(self):
+        pass  # Kalt fra skrivetråden når den stopper
+
+    def _write_batch(self, batch):
+        failed = OrderedDict()
+        for path, (append, text) in batch.items():
+            if failed:
+                # Rekkefølgen skal holde: ingen fil skrives etter en som feilet
+                failed[path] = (append, text)
+                continue
+            start = time.perf_counter()
+            try:
+                (append_text if append else write_atomic)(path, text)
+            except OSError as e:
+                self.failures += 1
+                logging.error(f"Kunne ikke lagre {path}: {e}")
+                self.last_error = e
+                failed[path] = (append, text)
+                continue
+            self.last_error = None
+            self._latencies_ms.append((time.perf_counter() - start) * 1000)
+            self.writes += 1
+            self.bytes_written += len(text.encode("utf-8"))
+        return failed
+
+    def stats(self):
+        with self._condition:
+            latencies = sorted(self._latencies_ms)
+            queue_depth = len(self._pending)
+
+        def percentile(p):
+            return round(latencies[min(len(latencies) - 1, int(round(p / 100 * (len(latencies) - 1))))], 3)
+
+        return {
+            "durability": self.durability,
+            "queue_depth": queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+            "writes": self.writes,
+            "failures": self.failures,
+            "bytes": self.bytes_written,
+            "write_p50_ms": percentile(50) if latencies else None,
+            "write_p99_ms": percentile(99) if latencies else None,
+            "write_max_ms": round(latencies[-1], 3) if latencies else None,
+        }
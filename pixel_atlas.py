@@ -0,0 +1,177 @@
+"""Ferdig dekodet bildeatlas for ASK123.
+
+Alle tegn rendres én gang i størrelsene spillet bruker og lagres som rå piksler i én fil
+med en indeks foran. Spillet minnemapper filen og lager bildene rett fra utsnitt av den,
+uten å åpne eller dekode én eneste JPEG.
+
+Bygg atlaset på forhånd (ellers bygges det i bakgrunnen ved første oppstart):
+    python pixel_atlas.py [--base Kategorier] [--output atlas.bin]
+"""
+import argparse
+import hashlib
+import json
+import logging
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+import threading
+
+from PIL import Image
+
+from assets import AssetStore
+from image_pipeline import load_resized_image, user_cache_dir, QUIZ_SIZE, THUMBNAIL_SIZE
+
+ATLAS_MAGIC = b"ASKATLAS"
+ATLAS_VERSION = 1
+ATLAS_FILE = "atlas.bin"
+MONTHLY_CATEGORY = "manedens_tegn"
+_HEADER = struct.Struct("<8sII")  # magic, versjon, lengde på JSON-indeksen
+_ALIGNMENT = 16
+
+
+def variant_key(content_id, size):
+    return f"{content_id}:{size[0]}x{size[1]}"
+
+
+def atlas_variants(assets):
+    """Bildene spillet faktisk viser: alle tegn i quizstørrelse, månedens tegn også som miniatyr."""
+    variants = {}
+    for category in assets.categories():
+        sizes = (QUIZ_SIZE, THUMBNAIL_SIZE) if category == MONTHLY_CATEGORY else (QUIZ_SIZE,)
+        for filename in assets.list_images(category):
+            content_id = assets.content_id(category, filename)
+            for size in sizes:
+                variants[variant_key(content_id, size)] = (content_id, size)
+    return variants
+
+
+def manifest_digest(variants):
+    """Versjonsstempel for atlaset. Endres når et bilde endres, legges til eller fjernes."""
+    digest = hashlib.sha1(f"atlas-v{ATLAS_VERSION}".encode("ascii"))
+    for key in sorted(variants):
+        digest.update(key.encode("ascii"))
+    return digest.hexdigest()
+
+
+def default_atlas_path():
+    return os.path.join(user_cache_dir(), ATLAS_FILE)
+
+
+def build_atlas(assets, atlas_path, variants=None, loader=None):
+    """Rendrer alle variantene og skriver atlaset atomisk (tempfil + rename).
+    `loader(content_id, size)` kan hente ferdig skalerte bilder, f.eks. fra diskcachen."""
+    if loader is None:
+        loader = lambda content_id, size: load_resized_image(assets.path_for_content(content_id), size)
+    if variants is None:
+        variants = atlas_variants(assets)
+    entries = {}
+    os.makedirs(os.path.dirname(os.path.abspath(atlas_path)), exist_ok=True)
+    # Pikslene skrives først til en egen fil, siden indeksen må ligge foran dem
+    with tempfile.TemporaryFile() as pixel_data:
+        for key, (content_id, size) in sorted(variants.items()):
+            img = loader(content_id, size)
+            if img.mode not in ("RGB", "RGBA", "L"):
+                img = img.convert("RGBA" if "transparency" in img.info or img.mode in ("LA", "PA") else "RGB")
+            pixels = img.tobytes()
+            padding = -pixel_data.tell() % _ALIGNMENT
+            pixel_data.write(b"\0" * padding)
+            entries[key] = [pixel_data.tell(), img.mode, img.width, img.height]
+            pixel_data.write(pixels)
+
+        # Offsetene i indeksen er relative til starten på pikseldataene rett etter indeksen
+        index = json.dumps({"manifest": manifest_digest(variants), "entries": entries}).encode("utf-8")
+        tmp_path = f"{atlas_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(ATLAS_MAGIC, ATLAS_VERSION, len(index)))
+            f.write(index)
+            f.write(b"\0" * (_data_start(len(index)) - f.tell()))
+            pixel_data.seek(0)
+            shutil.copyfileobj(pixel_data, f)
+    os.replace(tmp_path, atlas_path)
+    logging.info(f"Bildeatlas bygget med {len(entries)} bilder: {atlas_path}")
+    return atlas_path
+
+
+def _data_start(index_length):
+    data_start = _HEADER.size + index_length
+    return data_start + (-data_start % _ALIGNMENT)
+
+
+class PixelAtlas:
+    def __init__(self, atlas_path):
+        self.atlas_path = atlas_path
+        with open(atlas_path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, index_length = _HEADER.unpack_from(self._mmap, 0)
+        if magic != ATLAS_MAGIC or version != ATLAS_VERSION:
+            self._mmap.close()
+            raise ValueError(f"Ukjent atlasformat i {atlas_path}")
+        index = json.loads(self._mmap[_HEADER.size:_HEADER.size + index_length])
+        self.manifest = index["manifest"]
+        self._entries = index["entries"]
+        self._data_start = _data_start(index_length)
+        self._view = memoryview(self._mmap)
+
+    def get(self, content_id, size):
+        """Bildet som et PIL-bilde over et utsnitt av mmap-en (ingen kopi), eller None."""
+        entry = self._entries.get(variant_key(content_id, size))
+        if entry is None:
+            return None
+        offset, mode, width, height = entry
+        offset += self._data_start
+        length = width * height * len(mode)
+        return Image.frombuffer(mode, (width, height), self._view[offset:offset + length], "raw", mode, 0, 1)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def close(self):
+        self._view.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Et bilde bruker fortsatt et utsnitt; mmap-en lukkes når det forsvinner
+            pass
+
+
+def open_atlas(assets, atlas_path=None, on_rebuilt=None):
+    """Åpner atlaset hvis det stemmer med bildene. Et manglende eller utdatert atlas
+    bygges på nytt i en bakgrunnstråd, og `on_rebuilt(atlas)` kalles når det er klart."""
+    atlas_path = atlas_path or default_atlas_path()
+    variants = atlas_variants(assets)
+    expected = manifest_digest(variants)
+    if os.path.exists(atlas_path):
+        try:
+            atlas = PixelAtlas(atlas_path)
+            if atlas.manifest == expected:
+                return atlas
+            atlas.close()
+            logging.info("Bildeatlaset er utdatert og bygges på nytt.")
+        except (OSError, ValueError) as e:
+            logging.warning(f"Kunne ikke åpne bildeatlaset {atlas_path}: {e}")
+
+    def rebuild():
+        try:
+            build_atlas(assets, atlas_path, variants)
+            if on_rebuilt is not None:
+                on_rebuilt(PixelAtlas(atlas_path))
+        except Exception as e:
+            logging.error(f"Feil under bygging av bildeatlas: {e}")
+
+    threading.Thread(target=rebuild, name="atlas-rebuild", daemon=True).start()
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bygger bildeatlaset for ASK123.")
+    parser.add_argument("--base", default="Kategorier", help="Mappen med kategoriene")
+    parser.add_argument("--output", default=None, help=f"Atlasfil (standard: {default_atlas_path()})")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    build_atlas(AssetStore(args.base), args.output or default_atlas_path())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,494 @@
+"""Spillere, progresjon, resultater per tegn og sikkerhetskopier for ASK123 i én SQLite-database.
+
+Erstatter players/<navn>.json: å liste spillerne, laste en profil og lagre et svar er hver
+sitt oppslag i en indeks, uansett hvor mange elever som bruker maskinen. Databasen kjører
+i WAL-modus, så et svar er et lite tillegg i WAL-filen og aldri en omskriving av hele profilen.
+Svarene fra spillet skrives av `AnswerWriter` i en egen tråd med egen tilkobling, etter de samme
+lagringsreglene som i persistence: Tk-tråden venter aldri på disken, og ingen transaksjon står
+åpen mellom skrivingene.
+
+Sikkerhetskopiene er generasjoner av profilen delt i blokker (poeng, kategorier og resultatene
+per tegn i BACKUP_BUCKETS deler). Blokkene lagres komprimert én gang etter innhold, så en ny
+generasjon bare koster de blokkene som faktisk endret seg.
+
+Gamle JSON-spillere (med progresjonsjournal og _backup-fil) flyttes inn én gang:
+    python player_store.py [--players players] [--force]
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from persistence import SAVE_INTERVAL, BackgroundWriter
+from quiz_engine import PlayerProgress, ProgressJournal
+
+STORE_VERSION = 2
+PLAYER_DB = "players.sqlite3"
+# Sikkerhetskopier som beholdes per spiller: de siste, og den nyeste per kalenderdag og per kalenderuke
+# innenfor så mange dager og uker bakover fra i dag
+BACKUP_KEEP_LAST = 10
+BACKUP_KEEP_DAILY = 14
+BACKUP_KEEP_WEEKLY = 8
+BACKUP_BUCKETS = 32  # Resultatene per tegn deles i så mange blokker, så en ny kopi bare lagrer de som endret seg
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    score INTEGER NOT NULL DEFAULT 0,
+    streak INTEGER NOT NULL DEFAULT 0,
+    high_score INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS category_stats (
+    player_id INTEGER NOT NULL REFERENCES players (id) ON DELETE CASCADE,
+    category TEXT NOT NULL,
+    correct INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (player_id, category)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sign_results (
+    player_id INTEGER NOT NULL REFERENCES players (id) ON DELETE CASCADE,
+    sign_id TEXT NOT NULL,
+    correct INTEGER NOT NULL DEFAULT 0,
+    wrong INTEGER NOT NULL DEFAULT 0,
+    last_answered REAL NOT NULL,
+    PRIMARY KEY (player_id, sign_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS backups (
+    id INTEGER PRIMARY KEY,
+    player_id INTEGER NOT NULL REFERENCES players (id) ON DELETE CASCADE,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS backups_by_player ON backups (player_id, created);
+CREATE TABLE IF NOT EXISTS backup_refs (
+    backup_id INTEGER NOT NULL REFERENCES backups (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    PRIMARY KEY (backup_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS backup_refs_by_digest ON backup_refs (digest);
+CREATE TABLE IF NOT EXISTS backup_blocks (
+    digest TEXT PRIMARY KEY,
+    data BLOB NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def backup_blocks(snapshot):
+    """Deler et øyeblikksbilde av profilen i blokker: poeng, kategoritellinger og resultatene per tegn
+    fordelt på BACKUP_BUCKETS etter en hash av tegn-ID-en, så et nytt tegn ikke forskyver de andre."""
+    blocks = [{key: snapshot[key] for key in ("score", "streak", "high_score") if key in snapshot},
+              {"category_stats": snapshot.get("category_stats", {})}]
+    buckets = [{} for _ in range(BACKUP_BUCKETS)]
+    for sign_id, result in snapshot.get("sign_results", {}).items():
+        buckets[zlib.crc32(sign_id.encode("utf-8")) % BACKUP_BUCKETS][sign_id] = list(result)
+    blocks += [{"sign_results": bucket} for bucket in buckets if bucket]
+    return blocks
+
+
+def join_blocks(blocks):
+    snapshot = {}
+    for block in blocks:
+        for key, value in block.items():
+            if key == "sign_results":
+                snapshot.setdefault(key, {}).update(value)
+            else:
+                snapshot[key] = value
+    return snapshot
+
+
+def legacy_player_files(players_dir, name):
+    """JSON-filene spilleren hadde før databasen: spillerfil, progresjonsjournal og sikkerhetskopi."""
+    return (os.path.join(players_dir, f"{name}.json"), os.path.join(players_dir, f"{name}.progress.jsonl"),
+            os.path.join(players_dir, f"{name}_backup.json"))
+
+
+class PlayerStore:
+    def __init__(self, path):
+        self.path = path
+        self._batch_depth = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Transaksjonene styres selv (BEGIN/COMMIT), så flere endringer kan samles i én commit med batch()
+        self._db = sqlite3.connect(path, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.execute("PRAGMA synchronous = NORMAL")  # I WAL-modus: fsync ved sjekkpunkt, ikke per commit
+        self._db.execute("PRAGMA foreign_keys = ON")
+        version = self._db.execute("PRAGMA user_version").fetchone()[0]
+        if version != STORE_VERSION:
+            with self.batch():
+                if version == 1:
+                    # Versjon 1 lagret hver sikkerhetskopi som hel JSON; de flyttes over i blokker
+                    self._db.execute("ALTER TABLE backups RENAME TO backups_v1")
+                    self._db.execute("DROP INDEX backups_by_player")
+                for statement in _SCHEMA.split(";"):
+                    if statement.strip():
+                        self._db.execute(statement)
+                if version == 1:
+                    for player_id, created, data in self._db.execute(
+                            "SELECT player_id, created, data FROM backups_v1 ORDER BY created").fetchall():
+                        self._store_backup(player_id, created, json.loads(data), reuse_latest=False)
+                    self._db.execute("DROP TABLE backups_v1")
+                self._db.execute(f"PRAGMA user_version = {STORE_VERSION}")
+
+    def _begin(self):
+        if not self._db.in_transaction:
+            self._db.execute("BEGIN IMMEDIATE")
+
+    def _end(self):
+        # Avslutter en endring; inne i batch() committes alt samlet til slutt
+        if self._batch_depth == 0:
+            self.commit()
+
+    @contextmanager
+    def batch(self):
+        """Samler alle endringene i blokken i én transaksjon, som rulles tilbake hvis blokken feiler."""
+        self._begin()
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._batch_depth -= 1
+            if self._batch_depth == 0 and self._db.in_transaction:
+                self._db.execute("ROLLBACK")
+            raise
+        self._batch_depth -= 1
+        self._end()
+
+    def commit(self):
+        if self._db.in_transaction:
+            self._db.execute("COMMIT")
+
+    def close(self):
+        self.commit()
+        self._db.execute("PRAGMA optimize")
+        self._db.close()
+
+    def player_names(self):
+        return [name for (name,) in self._db.execute("SELECT name FROM players ORDER BY name")]
+
+    def player_id(self, name):
+        row = self._db.execute("SELECT id FROM players WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def create_player(self, name, progress=None, now=None):
+        """Ny spiller; returnerer ID-en. Kaster ValueError hvis navnet er tatt."""
+        if self.player_id(name) is not None:
+            raise ValueError(f"Spilleren {name} finnes allerede.")
+        now = time.time() if now is None else now
+        self._begin()
+        player_id = self._db.execute("INSERT INTO players (name, created, updated) VALUES (?, ?, ?)",
+                                     (name, now, now)).lastrowid
+        self._write_progress(player_id, progress or PlayerProgress(), now)
+        self._end()
+        return player_id
+
+    def load_player(self, name):
+        """(ID, PlayerProgress) for spilleren, eller None. Ett oppslag i navneindeksen."""
+        rows = self._db.execute(
+            "SELECT p.id, p.score, p.streak, p.high_score, c.category, c.correct FROM players p"
+            " LEFT JOIN category_stats c ON c.player_id = p.id WHERE p.name = ?", (name,)).fetchall()
+        if not rows:
+            return None
+        player_id, score, streak, high_score = rows[0][:4]
+        category_stats = {category: correct for *_, category, correct in rows if category is not None}
+        return player_id, PlayerProgress(score, streak, high_score, category_stats)
+
+    def save_progress(self, player_id, progress, now=None):
+        """Erstatter hele progresjonen, f.eks. etter tilbakestilling. Committes med en gang."""
+        self._begin()
+        self._write_progress(player_id, progress, time.time() if now is None else now)
+        self._end()
+
+    def _write_progress(self, player_id, progress, now):
+        self._db.execute("UPDATE players SET score = ?, streak = ?, high_score = ?, updated = ? WHERE id = ?",
+                         (progress.score, progress.streak, progress.high_score, now, player_id))
+        self._db.execute("DELETE FROM category_stats WHERE player_id = ?", (player_id,))
+        self._db.executemany("INSERT INTO category_stats (player_id, category, correct) VALUES (?, ?, ?)",
+                             [(player_id, category, correct) for category, correct in progress.category_stats.items()])
+
+    def record_answer(self, player_id, progress, category=None, sign_id=None, correct=True, now=None):
+        """Lagrer poeng, rekke og rekord, tellingen for kategorien og resultatet for tegnet etter et svar.
+        False hvis spilleren er slettet i mellomtiden; da lagres ingenting."""
+        now = time.time() if now is None else now
+        self._begin()
+        if not self._db.execute("UPDATE players SET score = ?, streak = ?, high_score = ?, updated = ? WHERE id = ?",
+                                (progress.score, progress.streak, progress.high_score, now, player_id)).rowcount:
+            self._end()
+            return False
+        if category is not None:
+            self._db.execute(
+                "INSERT INTO category_stats (player_id, category, correct) VALUES (?, ?, ?)"
+                " ON CONFLICT (player_id, category) DO UPDATE SET correct = excluded.correct",
+                (player_id, category, progress.category_stats.get(category, 0)))
+        if sign_id is not None:
+            self._db.execute(
+                "INSERT INTO sign_results (player_id, sign_id, correct, wrong, last_answered) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT (player_id, sign_id) DO UPDATE SET correct = correct + excluded.correct,"
+                " wrong = wrong + excluded.wrong, last_answered = excluded.last_answered",
+                (player_id, sign_id, int(correct), int(not correct), now))
+        self._end()
+        return True
+
+    def sign_results(self, player_id):
+        """{tegn-ID: (riktige, gale, sist besvart)} for spilleren."""
+        return {sign_id: (correct, wrong, last_answered) for sign_id, correct, wrong, last_answered in self._db.execute(
+            "SELECT sign_id, correct, wrong, last_answered FROM sign_results WHERE player_id = ?", (player_id,))}
+
+    def delete_player(self, name):
+        """Sletter spilleren med alt som hører til. False hvis spilleren ikke finnes."""
+        self._begin()
+        digests = [digest for (digest,) in self._db.execute(
+            "SELECT DISTINCT r.digest FROM backups b JOIN backup_refs r ON r.backup_id = b.id"
+            " WHERE b.player_id = (SELECT id FROM players WHERE name = ?)", (name,))]
+        deleted = self._db.execute("DELETE FROM players WHERE name = ?", (name,)).rowcount
+        self._drop_unused_blocks(digests)
+        self._end()
+        return deleted > 0
+
+    def snapshot(self, player_id):
+        """Hele profilen som en dict: poeng, kategoritellinger og resultatene per tegn."""
+        score, streak, high_score = self._db.execute(
+            "SELECT score, streak, high_score FROM players WHERE id = ?", (player_id,)).fetchone()
+        category_stats = dict(self._db.execute(
+            "SELECT category, correct FROM category_stats WHERE player_id = ?", (player_id,)))
+        sign_results = {sign_id: list(result) for sign_id, result in self.sign_results(player_id).items()}
+        return {"score": score, "streak": streak, "high_score": high_score, "category_stats": category_stats,
+                "sign_results": sign_results}
+
+    def backup(self, player_id, now=None, data=None, prune=True):
+        """Lagrer en ny generasjon av profilen (eller `data`) og rydder etter BACKUP_KEEP_*, med mindre
+        `prune` er False. Bare blokker som ikke finnes fra før, skrives; er ingenting endret siden forrige
+        kopi, gjenbrukes den. Returnerer ID-en til kopien."""
+        now = time.time() if now is None else now
+        self._begin()
+        backup_id = self._store_backup(player_id, now, self.snapshot(player_id) if data is None else data)
+        if prune:
+            self.prune_backups(player_id, now)
+        self._end()
+        return backup_id
+
+    def _store_backup(self, player_id, created, snapshot, reuse_latest=True):
+        # Med reuse_latest gjenbrukes forrige kopi når ingenting er endret; ellers blir det alltid en ny
+        # generasjon (blokkene deles uansett), f.eks. når kopiene fra versjon 1 flyttes over
+        digests = []
+        for block in backup_blocks(snapshot):
+            text = json.dumps(block, sort_keys=True, separators=(",", ":")).encode("utf-8")
+            digest = hashlib.sha1(text).hexdigest()
+            self._db.execute("INSERT OR IGNORE INTO backup_blocks (digest, data) VALUES (?, ?)",
+                             (digest, zlib.compress(text)))
+            digests.append(digest)
+        if reuse_latest:
+            latest = self._db.execute("SELECT id FROM backups WHERE player_id = ? ORDER BY created DESC LIMIT 1",
+                                      (player_id,)).fetchone()
+            if latest is not None and self._backup_digests(latest[0]) == digests:
+                return latest[0]
+        backup_id = self._db.execute("INSERT INTO backups (player_id, created) VALUES (?, ?)",
+                                     (player_id, created)).lastrowid
+        self._db.executemany("INSERT INTO backup_refs (backup_id, position, digest) VALUES (?, ?, ?)",
+                             [(backup_id, position, digest) for position, digest in enumerate(digests)])
+        return backup_id
+
+    def _backup_digests(self, backup_id):
+        return [digest for (digest,) in self._db.execute(
+            "SELECT digest FROM backup_refs WHERE backup_id = ? ORDER BY position", (backup_id,))]
+
+    def prune_backups(self, player_id, now=None):
+        """Sletter kopiene som faller utenfor BACKUP_KEEP_LAST/DAILY/WEEKLY, og blokkene ingen andre bruker.
+        Dagene og ukene er kalenderdager og -uker regnet bakover fra `now`, ikke dager med kopier, så en
+        elev som har hatt ferie, ikke får beholdt kopier som er månedsvis eldre."""
+        today = datetime.fromtimestamp(time.time() if now is None else now).date()
+        first_day = today - timedelta(days=BACKUP_KEEP_DAILY - 1)
+        first_week = today - timedelta(days=today.weekday(), weeks=BACKUP_KEEP_WEEKLY - 1)  # En mandag
+        keep, days, weeks = set(), set(), set()
+        rows = self.backups(player_id)
+        for position, (backup_id, created) in enumerate(rows):
+            day = datetime.fromtimestamp(created).date()
+            week = day - timedelta(days=day.weekday())
+            if position < BACKUP_KEEP_LAST:
+                keep.add(backup_id)
+            if day >= first_day and day not in days:
+                days.add(day)
+                keep.add(backup_id)
+            if week >= first_week and week not in weeks:
+                weeks.add(week)
+                keep.add(backup_id)
+        expired = [(backup_id,) for backup_id, _ in rows if backup_id not in keep]
+        if not expired:
+            return 0
+        self._begin()
+        digests = set()
+        for (backup_id,) in expired:
+            digests.update(self._backup_digests(backup_id))
+        self._db.executemany("DELETE FROM backups WHERE id = ?", expired)
+        self._drop_unused_blocks(digests)
+        self._end()
+        return len(expired)
+
+    def _drop_unused_blocks(self, digests):
+        self._db.executemany("DELETE FROM backup_blocks WHERE digest = ?1 AND NOT EXISTS"
+                             " (SELECT 1 FROM backup_refs WHERE digest = ?1)", [(digest,) for digest in digests])
+
+    def backups(self, player_id):
+        """[(ID, tidspunkt)] for spillerens sikkerhetskopier, nyeste først."""
+        return self._db.execute("SELECT id, created FROM backups WHERE player_id = ? ORDER BY created DESC",
+                                (player_id,)).fetchall()
+
+    def backup_snapshot(self, backup_id):
+        """Profilen slik den var i kopien, satt sammen av blokkene i ett oppslag. None hvis kopien ikke finnes."""
+        rows = self._db.execute(
+            "SELECT b.data FROM backup_refs r JOIN backup_blocks b ON b.digest = r.digest"
+            " WHERE r.backup_id = ? ORDER BY r.position", (backup_id,)).fetchall()
+        if not rows:
+            return None
+        return join_blocks(json.loads(zlib.decompress(data)) for (data,) in rows)
+
+    def restore_backup(self, player_id, backup_id):
+        """Setter profilen tilbake til kopien og returnerer den gjenopprettede PlayerProgress.
+        Profilen slik den var før, lagres først som en egen kopi, så gjenopprettingen kan angres. Det ryddes
+        ikke her, så kopien som gjenopprettes (og de andre i listen) står igjen til neste vanlige kopi."""
+        row = self._db.execute("SELECT player_id FROM backups WHERE id = ?", (backup_id,)).fetchone()
+        if row is None or row[0] != player_id:
+            raise LookupError(f"Fant ikke sikkerhetskopien {backup_id}.")
+        snapshot = self.backup_snapshot(backup_id)
+        progress = PlayerProgress.from_dict(snapshot)
+        with self.batch():
+            self.backup(player_id, prune=False)
+            self._write_progress(player_id, progress, time.time())
+            if "sign_results" in snapshot:
+                self._db.execute("DELETE FROM sign_results WHERE player_id = ?", (player_id,))
+                self._db.executemany(
+                    "INSERT INTO sign_results (player_id, sign_id, correct, wrong, last_answered) VALUES (?, ?, ?, ?, ?)",
+                    [(player_id, sign_id, *result) for sign_id, result in snapshot["sign_results"].items()])
+        return progress
+
+    def meta(self, key):
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        self._begin()
+        self._db.execute("INSERT INTO meta (key, value) VALUES (?, ?)"
+                         " ON CONFLICT (key) DO UPDATE SET value = excluded.value", (key, value))
+        self._end()
+
+
+class AnswerWriter(BackgroundWriter):
+    """Lagrer svarene i spillerdatabasen fra en egen tråd, med sin egen tilkobling til databasen.
+
+    record_answer() legger bare svaret i køen. Tråden skriver alt som venter i én transaksjon etter
+    lagringsregelen (etter hvert svar, hvert `interval` sekund eller ved flush()/close()), så
+    commit og sjekkpunkter i WAL-filen aldri skjer på Tk-tråden. Mislykkede skrivinger, f.eks. når
+    databasen er låst eller minnepinnen er borte, prøves på nytt etter RETRY_DELAY."""
+
+    def __init__(self, path, durability="answer", interval=SAVE_INTERVAL):
+        self.path = path
+        self._store = None  # Åpnes i skrivetråden; en SQLite-tilkobling hører til tråden som lagde den
+        super().__init__(durability, interval, name="answer-writer")
+
+    def record_answer(self, player_id, progress, category=None, sign_id=None, correct=True, now=None):
+        """Som PlayerStore.record_answer, men returnerer med en gang. Verdiene kopieres nå, siden
+        progresjonen endrer seg før tråden rekker å skrive."""
+        counts = {category: progress.category_stats.get(category, 0)} if category is not None else {}
+        job = (player_id, PlayerProgress(progress.score, progress.streak, progress.high_score, counts), category,
+               sign_id, correct, time.time() if now is None else now)
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("AnswerWriter er lukket")
+            self.submitted += 1
+            self._pending.append(job)
+            self.max_queue_depth = max(self.max_queue_depth, len(self._pending))
+            self._condition.notify_all()
+
+    def _new_queue(self):
+        return []  # Svarene i den rekkefølgen de ble gitt
+
+    def _requeue(self, failed):
+        self._pending[:0] = failed
+
+    def _finish(self):
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+
+    def _write_batch(self, batch):
+        start = time.perf_counter()
+        try:
+            if self._store is None:
+                self._store = PlayerStore(self.path)
+            with self._store.batch():
+                for job in batch:
+                    self._store.record_answer(*job)
+        except (sqlite3.Error, OSError) as e:
+            self.failures += 1
+            self.last_error = e
+            logging.error(f"Kunne ikke lagre {len(batch)} svar i {self.path}: {e}")
+            return batch
+        self.last_error = None
+        self._latencies_ms.append((time.perf_counter() - start) * 1000)
+        self.writes += 1
+        return []
+
+
+def migrate_json_players(store, players_dir, force=False):
+    """Flytter players/<navn>.json (med journal og _backup-fil) inn i databasen, i én transaksjon.
+    Kjøres bare én gang med mindre `force`; spillere som allerede finnes i databasen, røres ikke.
+    JSON-filene blir liggende, men leses ikke lenger. Returnerer antall spillere som ble flyttet."""
+    if store.meta("json_migrated") and not force:
+        return 0
+    try:
+        filenames = sorted(os.listdir(players_dir))
+    except FileNotFoundError:
+        filenames = []
+    names = [f[:-len(".json")] for f in filenames if f.endswith(".json") and not f.endswith("_backup.json")]
+    migrated = 0
+    with store.batch():
+        for name in names:
+            if store.player_id(name) is not None:
+                continue
+            player_file, journal_file, backup_file = legacy_player_files(players_dir, name)
+            try:
+                progress = ProgressJournal(player_file, journal_file).load()
+            except (OSError, ValueError) as e:
+                logging.warning(f"Hopper over {player_file}: {e}")
+                continue
+            player_id = store.create_player(name, progress, os.path.getmtime(player_file))
+            if os.path.exists(backup_file):
+                try:
+                    with open(backup_file, "r", encoding="utf-8") as f:
+                        store.backup(player_id, os.path.getmtime(backup_file), json.load(f))
+                except (OSError, ValueError) as e:
+                    logging.warning(f"Hopper over sikkerhetskopien {backup_file}: {e}")
+            migrated += 1
+        store.set_meta("json_migrated", str(time.time()))
+    for name in sorted(set(f[:-len("_backup.json")] for f in filenames if f.endswith("_backup.json")) - set(names)):
+        logging.warning(f"Fant sikkerhetskopi uten spiller: {name}_backup.json")
+    return migrated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flytter spillere fra JSON-filer inn i spillerdatabasen for ASK123.")
+    parser.add_argument("--players", default="players", help="Mappen med spillerfilene")
+    parser.add_argument("--force", action="store_true", help="Kjør selv om flyttingen er gjort før")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    store = PlayerStore(os.path.join(args.players, PLAYER_DB))
+    try:
+        migrated = migrate_json_players(store, args.players, args.force)
+        logging.info(f"{migrated} spillere flyttet, {len(store.player_names())} i {store.path}")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
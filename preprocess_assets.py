@@ -0,0 +1,167 @@
+"""Forhåndsbehandler alle bilder i Kategorier for ASK123, parallelt over alle kjerner.
+
+Lager innholds-ID-er og manifest, skalerte varianter i diskcachen, perseptuelle
+bildehasher, distraktorene til flervalgsmodus og bildeatlaset, slik at både
+skrivebordsversjonen og en serverinstallasjon starter varmt. Bare nye eller endrede
+filer behandles på nytt.
+
+    python preprocess_assets.py [--base Kategorier] [--cache-dir DIR] [--workers N] [--no-atlas]
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from multiprocessing import Pool
+
+from assets import AssetStore, default_manifest_path, describe_sign
+from distractors import DistractorTable, build_distractors, default_distractor_path, distractor_stamp
+from image_hashes import DUPLICATE_DISTANCE, HashIndex, default_hash_path, missing_hashes, update_hash_index
+from image_pipeline import ThumbnailDiskCache, user_cache_dir
+from pixel_atlas import ATLAS_FILE, PixelAtlas, atlas_variants, build_atlas, manifest_digest
+
+# Hver arbeidsprosess lager sin egen diskcache én gang
+_worker_cache = None
+
+
+def _init_worker(base_folder, cache_dir):
+    global _worker_cache
+    _worker_cache = ThumbnailDiskCache(base_folder, cache_dir)
+
+
+def _describe_job(job):
+    file_path, filename = job
+    return describe_sign(file_path, filename)
+
+
+def _render_job(job):
+    image_path, size, content_id = job
+    _worker_cache.load(image_path, size, content_id=content_id)
+    return content_id
+
+
+class StageTimer:
+    def __init__(self):
+        self.stages = []
+
+    def run(self, name, func, items=None):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        count = items() if callable(items) else items
+        stage = {"stage": name, "seconds": round(elapsed, 3)}
+        if count is not None:
+            stage["items"] = count
+            stage["images_per_s"] = round(count / elapsed, 1) if elapsed > 0 else None
+        self.stages.append(stage)
+        logging.info(f"{name}: {elapsed:.2f} s" + (f", {count} bilder ({stage['images_per_s']} bilder/s)" if count is not None else ""))
+        return result
+
+
+def preprocess(base_folder, cache_dir, workers=None, build_atlas_file=True):
+    timer = StageTimer()
+    with Pool(processes=workers, initializer=_init_worker, initargs=(base_folder, cache_dir)) as pool:
+        described = []
+
+        def describe_parallel(jobs):
+            described.extend(jobs)
+            return pool.map(_describe_job, jobs, chunksize=16)
+
+        def build_manifest():
+            assets = AssetStore(base_folder, manifest_path=default_manifest_path(base_folder, cache_dir),
+                                describe=describe_parallel)
+            # Sjekk hver fil, ikke bare mappene, så bilder som er overskrevet på stedet også fanges opp
+            assets.refresh(deep=True)
+            return assets
+
+        # 1) Innholds-ID-er og manifest (bare nye/endrede filer hashes)
+        assets = timer.run("manifest", build_manifest, items=lambda: len(described))
+
+        # 2) Skalerte varianter i diskcachen
+        thumbnails = ThumbnailDiskCache(base_folder, cache_dir)
+        variants = atlas_variants(assets)
+        missing = [(assets.path_for_content(content_id), size, content_id)
+                   for content_id, size in variants.values()
+                   if not thumbnails.contains(None, size, content_id=content_id)]
+        timer.run("varianter", lambda: pool.map(_render_job, missing, chunksize=8), items=len(missing))
+
+        # 3) Perseptuelle bildehasher (bare bilder som ikke er hashet før)
+        hash_path = default_hash_path(assets)
+        hashes = HashIndex.load(hash_path)
+        stale = missing_hashes(assets, hashes or HashIndex())
+        if hashes is None or stale or len(hashes) != len(assets.manifest["blobs"]):
+            parallel_map = lambda func, items: pool.map(func, items, chunksize=8)
+            hashes = timer.run("hasher", lambda: update_hash_index(assets, hashes, parallel_map), items=len(stale))
+            hashes.save(hash_path)
+        else:
+            logging.info("Bildehashene er allerede oppdatert.")
+        for distance, first, second in hashes.near_duplicates(DUPLICATE_DISTANCE):
+            logging.warning(f"Trolig samme bilde lastet opp to ganger ({distance} bit ulike): "
+                            f"{assets.manifest['blobs'][first]} og {assets.manifest['blobs'][second]}")
+
+        # 4) Distraktorer til flervalg
+        distractor_path = default_distractor_path(assets)
+        current = DistractorTable.load(distractor_path)
+        if current is not None and current.stamp == distractor_stamp(assets):
+            logging.info("Distraktorene er allerede oppdatert.")
+        else:
+            table = timer.run("distraktorer", lambda: build_distractors(assets, hashes),
+                              items=len(assets.manifest["blobs"]))
+            table.save(distractor_path)
+
+    # 5) Bildeatlas, bygget fra de ferdig skalerte variantene
+    if build_atlas_file:
+        atlas_path = os.path.join(cache_dir, ATLAS_FILE)
+        if atlas_is_current(atlas_path, variants):
+            logging.info("Bildeatlaset er allerede oppdatert.")
+        else:
+            loader = lambda content_id, size: thumbnails.load(assets.path_for_content(content_id), size, content_id)
+            timer.run("atlas", lambda: build_atlas(assets, atlas_path, variants, loader=loader), items=len(variants))
+
+    total_signs = sum(assets.image_count(category) for category in assets.categories())
+    return {
+        "signs": total_signs,
+        "unique_images": len(assets.manifest["blobs"]),
+        "variants": len(variants),
+        "stages": timer.stages,
+    }
+
+
+def atlas_is_current(atlas_path, variants):
+    if not os.path.exists(atlas_path):
+        return False
+    try:
+        atlas = PixelAtlas(atlas_path)
+    except (OSError, ValueError):
+        return False
+    current = atlas.manifest == manifest_digest(variants)
+    atlas.close()
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Forhåndsbehandler bildene i Kategorier for ASK123.")
+    parser.add_argument("--base", default="Kategorier", help="Mappen med kategoriene")
+    parser.add_argument("--cache-dir", default=None, help=f"Hvor resultatet lagres (standard: {user_cache_dir()})")
+    parser.add_argument("--workers", type=int, default=None, help="Antall prosesser (standard: alle kjerner)")
+    parser.add_argument("--no-atlas", action="store_true", help="Ikke bygg bildeatlaset")
+    parser.add_argument("--json", action="store_true", help="Skriv rapporten som JSON")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    cache_dir = args.cache_dir or user_cache_dir()
+    start = time.perf_counter()
+    report = preprocess(os.path.abspath(args.base), cache_dir, args.workers, not args.no_atlas)
+    report["total_seconds"] = round(time.perf_counter() - start, 3)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{report['signs']} tegn, {report['unique_images']} unike bilder, {report['variants']} varianter "
+              f"på {report['total_seconds']:.2f} s")
+        for stage in report["stages"]:
+            rate = f" ({stage['images_per_s']} bilder/s)" if stage.get("images_per_s") else ""
+            print(f"  {stage['stage']:<12} {stage['seconds']:>8.3f} s  {stage.get('items', '-')}{rate}")
+
+
+if __name__ == "__main__":
+    main()
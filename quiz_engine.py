@@ -0,0 +1,723 @@
+import heapq
+import json
+import logging
+import os
+import random
+import time
+
+from answer_index import ALMOST, TYPO_TOLERANCE, WRONG, PrefixIndex, classify_answer, hint_index_for, normalize_answer
+from persistence import append_text, write_atomic
+
+
+def new_seed():
+    """Frø til en ny økt. Lagres i øktopptaket, så økten kan spilles av igjen nøyaktig."""
+    return random.SystemRandom().randrange(2 ** 32)
+
+
+def seeded_rng(seed, stream):
+    """Egen tallstrøm per del av en økt ("pool", "choices"), så forhåndslasting som trekker
+    kort tidligere ikke forskyver tallene flervalgsalternativene stokkes med."""
+    return random.Random(f"{seed}/{stream}")
+
+
+# Stokket kortstokk med markør: hver trekning er O(1), og alle kort trekkes før noe gjentas.
+# Stokkingen skjer underveis (Fisher-Yates ett steg om gangen), så en ny runde koster ingenting på forhånd.
+class ShuffledDeck:
+    def __init__(self, items=(), rng=None, reshuffle_on_exhaust=True, avoid_immediate_repeat=True):
+        self.rng = rng or random.Random()
+        self.reshuffle_on_exhaust = reshuffle_on_exhaust
+        self.avoid_immediate_repeat = avoid_immediate_repeat
+        self._items = list(dict.fromkeys(items))  # Hvert kort bare én gang
+        self._positions = {item: i for i, item in enumerate(self._items)}
+        self._cursor = 0  # Kort før markøren er trukket i denne runden
+        self._settled = 0  # Kort før denne posisjonen har fast plass (brukes av peek)
+        self._last = None  # Sist trukne kort, så en ny runde ikke starter med det samme
+        self.rounds = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, item):
+        return item in self._positions
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def remaining(self):
+        """Antall kort igjen før stokken er tom (eller stokkes på nytt)."""
+        return len(self._items) - self._cursor
+
+    def draw(self):
+        """Trekker neste kort, eller None hvis stokken er tom og ikke skal stokkes på nytt."""
+        if not self._items:
+            return None
+        if self._cursor == len(self._items):
+            if not self.reshuffle_on_exhaust:
+                return None
+            self._cursor = 0
+            self._settled = 0
+            self.rounds += 1
+        self._settle(self._cursor + 1)
+        item = self._items[self._cursor]
+        self._cursor += 1
+        self._last = item
+        return item
+
+    def peek(self, count):
+        """De neste `count` kortene i den rekkefølgen draw() vil gi dem (innenfor denne runden)."""
+        end = min(len(self._items), self._cursor + count)
+        self._settle(end)
+        return self._items[self._cursor:end]
+
+    def _settle(self, end):
+        items = self._items
+        n = len(items)
+        while self._settled < end:
+            position = self._settled
+            j = self.rng.randrange(position, n)
+            if position == 0 and self.avoid_immediate_repeat and n > 1 and items[j] == self._last:
+                # Første kort i en ny runde skal ikke være det samme som sist: trekk blant de andre
+                other = self.rng.randrange(position, n - 1)
+                j = other + 1 if other >= j else other
+            self._swap(position, j)
+            self._settled += 1
+
+    def _swap(self, i, j):
+        if i != j:
+            items = self._items
+            items[i], items[j] = items[j], items[i]
+            self._positions[items[i]] = i
+            self._positions[items[j]] = j
+
+    def add(self, item):
+        """Legger til et kort et tilfeldig sted blant de som ikke er trukket ennå."""
+        if item in self._positions:
+            return
+        last = len(self._items)
+        self._positions[item] = last
+        self._items.append(item)
+        # Bakerst er kortet med i stokkingen av resten, men ikke blant dem peek() allerede har lagt fast.
+        # Som et Fisher-Yates-steg: trekk en plass blant alle utrukne, og bytt hvis den er en av de faste.
+        j = self.rng.randrange(self._cursor, last + 1)
+        if j < self._settled:
+            self._swap(j, last)
+
+    def remove(self, item):
+        position = self._positions.get(item)
+        if position is None:
+            return False
+        if position < self._cursor:
+            # Trukket kort: bytt det med det siste trukne og flytt markøren ett hakk tilbake,
+            # så det ligger først blant de utrukne og kan fjernes derfra
+            self._swap(position, self._cursor - 1)
+            self._cursor -= 1
+            position = self._cursor
+        last = len(self._items) - 1
+        self._swap(position, last)
+        self._items.pop()
+        del self._positions[item]
+        self._settled = max(self._cursor, min(self._settled, position))
+        return True
+
+    def snapshot(self):
+        """Tilstanden som en vanlig dict med bare lister og tall, så en økt kan lagres som JSON og fortsettes senere."""
+        version, internal, gauss = self.rng.getstate()
+        return {
+            "items": [list(item) if isinstance(item, tuple) else item for item in self._items],
+            "cursor": self._cursor,
+            "settled": self._settled,
+            "last": list(self._last) if isinstance(self._last, tuple) else self._last,
+            "rounds": self.rounds,
+            "rng_state": [version, list(internal), gauss],
+        }
+
+    def restore(self, snapshot):
+        # JSON gjør tupler om til lister; kortene må være tupler igjen for å kunne slås opp i _positions
+        self._items = [tuple(item) if isinstance(item, list) else item for item in snapshot["items"]]
+        self._positions = {item: i for i, item in enumerate(self._items)}
+        self._cursor = snapshot["cursor"]
+        self._settled = snapshot["settled"]
+        last = snapshot["last"]
+        self._last = tuple(last) if isinstance(last, list) else last
+        self.rounds = snapshot["rounds"]
+        version, internal, gauss = snapshot["rng_state"]
+        self.rng.setstate((version, tuple(internal), gauss))
+
+
+# SM-2-parametre. Intervallene er i sekunder; en ny eller glemt sign kommer tilbake samme økt.
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+FIRST_INTERVAL = 24 * 3600
+SECOND_INTERVAL = 6 * 24 * 3600
+LAPSE_INTERVAL = 60
+IN_FLIGHT_DELAY = 30  # Et tegn som vises nå skal ikke dukke opp igjen før det er besvart
+
+
+def answer_quality(correct, attempts=0, hint_used=False, almost=False):
+    """Karakter 0-5 som i SM-2: riktig på første forsøk uten hint er 5, hoppet over er 1."""
+    if not correct:
+        return 1
+    if hint_used or attempts > 0 or almost:
+        return 3
+    return 5
+
+
+# Repetisjonstilstand for ett tegn (intervall, letthet, forfallstid)
+class ReviewCard:
+    __slots__ = ("interval", "ease", "due", "reps", "lapses")
+
+    def __init__(self, interval=0, ease=DEFAULT_EASE, due=0.0, reps=0, lapses=0):
+        self.interval = interval
+        self.ease = ease
+        self.due = due
+        self.reps = reps
+        self.lapses = lapses
+
+    def review(self, quality, now):
+        if quality < 3:
+            self.reps = 0
+            self.lapses += 1
+            self.interval = LAPSE_INTERVAL
+        else:
+            self.reps += 1
+            if self.reps == 1:
+                self.interval = FIRST_INTERVAL
+            elif self.reps == 2:
+                self.interval = SECOND_INTERVAL
+            else:
+                self.interval = round(self.interval * self.ease)
+        self.ease = max(MIN_EASE, self.ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+        self.due = now + self.interval
+
+    def to_list(self):
+        return [self.interval, round(self.ease, 4), self.due, self.reps, self.lapses]
+
+    @classmethod
+    def from_list(cls, values):
+        return cls(*values)
+
+
+# Repetisjonstilstanden for alle tegnene til én spiller, lagret som en logg der hver
+# besvarelse legger til én linje. Loggen komprimeres når den blir mye lengre enn antall tegn.
+# Uten log_path holdes alt i minnet (brukes når en innspilt økt spilles av).
+class ReviewStore:
+    def __init__(self, log_path, clock=time.time, writer=None):
+        self.log_path = log_path
+        self.clock = clock
+        self.writer = writer  # BackgroundWriter fra persistence, ellers skrives det direkte på denne tråden
+        self.cards = {}  # tegn-ID -> ReviewCard
+        self._log_lines = 0
+        self.load()
+
+    def load(self):
+        self.cards = {}
+        self._log_lines = 0
+        if self.log_path is None or not os.path.exists(self.log_path):
+            return
+        try:
+            with open(self.log_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        sign_id, values = json.loads(line)
+                    except (ValueError, TypeError):
+                        continue  # En avbrutt siste linje hoppes over
+                    self.cards[sign_id] = ReviewCard.from_list(values)
+                    self._log_lines += 1
+        except OSError as e:
+            logging.error(f"Kunne ikke lese repetisjonsloggen {self.log_path}: {e}")
+
+    def card(self, sign_id):
+        return self.cards.get(sign_id)
+
+    def record(self, sign_id, quality, now=None):
+        card = self.cards.get(sign_id)
+        if card is None:
+            card = self.cards[sign_id] = ReviewCard()
+        card.review(quality, self.clock() if now is None else now)
+        self._append(sign_id, card)
+        return card
+
+    def _append(self, sign_id, card):
+        if self.log_path is None:
+            return
+        try:
+            self._write(json.dumps([sign_id, card.to_list()]) + "\n", append=True)
+            self._log_lines += 1
+        except OSError as e:
+            logging.error(f"Kunne ikke lagre repetisjon for {sign_id}: {e}")
+            return
+        if self._log_lines > 4 * len(self.cards) + 100:
+            self.compact()
+
+    def compact(self):
+        try:
+            self._write("".join(json.dumps([sign_id, card.to_list()]) + "\n" for sign_id, card in self.cards.items()))
+            self._log_lines = len(self.cards)
+        except OSError as e:
+            logging.error(f"Kunne ikke komprimere repetisjonsloggen {self.log_path}: {e}")
+
+    def _write(self, text, append=False):
+        if self.writer is not None:
+            self.writer.submit(self.log_path, text, append)
+        elif append:
+            append_text(self.log_path, text)
+        else:
+            write_atomic(self.log_path, text)
+
+    def queue(self, entries, sign_id_for, rng=None):
+        return ReviewQueue(self, entries, sign_id_for, rng)
+
+
+# Prioritetskø over bildene i en quiz, sortert på forfallstid. Har samme grensesnitt som
+# ShuffledDeck (draw/peek/add/remove), så den kan brukes som image_pool.
+class ReviewQueue:
+    def __init__(self, store, entries, sign_id_for, rng=None):
+        self.store = store
+        self.sign_id_for = sign_id_for  # oppføring i image_pool -> tegn-ID (innholds-ID)
+        self.rng = rng or random.Random()
+        self.clock = store.clock  # Kan byttes per økt, f.eks. mot tidspunktene i et øktopptak
+        self._due = {}  # oppføring -> gjeldende forfallstid i køen
+        self._entries_by_sign = {}  # tegn-ID -> oppføringer (samme tegn kan ligge i flere kategorier)
+        # oppføring -> tegn-ID slik den var da oppføringen kom inn. Et tegn som er slettet fra Kategorier,
+        # finnes ikke lenger i manifestet, så sign_id_for kan ikke spørres når det fjernes eller besvares.
+        # Beholdes etter remove(), så svaret på et tegn som ble slettet mens det ble vist, kan registreres
+        self._sign_ids = {}
+        self._heap = []
+        for entry in dict.fromkeys(entries):
+            self._track(entry)
+            self._due[entry] = self._initial_due(entry)
+        # Tilfeldig rekkefølge blant tegn med samme forfallstid (f.eks. alle nye)
+        self._heap = [(due, self.rng.random(), entry) for entry, due in self._due.items()]
+        heapq.heapify(self._heap)
+
+    def _track(self, entry):
+        sign_id = self._sign_ids[entry] = self.sign_id_for(entry)
+        self._entries_by_sign.setdefault(sign_id, []).append(entry)
+
+    def _initial_due(self, entry):
+        card = self.store.card(self._sign_ids[entry])
+        return card.due if card is not None else 0.0
+
+    def _push(self, entry, due):
+        self._due[entry] = due
+        heapq.heappush(self._heap, (due, self.rng.random(), entry))
+        if len(self._heap) > 4 * len(self._due) + 64:
+            # For mange utdaterte oppføringer: bygg heapen på nytt fra gjeldende forfallstider
+            self._heap = [item for item in self._heap if self._due.get(item[2]) == item[0]]
+            heapq.heapify(self._heap)
+
+    def _pop_stale(self):
+        # Utdaterte heap-oppføringer (endret eller fjernet) ryddes bort lat
+        heap = self._heap
+        while heap and self._due.get(heap[0][2]) != heap[0][0]:
+            heapq.heappop(heap)
+
+    def __len__(self):
+        return len(self._due)
+
+    def __contains__(self, entry):
+        return entry in self._due
+
+    def __iter__(self):
+        return iter(self._due)
+
+    def draw(self):
+        """Tegnet med tidligst forfallstid. Er ingenting forfalt, tas det som forfaller først."""
+        self._pop_stale()
+        if not self._heap:
+            return None
+        _, _, entry = heapq.heappop(self._heap)
+        # Legges tilbake litt frem i tid til svaret er registrert med record()
+        self._push(entry, self.clock() + IN_FLIGHT_DELAY)
+        return entry
+
+    def peek(self, count):
+        """De neste `count` oppføringene i prioritert rekkefølge, uten å gå gjennom hele køen."""
+        heap = self._heap
+        result = []
+        frontier = [(heap[0], 0)] if heap else []
+        while frontier and len(result) < count:
+            (due, _, entry), index = heapq.heappop(frontier)
+            if self._due.get(entry) == due:
+                result.append(entry)
+            for child in (2 * index + 1, 2 * index + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child], child))
+        return result
+
+    def record(self, entry, quality):
+        """Registrerer svaret og flytter alle oppføringer for samme tegn til ny forfallstid."""
+        sign_id = self._sign_ids[entry]
+        card = self.store.record(sign_id, quality, self.clock())
+        for same_sign in self._entries_by_sign.get(sign_id, ()):
+            self._push(same_sign, card.due)
+        return card
+
+    def add(self, entry):
+        if entry in self._due:
+            return
+        self._track(entry)
+        self._push(entry, self._initial_due(entry))
+
+    def remove(self, entry):
+        if entry not in self._due:
+            return False
+        del self._due[entry]
+        self._entries_by_sign[self._sign_ids[entry]].remove(entry)
+        return True
+
+
+# Spillregler. Vanskelighetsgraden styres av rekken med riktige svar på rad.
+SCORE_INCREMENTS = {"easy": 1, "medium": 2, "hard": 3}
+NO_ANSWER = "Ingen svar funnet"
+
+
+def difficulty_for_streak(streak):
+    if streak > 5:
+        return "hard"
+    if streak > 2:
+        return "medium"
+    return "easy"
+
+
+def split_entry(entry, category):
+    """(bilde, kategori) for en oppføring i image_pool: et filnavn i `category`, eller et (filnavn, kategori)-par."""
+    if isinstance(entry, tuple):
+        return entry
+    return entry, category
+
+
+# Poeng og statistikk for én spiller, på tvers av quizøkter
+class PlayerProgress:
+    def __init__(self, score=0, streak=0, high_score=0, category_stats=None):
+        self.score = score
+        self.streak = streak
+        self.high_score = high_score
+        self.category_stats = category_stats if category_stats is not None else {}
+        self.difficulty = "easy"  # Lagres ikke; starter på nytt hver gang spillet åpnes
+
+    def to_dict(self):
+        return {
+            "category_stats": self.category_stats,
+            "score": self.score,
+            "streak": self.streak,
+            "high_score": self.high_score
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get("score", 0), data.get("streak", 0), data.get("high_score", 0),
+                   data.get("category_stats", {}))
+
+    def reset(self, categories=()):
+        self.score = 0
+        self.streak = 0
+        self.high_score = 0
+        self.category_stats = {category: 0 for category in categories}
+
+
+PROGRESS_COMPACT_EVERY = 1000  # Journallinjer før de foldes inn i et nytt øyeblikksbilde
+
+
+# Progresjonen til én spiller: et øyeblikksbilde (players/<navn>.json) pluss en journal der hvert
+# svar legger til én kort linje med de nye verdiene. Å lagre et svar koster like mye uansett hvor
+# mye historikk spilleren har; journalen foldes inn i et nytt øyeblikksbilde med jevne mellomrom.
+# Øyeblikksbildet og journalen har et generasjonsnummer, så en journal som allerede er foldet inn
+# (krasj mellom de to skrivingene) ikke spilles av på nytt.
+class ProgressJournal:
+    def __init__(self, snapshot_path, journal_path, compact_every=PROGRESS_COMPACT_EVERY, writer=None):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.compact_every = compact_every
+        self.writer = writer  # BackgroundWriter fra persistence, ellers skrives det direkte på denne tråden
+        self.generation = 0
+        self._journal_lines = 0
+        self._journal_started = False  # Journalen på disk har overskriften for denne generasjonen
+
+    def load(self):
+        """Øyeblikksbildet med journalen spilt av oppå. Et ødelagt øyeblikksbilde gir json.JSONDecodeError."""
+        data = {}
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        progress = PlayerProgress.from_dict(data)
+        self.generation = data.get("generation", 0)
+        events = self._read_journal()
+        self._journal_started = events is not None
+        events = events or []
+        for event in events:
+            progress.score, progress.streak, progress.high_score = event[0], event[1], event[2]
+            if len(event) > 3:
+                progress.category_stats[event[3]] = event[4]
+        self._journal_lines = len(events)
+        return progress
+
+    def _read_journal(self):
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                header = f.readline()
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return None
+        try:
+            if json.loads(header).get("generation") != self.generation:
+                return None  # Allerede med i øyeblikksbildet
+        except (ValueError, AttributeError):
+            return None
+        try:
+            return json.loads("[" + ",".join(lines) + "]")  # Hele journalen i én parsing
+        except ValueError:
+            events = []
+            for line in lines:
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    continue  # En avbrutt siste linje hoppes over
+            return events
+
+    def append(self, progress, category=None):
+        """Lagrer poeng, rekke og rekord (og tellingen for kategorien) etter et svar. O(1)."""
+        if self._journal_lines >= self.compact_every:
+            self.snapshot(progress)
+            return
+        event = [progress.score, progress.streak, progress.high_score]
+        if category is not None:
+            event += [category, progress.category_stats.get(category, 0)]
+        line = json.dumps(event, ensure_ascii=False) + "\n"
+        try:
+            if self._journal_started:
+                self._write(self.journal_path, line, append=True)
+            else:
+                # En utdatert journal fra en avbrutt komprimering erstattes, ellers ville svarene bli ignorert
+                self._write(self.journal_path, json.dumps({"generation": self.generation}) + "\n" + line)
+                self._journal_started = True
+            self._journal_lines += 1
+        except OSError as e:
+            logging.error(f"Kunne ikke lagre progresjonen i {self.journal_path}: {e}")
+
+    def snapshot(self, progress):
+        """Skriver hele progresjonen atomisk og starter en tom journal. Kaster OSError ved feil.
+        Øyeblikksbildet skrives alltid før journalen, også gjennom skrivetråden."""
+        data = progress.to_dict()
+        data["generation"] = self.generation + 1
+        self._write(self.snapshot_path, json.dumps(data))
+        self.generation += 1
+        self._write(self.journal_path, json.dumps({"generation": self.generation}) + "\n")
+        self._journal_started = True
+        self._journal_lines = 0
+
+    def _write(self, path, text, append=False):
+        if self.writer is not None:
+            self.writer.submit(path, text, append)
+        elif append:
+            append_text(path, text)
+        else:
+            write_atomic(path, text)
+
+
+# Felles for quiz og flerspiller: bildepool, fasit og hendelser. Ingen Tk, så økter kan
+# simuleres tusenvis av ganger i sekundet og brukes fra både Tk-klienten og tester.
+class _Session:
+    def __init__(self, pool, answers, category=None, answer_index=None, sign_id_for=None):
+        self.pool = pool  # ShuffledDeck eller ReviewQueue
+        self.answers = answers  # filnavn -> riktig svar
+        self.category = category
+        self.answer_index = answer_index  # Vokabularet, så et annet gyldig svar ikke regnes som skrivefeil
+        self.sign_id_for = sign_id_for  # oppføring -> tegn-ID, for å godta aliasene i answer_index
+        self._completions = None  # PrefixIndex over svarene i poolen, bygges ved første oppslag
+        self._hints = None  # HintIndex over svarene i poolen, bygges ved første hint
+        self.current_entry = None
+        self.current_sign_id = None
+        self.current_image = None
+        self.current_category = None
+        self.correct_answer = ""
+        self.finished = False
+        self._listeners = {}
+
+    def on(self, event, callback):
+        """Kaller `callback(**data)` hver gang `event` skjer: question, answered, hint, turn eller finished.
+        `action` kommer før hvert kall fra spilleren eller spillet (submit, skip, hint, peek, add, remove)
+        med argumentene, så økten kan tas opp og spilles av igjen."""
+        self._listeners.setdefault(event, []).append(callback)
+
+    def emit(self, event, **data):
+        for callback in self._listeners.get(event, ()):
+            callback(**data)
+
+    def start(self):
+        return self.next_question()
+
+    def next_question(self):
+        """Trekker neste tegn, eller avslutter økten når poolen er tom."""
+        if not self.pool:
+            self.finished = True
+            self.emit("finished")
+            return None
+        self.current_entry = self.pool.draw()
+        self.current_image, self.current_category = split_entry(self.current_entry, self.category)
+        self.correct_answer = self.answers.get(self.current_image, NO_ANSWER)
+        self.current_sign_id = self.sign_id_for(self.current_entry) if self.sign_id_for is not None else None
+        self.new_question()
+        self.emit("question", entry=self.current_entry)
+        return self.current_entry
+
+    def new_question(self):
+        pass
+
+    def peek(self, count):
+        """De neste tegnene i poolen, til forhåndslasting. Går gjennom økten (og tas opp), siden
+        en kikk stokker lenger frem i kortstokken og dermed påvirker hva som trekkes senere."""
+        self.emit("action", action="peek", args=(count,))
+        return self.pool.peek(count)
+
+    def classify(self, user_input, tolerance=0):
+        """CORRECT, ALMOST eller WRONG. Store/små bokstaver, Unicode-form og mellomrom teller ikke."""
+        return classify_answer(user_input, self.correct_answer, tolerance, self.answer_index, self.current_sign_id)[0]
+
+    def suggest(self, prefix, limit=5):
+        """Svar i poolen som starter med prefix, til forslag mens spilleren skriver."""
+        if self._completions is None:
+            self._completions = PrefixIndex(self.answers.values())
+        return self._completions.complete(prefix, limit)
+
+    def add(self, entry, answer):
+        """Tar med et tegn som er lagt til mens økten pågår."""
+        self.emit("action", action="add", args=(entry, answer))
+        self.pool.add(entry)
+        self.answers[split_entry(entry, self.category)[0]] = answer
+        self._completions = None
+        self._hints = None
+
+    def remove(self, entry):
+        self.emit("action", action="remove", args=(entry,))
+        return self.pool.remove(entry)
+
+
+class QuizSession(_Session):
+    def __init__(self, pool, answers, progress, category=None, answer_index=None, sign_id_for=None,
+                 typo_tolerance=None, choice_count=None, distractors=None, rng=None):
+        super().__init__(pool, answers, category, answer_index, sign_id_for)
+        self.progress = progress
+        self.typo_tolerance = typo_tolerance if typo_tolerance is not None else TYPO_TOLERANCE
+        # Flervalg: antall alternativer per spørsmål (None for fritekst) og DistractorTable å hente dem fra
+        self.choice_count = choice_count
+        self.distractors = distractors
+        self.rng = rng or random.Random()
+        self.choices = []
+        self.total_questions = len(pool)
+        self.answered_questions = 0
+        self.attempts = 0  # Feil svar på tegnet som vises nå
+        self.hint_used = False
+        self.almost = False  # Godtatt med skrivefeil
+
+    def start(self):
+        self.progress.streak = 0
+        return super().start()
+
+    def new_question(self):
+        self.attempts = 0
+        self.hint_used = False
+        self.almost = False
+        if self.choice_count:
+            self.choices = self.make_choices()
+
+    def make_choices(self):
+        """Riktig svar pluss de mest lignende distraktorene, i tilfeldig rekkefølge."""
+        wanted = self.choice_count - 1
+        exclude = {normalize_answer(self.correct_answer)}
+        if self.answer_index is not None and self.current_sign_id is not None:
+            exclude |= self.answer_index.forms_by_sign.get(self.current_sign_id, set())
+        options = []
+        if self.distractors is not None and self.current_sign_id is not None:
+            options = self.distractors.options(self.current_sign_id, wanted, exclude)
+        if len(options) < wanted:
+            # Tegn som er lagt til etter at tabellen ble bygget: fyll på med andre svar fra poolen
+            exclude |= {normalize_answer(option) for option in options}
+            others = sorted({answer for answer in self.answers.values() if normalize_answer(answer) not in exclude})
+            options += self.rng.sample(others, min(len(others), wanted - len(options)))
+        choices = [self.correct_answer] + options
+        self.rng.shuffle(choices)
+        return choices
+
+    def submit(self, user_input):
+        """Sjekker et svar. Riktig svar gir poeng og går videre; feil nullstiller poeng og rekke.
+        En liten skrivefeil (innenfor toleransen for vanskelighetsgraden) godtas som nesten riktig."""
+        self.emit("action", action="submit", args=(user_input,))
+        progress = self.progress
+        self.answered_questions += 1
+        verdict = self.classify(user_input, self.typo_tolerance.get(progress.difficulty, 0))
+        correct = verdict != WRONG
+        self.almost = verdict == ALMOST
+        if correct:
+            progress.score += self.get_score_increment()
+            progress.streak += 1
+            progress.category_stats[self.current_category] = progress.category_stats.get(self.current_category, 0) + 1
+            progress.high_score = max(progress.high_score, progress.score)
+            self.record_review(True)
+        else:
+            progress.streak = 0
+            progress.high_score = max(progress.high_score, progress.score)
+            progress.score = 0
+            self.attempts += 1
+        self.emit("answered", correct=correct, almost=self.almost)
+        if correct:
+            self.adjust_difficulty()
+            self.next_question()
+        return correct
+
+    def skip(self):
+        self.emit("action", action="skip", args=())
+        self.record_review(False)
+        return self.next_question()
+
+    def hint(self):
+        self.emit("action", action="hint", args=())
+        if self._hints is None:
+            self._hints = hint_index_for(frozenset(self.answers.values()))
+        hint_text = self._hints.hint(self.correct_answer, self.progress.difficulty) + "..."
+        self.hint_used = True
+        self.emit("hint", text=hint_text)
+        return hint_text
+
+    def get_score_increment(self):
+        return SCORE_INCREMENTS[self.progress.difficulty]
+
+    def adjust_difficulty(self):
+        self.progress.difficulty = difficulty_for_streak(self.progress.streak)
+
+    def record_review(self, correct):
+        if isinstance(self.pool, ReviewQueue) and self.current_entry in self.pool:
+            self.pool.record(self.current_entry, answer_quality(correct, self.attempts, self.hint_used, self.almost))
+
+    def add(self, entry, answer):
+        super().add(entry, answer)
+        self.total_questions = len(self.pool)
+
+    def remove(self, entry):
+        removed = super().remove(entry)
+        self.total_questions = len(self.pool)
+        return removed
+
+
+# Spillerne svarer annenhver gang på hvert sitt tegn
+class MultiplayerSession(_Session):
+    def __init__(self, pool, answers, category=None, answer_index=None, sign_id_for=None, players=2):
+        super().__init__(pool, answers, category, answer_index, sign_id_for)
+        self.scores = [0] * players
+        self.current_player = 0
+
+    def submit(self, user_input):
+        self.emit("action", action="submit", args=(user_input,))
+        correct = self.classify(user_input) != WRONG
+        player = self.current_player
+        if correct:
+            self.scores[player] += 1
+        self.emit("answered", player=player, correct=correct)
+        self.current_player = (player + 1) % len(self.scores)
+        self.emit("turn", player=self.current_player)
+        self.next_question()
+        return correct
+
+    def winner(self):
+        """Spilleren med flest poeng; ved likt vinner den siste av dem."""
+        return max(range(len(self.scores)), key=lambda player: (self.scores[player], player))
@@ -0,0 +1,325 @@
+"""Opptak og avspilling av quizøkter i ASK123.
+
+Hver økt har sitt eget frø. Et opptak er én JSON-linje med frøet, hendelsene (svar, hint,
+hopp over, forhåndslasting, tegn lagt til eller fjernet) med tidspunkt og tegnene som ble vist, og kan
+spilles av igjen uten vindu mot spillmotoren med nøyaktig samme rekkefølge på tegnene.
+Det som går igjen fra økt til økt (poolen med fasit og vokabularet) skrives bare én gang
+per fil, nøklet på en hash. Hashene som står i filen, holdes i en liten indeksfil ved siden
+av (<opptaksfil>.shared), så et nytt opptak ikke må lese hele filen.
+
+Avspilling av en samling opptak fungerer også som ytelsestest:
+    python session_replay.py players/Ola.sessions.jsonl [--repeat 10] [--json]
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import time
+
+from answer_index import AnswerIndex
+from distractors import DistractorTable
+from persistence import write_atomic
+from quiz_engine import (MultiplayerSession, PlayerProgress, QuizSession, ReviewCard, ReviewQueue, ReviewStore,
+                         ShuffledDeck, seeded_rng)
+
+REPLAY_VERSION = 1
+SHARED_INDEX_SUFFIX = ".shared"  # Indeksfilen med hashene til de delte dataene i en opptaksfil
+
+
+def _entry(value):
+    # JSON har ingen tupler: (filnavn, kategori)-oppføringer kommer tilbake som lister
+    return tuple(value) if isinstance(value, list) else value
+
+
+def _digest(data):
+    return hashlib.sha1(json.dumps(data, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+# Lytter på hendelsene til en økt og bygger opptaket. Må lages før session.start().
+class SessionRecorder:
+    def __init__(self, session, seed, clock=time.time):
+        self.session = session
+        self.clock = clock
+        self.started = round(clock(), 3)
+        self.now = self.started
+        pool = session.pool
+        entries = list(pool)
+        self._positions = {entry: i for i, entry in enumerate(entries)}
+        self._sign_id_for = session.sign_id_for or getattr(pool, "sign_id_for", None)
+        signs = [self._sign_id_for(entry) for entry in entries] if self._sign_id_for is not None else None
+        self.record = {
+            "version": REPLAY_VERSION,
+            "kind": "multiplayer" if isinstance(session, MultiplayerSession) else "quiz",
+            "seed": seed,
+            "category": session.category,
+            "started": self.started,
+            "events": [],  # [ms siden start, handling, argumenter..., (1/0 for riktig svar)]
+            "drawn": [],  # Posisjonen i poolen til tegnene som ble vist, for å oppdage avvik
+        }
+        # Delt mellom økter og lagret én gang per fil: poolen med fasit, og vokabularet
+        pool_data = {"pool": "review" if isinstance(pool, ReviewQueue) else "deck",
+                     "entries": entries, "answers": dict(session.answers), "signs": signs}
+        self.shared = {"pool_data": pool_data, "vocabulary": None}
+        if session.answer_index is not None:
+            self.shared["vocabulary"] = [list(pair) for pair in session.answer_index.pairs()]
+        unique_signs = sorted(set(signs or ()))
+        if isinstance(pool, ReviewQueue):
+            self.record["cards"] = {sign_id: pool.store.card(sign_id).to_list()
+                                    for sign_id in unique_signs if pool.store.card(sign_id) is not None}
+            # Repetisjonskøen leser klokken fra opptaket, så avspillingen ser nøyaktig samme tider
+            pool.clock = lambda: self.now
+        if isinstance(session, MultiplayerSession):
+            self.record["players"] = len(session.scores)
+        else:
+            progress = session.progress
+            self.record["progress"] = {"score": progress.score, "streak": progress.streak,
+                                       "high_score": progress.high_score, "difficulty": progress.difficulty}
+            pool_data["choice_count"] = session.choice_count
+            if session.choice_count and session.distractors is not None:
+                # Bare distraktorene for tegnene i poolen, ikke hele tabellen
+                pool_data["distractors"] = {sign_id: session.distractors.distractors.get(sign_id, [])
+                                            for sign_id in unique_signs}
+        session.on("action", self.on_action)
+        session.on("question", self.on_question)
+        session.on("answered", self.on_answered)
+
+    def on_action(self, action, args):
+        elapsed_ms = round((self.clock() - self.started) * 1000)
+        self.now = self.started + elapsed_ms / 1000
+        event = [elapsed_ms, action, *args]
+        if action == "add":
+            entry = args[0]
+            self._positions.setdefault(entry, len(self._positions))
+            sign_id = self._sign_id_for(entry) if self._sign_id_for is not None else None
+            # Repetisjonstilstanden tegnet har når det legges til, hvis køen ikke kjenner det fra før
+            pool = self.session.pool
+            card = pool.store.card(sign_id) if isinstance(pool, ReviewQueue) and sign_id is not None else None
+            event += [sign_id, card.to_list() if card is not None else None]
+        self.record["events"].append(event)
+
+    def on_question(self, entry):
+        self.record["drawn"].append(self._positions.get(entry))
+
+    def on_answered(self, correct, **_):
+        self.record["events"][-1].append(int(correct))
+
+
+# Opptak som JSON-linjer, én økt per linje. Delte data står på egne linjer,
+# {"shared": hash, "data": ...}, før den første økten som viser til dem.
+class SessionLog:
+    def __init__(self, path):
+        self.path = path
+        self.index_path = path + SHARED_INDEX_SUFFIX
+        self._shared = None  # Hashene som allerede står i filen, leses fra indeksfilen ved første append
+
+    def append(self, recorder):
+        if self._shared is None:
+            self._shared = self._load_shared()
+        record = dict(recorder.record)
+        lines, new_digests = [], []
+        for name, data in recorder.shared.items():
+            if data is None:
+                continue
+            digest = _digest(data)
+            record[name] = digest
+            if digest not in self._shared and digest not in new_digests:
+                lines.append({"shared": digest, "data": data})
+                new_digests.append(digest)
+        lines.append(record)
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                for line in lines:
+                    f.write(json.dumps(line, ensure_ascii=False, separators=(",", ":")) + "\n")
+        except OSError as e:
+            logging.error(f"Kunne ikke lagre øktopptaket {self.path}: {e}")
+            return
+        self._shared.update(new_digests)
+        if new_digests:
+            # Etter opptaksfilen: en krasj imellom gir bare en ekstra kopi av de delte dataene neste gang
+            try:
+                with open(self.index_path, "a", encoding="ascii") as f:
+                    f.write("".join(digest + "\n" for digest in new_digests))
+            except OSError as e:
+                logging.error(f"Kunne ikke oppdatere indeksen {self.index_path}: {e}")
+
+    def _load_shared(self):
+        if not os.path.exists(self.path):
+            return set()  # En indeks uten opptaksfil (f.eks. slettet for hånd) gjelder ikke
+        try:
+            with open(self.index_path, "r", encoding="ascii") as f:
+                return set(f.read().split())
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logging.warning(f"Kunne ikke lese indeksen {self.index_path}, bygger den på nytt: {e}")
+        # Opptaksfil fra før indeksen fantes: leses én gang, og indeksen lagres
+        shared = {line["shared"] for line in self._lines() if "shared" in line}
+        try:
+            write_atomic(self.index_path, "".join(digest + "\n" for digest in sorted(shared)))
+        except OSError as e:
+            logging.error(f"Kunne ikke lagre indeksen {self.index_path}: {e}")
+        return shared
+
+    def _lines(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue  # En avbrutt siste linje hoppes over
+
+    def read(self):
+        """(opptak, vokabular som (svar, tegn-ID)-par eller None) for hver økt i filen.
+        Poolen er flettet inn i opptaket; vokabularet er det samme objektet for like hasher."""
+        shared = {}
+        for line in self._lines():
+            if "shared" in line:
+                shared[line["shared"]] = line["data"]
+            elif line.get("version") == REPLAY_VERSION and line.get("pool_data") in shared:
+                record = dict(line)
+                record.update(shared[line["pool_data"]])
+                vocabulary = shared.get(line.get("vocabulary"))
+                if vocabulary is not None and vocabulary and not isinstance(vocabulary[0], tuple):
+                    vocabulary[:] = [tuple(pair) for pair in vocabulary]
+                yield record, vocabulary
+
+
+def replay_session(record, answer_index=None, timer=time.perf_counter):
+    """Spiller av ett opptak mot spillmotoren så fort som mulig. Gir en dict med antall
+    handlinger, tiden hver handling tok (sekunder) og første avvik fra opptaket, om noe."""
+    seed = record["seed"]
+    entries = [_entry(entry) for entry in record["entries"]]
+    positions = {entry: i for i, entry in enumerate(entries)}
+    sign_ids = dict(zip(entries, record["signs"])) if record.get("signs") is not None else None
+    sign_id_for = sign_ids.__getitem__ if sign_ids is not None else None
+    now = [record["started"]]
+    if record["pool"] == "review":
+        store = ReviewStore(None, clock=lambda: now[0])
+        store.cards = {sign_id: ReviewCard.from_list(values) for sign_id, values in record.get("cards", {}).items()}
+        pool = store.queue(entries, sign_id_for, seeded_rng(seed, "pool"))
+    else:
+        pool = ShuffledDeck(entries, rng=seeded_rng(seed, "pool"))
+    answers = dict(record["answers"])
+    if record["kind"] == "multiplayer":
+        session = MultiplayerSession(pool, answers, record["category"], answer_index, sign_id_for,
+                                     players=record["players"])
+    else:
+        saved = record["progress"]
+        progress = PlayerProgress(saved["score"], saved["streak"], saved["high_score"])
+        progress.difficulty = saved["difficulty"]
+        distractors = DistractorTable(None, record["distractors"]) if record.get("distractors") is not None else None
+        session = QuizSession(pool, answers, progress, record["category"], answer_index, sign_id_for,
+                              choice_count=record.get("choice_count"), distractors=distractors,
+                              rng=seeded_rng(seed, "choices"))
+
+    drawn = []
+    verdicts = []
+    session.on("question", lambda entry: drawn.append(positions.get(entry)))
+    session.on("answered", lambda correct, **_: verdicts.append(int(correct)))
+    latencies = []
+    start = timer()
+    session.start()
+    latencies.append(timer() - start)
+    expected_verdicts = []
+    for event in record["events"]:
+        now[0] = record["started"] + event[0] / 1000
+        action = event[1]
+        start = timer()
+        if action == "submit":
+            session.submit(event[2])
+            if len(event) > 3:
+                expected_verdicts.append(event[3])
+        elif action == "skip":
+            session.skip()
+        elif action == "hint":
+            session.hint()
+        elif action == "peek":
+            session.peek(event[2])
+        elif action == "add":
+            entry, sign_id, card = _entry(event[2]), event[4], event[5]
+            positions.setdefault(entry, len(positions))
+            if sign_ids is not None:
+                sign_ids[entry] = sign_id
+            if record["pool"] == "review" and card is not None:
+                pool.store.cards.setdefault(sign_id, ReviewCard.from_list(card))
+            session.add(entry, event[3])
+        elif action == "remove":
+            session.remove(_entry(event[2]))
+        latencies.append(timer() - start)
+
+    diverged = None
+    if drawn != record["drawn"]:
+        position = next((i for i, (a, b) in enumerate(zip(drawn, record["drawn"])) if a != b),
+                        min(len(drawn), len(record["drawn"])))
+        diverged = f"tegn {position}"
+    elif verdicts != expected_verdicts:
+        diverged = f"svar {next(i for i, (a, b) in enumerate(zip(verdicts, expected_verdicts)) if a != b)}"
+    return {"actions": len(latencies), "latencies": latencies, "diverged": diverged}
+
+
+def percentile(ordered, p):
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))] if ordered else 0.0
+
+
+def replay_corpus(records, repeat=1):
+    """Spiller av alle opptakene `repeat` ganger og rapporterer gjennomstrømning og latenser.
+    `records` er en liste med (opptak, vokabular)-par som fra SessionLog.read()."""
+    indexes = {}  # Vokabularhash -> AnswerIndex, så hvert vokabular bare bygges én gang
+    latencies = []
+    sessions = 0
+    diverged = []
+    total = 0.0
+    for _ in range(repeat):
+        for record, vocabulary in records:
+            answer_index = None
+            if vocabulary is not None:
+                answer_index = indexes.get(record["vocabulary"])
+                if answer_index is None:
+                    answer_index = indexes[record["vocabulary"]] = AnswerIndex(vocabulary)
+            start = time.perf_counter()
+            result = replay_session(record, answer_index)
+            total += time.perf_counter() - start
+            sessions += 1
+            latencies.extend(result["latencies"])
+            if result["diverged"] is not None and len(diverged) < 10:
+                diverged.append({"started": record["started"], "seed": record["seed"], "at": result["diverged"]})
+    latencies.sort()
+    return {
+        "sessions": sessions,
+        "actions": len(latencies),
+        "seconds": round(total, 3),
+        "sessions_per_s": round(sessions / total, 1) if total > 0 else None,
+        "actions_per_s": round(len(latencies) / total, 1) if total > 0 else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 4),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 4),
+        "max_ms": round(latencies[-1] * 1000, 4) if latencies else 0.0,
+        "diverged": diverged,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Spiller av innspilte ASK123-økter uten vindu og måler hastigheten.")
+    parser.add_argument("logs", nargs="+", help="Opptaksfiler (*.sessions.jsonl)")
+    parser.add_argument("--repeat", type=int, default=1, help="Spill av hele samlingen så mange ganger")
+    parser.add_argument("--json", action="store_true", help="Skriv rapporten som JSON")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    records = [item for path in args.logs for item in SessionLog(path).read()]
+    report = replay_corpus(records, args.repeat)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{report['sessions']} økter, {report['actions']} handlinger på {report['seconds']:.3f} s "
+          f"({report['sessions_per_s']} økter/s, {report['actions_per_s']} handlinger/s)")
+    print(f"  per handling: p50 {report['p50_ms']} ms, p99 {report['p99_ms']} ms, maks {report['max_ms']} ms")
+    for divergence in report["diverged"]:
+        print(f"  avvik i økten med frø {divergence['seed']} ({divergence['started']}): {divergence['at']}")
+
+
+if __name__ == "__main__":
+    main()
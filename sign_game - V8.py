@@ -1,11 +1,22 @@
 import tkinter as tk
 from tkinter import messagebox, ttk
-import random
 import os
 import sys
-import json
-from PIL import Image, ImageTk
+import sqlite3
+import time
+from PIL import ImageTk
 import logging
+from assets import AssetStore, AssetWatcher
+from image_pipeline import ImageCache, ImagePrefetcher, ThumbnailDiskCache, QUIZ_SIZE, THUMBNAIL_SIZE
+from pixel_atlas import open_atlas
+from answer_index import AnswerIndex
+from attempt_history import AttemptLog
+from distractors import open_distractors
+from persistence import FLUSH_TIMEOUT, SAVE_INTERVAL, BackgroundWriter
+from player_store import PLAYER_DB, AnswerWriter, PlayerStore, legacy_player_files, migrate_json_players
+from quiz_engine import (MultiplayerSession, PlayerProgress, QuizSession, ReviewStore, ShuffledDeck, new_seed,
+                         seeded_rng, split_entry)
+from session_replay import SHARED_INDEX_SUFFIX, SessionLog, SessionRecorder
 
 def resource_path(relative_path):
     try:
@@ -17,7 +28,8 @@ def resource_path(relative_path):
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 class SignGame:
-    def __init__(self, root, base_folder):
+    def __init__(self, root, base_folder, prefetch_depth=3, cache_budgets=None, spaced_repetition=True,
+                 autocomplete=False, record_sessions=True, durability="answer", save_interval=SAVE_INTERVAL):
         logging.info("Initialiserer SignGame...")
         self.root = root
         self.root.title("ASK123 - Tegn til tale spill")
@@ -25,34 +37,80 @@ class SignGame:
         self.root.configure(bg="#b0bec5")
 
         self.base_folder = base_folder
-        self.category_stats = {}
         self.total_images = {}
         self.current_category = None
+        self.categories = []
+        self.current_screen = None  # Hvilken skjerm som vises, så live-oppdateringer vet hva som må tegnes på nytt
 
-        self.score = 0
-        self.streak = 0
-        self.high_score = 0
-        self.total_questions = 0
-        self.answered_questions = 0
-        self.hint_used = False
+        # Poeng og statistikk for spilleren; selve spillogikken ligger i quiz_engine
+        self.progress = PlayerProgress()
+        self.session = None
 
         self.player_name = None
+        self.player_id = None
         self.players_dir = "players"
         os.makedirs(self.players_dir, exist_ok=True)
-
-        self.current_difficulty = "easy"
-
-        self.image_cache = {}  # Optimalisert bildehåndtering
-        self.images_used = set()  # Holder styr på brukte bilder
+        # Alle spillerne i én SQLite-database; gamle players/<navn>.json flyttes inn første gang
+        player_db = os.path.join(self.players_dir, PLAYER_DB)
+        self.player_store = PlayerStore(player_db)
+        migrate_json_players(self.player_store, self.players_dir)
+        # Svarene skrives til databasen i en egen tråd, så en treg disk ikke fryser vinduet
+        self.answer_writer = AnswerWriter(player_db, durability, save_interval)
+        # Repetisjonsloggene (players/<navn>.reviews.jsonl) skrives på samme måte, etter de samme reglene
+        self.review_writer = BackgroundWriter(durability, save_interval, name="review-writer")
+        # Hvert forsøk (tegn, svartid, riktig, hint, vanskelighetsgrad) lagres kolonnevis for analysene
+        try:
+            self.attempt_log = AttemptLog(self.players_dir)
+        except ValueError as e:
+            logging.error(f"Forsøkshistorikken kan ikke brukes: {e}")
+            self.attempt_log = None
+        self.question_started = None  # time.monotonic() da spørsmålet (eller forrige forsøk) ble vist
+
+        # Begrenset LRU-cache med eget minnebudsjett for miniatyrer og quizbilder
+        self.image_cache = ImageCache(cache_budgets)
+        # Like bilder i flere kategorier deler én innholds-ID, og caches per ID
+        self.assets = AssetStore(self.base_folder)
+        # Ferdig skalerte bilder lagres på disk, så varme oppstarter slipper å skalere på nytt
+        self.thumbnail_store = ThumbnailDiskCache(self.base_folder)
+        # Minnemappet atlas med ferdig dekodede piksler; bygges i bakgrunnen hvis det mangler
+        self.atlas = open_atlas(self.assets, on_rebuilt=self.use_atlas)
+        # Plukker opp tegn som legges til eller fjernes mens spillet kjører
+        self.asset_watcher = AssetWatcher(self.root, self.assets, on_change=self.apply_asset_changes)
+        self.asset_watcher.start()
+        # Ferdig valgte gale alternativer til flervalg; bygges i bakgrunnen hvis de mangler
+        self.distractors = open_distractors(self.assets, on_built=self.use_distractors)
+        # Dekoder og skalerer de neste quizbildene i bakgrunnen
+        self.prefetcher = ImagePrefetcher(self.root, on_ready=self.store_prefetched_image, loader=self.load_sign_image,
+                                          depth=prefetch_depth)
 
         self.button_bg_color = "#78909c"
         self.label_font = ("Helvetica", 14)
-        
-        self.max_attempts = 3  # Maximum number of incorrect attempts before a hint is given
-        self.attempts = 0  # Counter for incorrect attempts
 
-        self.correct_answer = ""  # Initialiser correct_answer for å unngå AttributeError
-        self.image_pool = []  # Initialiser image_pool for å unngå AttributeError
+        # Forslag under svarfeltet mens man skriver, for de yngste
+        self.autocomplete_var = tk.BooleanVar(value=autocomplete)
+        self.suggestion_count = 5
+        self.suggestion_delay_ms = 80  # Venter til en pause i skrivingen før forslagene oppdateres
+        self.suggestion_buttons = []
+        self.suggestion_job = None
+
+        # Flervalg: velg riktig ord blant noen få knapper i stedet for å skrive det
+        self.multiple_choice_var = tk.BooleanVar(value=False)
+        self.choice_count = 4
+        self.choice_buttons = []
+        self.chosen_button = None
+
+        self.image_pool = ShuffledDeck()  # Stokket kortstokk (eller repetisjonskø) med bildene i quizen
+        self.image_to_answer = {}
+        self.answer_index = AnswerIndex()  # Normaliserte svar, for skrivefeiltolerant retting
+        self.hint_frame = None
+        # Repeterer tegn spilleren sliter med oftere (SM-2), i stedet for ren tilfeldig rekkefølge
+        self.spaced_repetition = spaced_repetition
+        self.review_store = None
+        # Hver økt har sitt eget frø og tas opp, så den kan spilles av igjen med session_replay.py
+        self.record_sessions = record_sessions
+        self.session_seed = None
+        self.session_log = None
+        self.recorder = None
 
         self.show_welcome_screen()
 
@@ -60,6 +118,7 @@ class SignGame:
         """ Helper function to clear all widgets from the root window. """
         for widget in self.root.winfo_children():
             widget.destroy()
+        self.current_screen = None
 
     def show_welcome_screen(self):
         self.clear_window()
@@ -81,36 +140,52 @@ class SignGame:
                   font=self.label_font, bg=self.button_bg_color).pack(pady=20)
 
     def show_monthly_signs(self):
-        monthly_signs_folder = os.path.join(self.base_folder, 'manedens_tegn')
-        images = self.load_images_for_month(monthly_signs_folder)
+        monthly_category = 'manedens_tegn'
+        images = self.load_images_for_month(monthly_category)
 
         if images:
             tk.Label(self.root, text="Månedens Tegn", font=("Helvetica", 24, "bold"), bg="#b0bec5").pack(pady=10)
             images_frame = tk.Frame(self.root, bg="#b0bec5")
             images_frame.pack(pady=10)
 
-            for i, image_path in enumerate(images[:4]):  
-                if image_path not in self.image_cache:
-                    img = Image.open(image_path)
-                    img = img.resize((200, 200), Image.Resampling.LANCZOS)
-                    photo = ImageTk.PhotoImage(img)
-                    self.image_cache[image_path] = photo
+            for i, image in enumerate(images[:4]):  
+                content_id = self.assets.content_id(monthly_category, image)
+                photo = self.image_cache.get(content_id, THUMBNAIL_SIZE)
+                if photo is None:
+                    img = self.load_sign_image(content_id, THUMBNAIL_SIZE)
+                    photo = self.image_cache.put(content_id, THUMBNAIL_SIZE, ImageTk.PhotoImage(img))
 
-                label = tk.Label(images_frame, image=self.image_cache[image_path], bg="#b0bec5")
+                label = tk.Label(images_frame, image=photo, bg="#b0bec5")
+                label.image = photo
                 label.grid(row=0, column=i, padx=10, pady=10)
 
-    def load_images_for_month(self, folder_path):
+    def load_images_for_month(self, category):
         """Henter fire bilder fra en kategori eller fra flere kategorier"""
-        if os.path.exists(folder_path):
-            images = [os.path.join(folder_path, f) for f in os.listdir(folder_path) if f.lower().endswith(('.png', '.jpg', '.jpeg'))]
-            return images[:4]
-        return []
+        return self.assets.list_images(category)[:4]
+
+    def load_sign_image(self, content_id, size):
+        """Decodes and resizes one sign by content ID. Safe to call from the prefetch workers."""
+        atlas = self.atlas
+        if atlas is not None:
+            img = atlas.get(content_id, size)
+            if img is not None:
+                return img
+        image_path = self.assets.path_for_content(content_id)
+        return self.thumbnail_store.load(image_path, size, content_id=content_id)
+
+    def use_atlas(self, atlas):
+        # Kalles fra byggetråden når et nytt atlas er klart
+        self.atlas = atlas
+
+    def use_distractors(self, table):
+        # Kalles fra byggetråden; brukes fra neste quiz
+        self.distractors = table
 
     def load_player_menu(self):
         self.clear_window()
         tk.Label(self.root, text="Velkommen! Velg eller opprett en profil:", font=("Helvetica", 20, "bold"), bg="#b0bec5").pack(pady=20)
 
-        player_files = [f.replace(".json", "") for f in os.listdir(self.players_dir) if f.endswith(".json")]
+        player_files = self.player_store.player_names()
         if player_files:
             tk.Label(self.root, text="Eksisterende spillere:", font=("Helvetica", 14), bg="#b0bec5").pack(pady=10)
             for player in player_files:
@@ -129,12 +204,13 @@ class SignGame:
     def create_player(self):
         player_name = self.new_player_entry.get().strip()
         if player_name:
-            player_file = os.path.join(self.players_dir, f"{player_name}.json")
-            if os.path.exists(player_file):
+            if self.player_store.player_id(player_name) is not None:
                 messagebox.showerror("Feil", "Spilleren finnes allerede. Velg et annet navn.")
             else:
                 self.player_name = player_name
-                self.save_progress()
+                self.progress = PlayerProgress()
+                self.player_id = self.player_store.create_player(player_name, self.progress)
+                self.load_review_store()
                 self.load_categories()
                 self.load_category_stats()
                 self.show_start_menu()
@@ -144,107 +220,180 @@ class SignGame:
     def delete_player(self, player_name):
         try:
             response = messagebox.askyesno("Bekreftelse", f"Er du sikker på at du vil slette spilleren {player_name}?")
-            if response:
-                player_file = os.path.join(self.players_dir, f"{player_name}.json")
-                if os.path.exists(player_file):
-                    os.remove(player_file)
+            if response and self.save_answers():
+                player_id = self.player_store.player_id(player_name)
+                if self.player_store.delete_player(player_name):
+                    if self.attempt_log is not None:
+                        self.attempt_log.delete_player(player_id)
+                    session_file = self.get_session_file(player_name)
+                    for player_data in (self.get_review_file(player_name), session_file,
+                                        session_file + SHARED_INDEX_SUFFIX,
+                                        *legacy_player_files(self.players_dir, player_name)):
+                        if os.path.exists(player_data):
+                            os.remove(player_data)
                     logging.info(f"Player {player_name} deleted successfully.")
                     messagebox.showinfo("Slettet", f"Spilleren {player_name} er slettet.")
                     self.load_player_menu()
                 else:
-                    raise FileNotFoundError(f"Spilleren {player_name} finnes ikke.")
+                    raise LookupError(f"Spilleren {player_name} finnes ikke.")
         except Exception as e:
             logging.error(f"Error while deleting player {player_name}: {e}")
             messagebox.showerror("Feil", str(e))
 
     def reset_progress(self):
         response = messagebox.askyesno("Bekreftelse", "Er du sikker på at du vil tilbakestille progresjonen din?")
-        if response and self.player_name:
+        if response and self.player_name and self.save_answers():
             self.backup_progress()  # Backup progress before resetting
-            self.score = 0
-            self.streak = 0
-            self.high_score = 0
-            self.category_stats = {category: 0 for category in self.categories}
+            self.progress.reset(self.categories)
             self.save_progress()
             messagebox.showinfo("Tilbakestill", f"Progresjonen til {self.player_name} er tilbakestilt.")
 
     def backup_progress(self):
-        if self.player_name:
-            player_file = os.path.join(self.players_dir, f"{self.player_name}.json")
-            backup_file = os.path.join(self.players_dir, f"{self.player_name}_backup.json")
+        """Ny generasjon i databasen; uendrede blokker deles med forrige kopi, og gamle kopier ryddes bort."""
+        if self.player_id is not None:
             try:
-                if os.path.exists(player_file):
-                    with open(player_file, "r") as f:
-                        progress_data = json.load(f)
-                    with open(backup_file, "w") as f:
-                        json.dump(progress_data, f)
-                    logging.info(f"Backup fullført for spiller {self.player_name}.")
+                self.player_store.backup(self.player_id)
+                logging.info(f"Backup fullført for spiller {self.player_name}.")
             except Exception as e:
                 logging.error(f"Feil under sikkerhetskopiering av progresjon: {e}")
 
+    def show_backups(self):
+        self.clear_window()
+        tk.Label(self.root, text=f"Sikkerhetskopier for {self.player_name}", font=("Helvetica", 20, "bold"), bg="#b0bec5").pack(pady=20)
+        backups = self.player_store.backups(self.player_id)
+        backup_list = tk.Listbox(self.root, font=self.label_font, height=15, width=30)
+        for _, created in backups:
+            backup_list.insert(tk.END, time.strftime("%d.%m.%Y %H:%M", time.localtime(created)))
+        backup_list.pack(pady=10)
+
+        def restore_selected():
+            selection = backup_list.curselection()
+            if selection:
+                self.restore_backup(backups[selection[0]][0], backup_list.get(selection[0]))
+
+        tk.Button(self.root, text="Gjenopprett", command=restore_selected, font=self.label_font, bg=self.button_bg_color).pack(pady=10)
+        tk.Button(self.root, text="Tilbake", command=self.show_start_menu, font=self.label_font, bg=self.button_bg_color).pack(pady=10)
+
+    def restore_backup(self, backup_id, label):
+        if not messagebox.askyesno("Bekreftelse", f"Vil du gjenopprette progresjonen fra {label}?"):
+            return
+        if not self.save_answers():  # Svar som står i kø, ville ellers skrevet over det gjenopprettede
+            return
+        try:
+            self.progress = self.player_store.restore_backup(self.player_id, backup_id)
+        except (LookupError, sqlite3.Error) as e:
+            logging.error(f"Feil under gjenoppretting av sikkerhetskopi: {e}")
+            messagebox.showerror("Feil", str(e))
+            return
+        self.load_category_stats()
+        logging.info(f"Sikkerhetskopi fra {label} gjenopprettet for spiller {self.player_name}.")
+        messagebox.showinfo("Gjenopprettet", f"Progresjonen til {self.player_name} er satt tilbake til {label}.")
+        self.show_start_menu()
+
     def select_player(self, player_name):
+        if not self.save_answers():  # Profilen skal lastes med alle svarene fra forrige gang
+            return
         self.player_name = player_name
         if not self.load_progress():
             messagebox.showerror("Feil", "Kunne ikke laste spilleren. Prøv igjen.")
             return
+        self.backup_progress()  # Én generasjon per økt, så et uhell kan rulles tilbake
+        self.load_review_store()
         self.load_categories()
         self.load_category_stats()
         self.show_start_menu()
 
+    def get_review_file(self, player_name):
+        # .jsonl, så filen ikke dukker opp som en egen spiller i spillermenyen
+        return os.path.join(self.players_dir, f"{player_name}.reviews.jsonl")
+
+    def get_session_file(self, player_name):
+        return os.path.join(self.players_dir, f"{player_name}.sessions.jsonl")
+
+    def load_review_store(self):
+        self.review_store = (ReviewStore(self.get_review_file(self.player_name), writer=self.review_writer)
+                             if self.spaced_repetition else None)
+        self.session_log = SessionLog(self.get_session_file(self.player_name)) if self.record_sessions else None
+
+    def record_session(self):
+        """Begynner opptaket av self.session. Kalles etter at lytterne er koblet til, før start()."""
+        self.finish_recording()
+        if self.session_log is not None:
+            self.recorder = SessionRecorder(self.session, self.session_seed)
+
+    def finish_recording(self):
+        if self.recorder is not None:
+            self.session_log.append(self.recorder)
+            self.recorder = None
+
     def load_progress(self):
         logging.info(f"Laster spillerdata for {self.player_name}...")
         if self.player_name:
-            player_file = os.path.join(self.players_dir, f"{self.player_name}.json")
-            if os.path.exists(player_file):
-                try:
-                    with open(player_file, "r") as f:
-                        progress_data = json.load(f)
-                        missing_data = []
-                        self.category_stats = progress_data.get("category_stats", {})
-                        if not self.category_stats:
-                            missing_data.append("category_stats")
-                        self.score = progress_data.get("score", 0)
-                        self.streak = progress_data.get("streak", 0)
-                        self.high_score = progress_data.get("high_score", 0)
-
-                        if missing_data:
-                            logging.warning(f"Følgende data mangler i spillerfilen: {', '.join(missing_data)}")
-                            messagebox.showwarning("Manglende data", f"Følgende data mangler i spillerfilen: {', '.join(missing_data)}")
+            try:
+                loaded = self.player_store.load_player(self.player_name)
+                if loaded is not None:
+                    self.player_id, self.progress = loaded
+                    missing_data = []
+                    if not self.progress.category_stats:
+                        missing_data.append("category_stats")
+
+                    if missing_data:
+                        logging.warning(f"Følgende data mangler i spillerfilen: {', '.join(missing_data)}")
+                        messagebox.showwarning("Manglende data", f"Følgende data mangler i spillerfilen: {', '.join(missing_data)}")
                     logging.info("Spillerdata lastet inn.")
                     return True
-                except json.JSONDecodeError:
-                    logging.error(f"Feil under lasting av spillerdata: Filen inneholder ugyldig JSON-format.")
-                    messagebox.showerror("Feil", "Kunne ikke laste spillerdata: Ugyldig JSON-format.")
-                    return False
-                except Exception as e:
-                    logging.error(f"Feil under lasting av spillerdata: {e}")
-                    messagebox.showerror("Feil", str(e))
-                    return False
-            else:
-                logging.warning(f"Spillerfilen for {self.player_name} finnes ikke.")
+                logging.warning(f"Spilleren {self.player_name} finnes ikke.")
+            except sqlite3.DatabaseError as e:
+                logging.error(f"Feil under lasting av spillerdata: Databasen kan ikke leses: {e}")
+                messagebox.showerror("Feil", "Kunne ikke laste spillerdata: Spillerdatabasen kan ikke leses.")
+            except Exception as e:
+                logging.error(f"Feil under lasting av spillerdata: {e}")
+                messagebox.showerror("Feil", str(e))
         else:
             logging.warning("Ingen spiller valgt.")
         return False
 
     def save_progress(self):
-        if self.player_name:
-            player_file = os.path.join(self.players_dir, f"{self.player_name}.json")
-            progress_data = {
-                "category_stats": self.category_stats,
-                "score": self.score,
-                "streak": self.streak,
-                "high_score": self.high_score
-            }
+        """Skriver hele progresjonen, f.eks. etter tilbakestilling. Enkeltsvar lagres med record_answer."""
+        if self.player_id is not None:
             try:
-                with open(player_file, "w") as f:
-                    json.dump(progress_data, f)
+                self.player_store.save_progress(self.player_id, self.progress)
                 logging.info(f"Progresjon lagret for spiller {self.player_name}.")
             except Exception as e:
                 logging.error(f"Feil under lagring av progresjon: {e}")
 
+    def record_answer(self, correct):
+        session = self.session
+        self.answer_writer.record_answer(self.player_id, self.progress, session.current_category,
+                                         session.current_sign_id, correct)
+        now = time.monotonic()
+        if self.attempt_log is not None and session.current_sign_id is not None and self.question_started is not None:
+            self.attempt_log.record(self.player_id, session.current_sign_id, (now - self.question_started) * 1000,
+                                    correct, session.hint_used, session.almost, self.progress.difficulty)
+        self.question_started = now  # Neste forsøk på samme tegn måles fra nå
+
+    def save_answers(self):
+        """ Waits until the queued answers and reviews are saved. Tells the user and returns False if saving hangs. """
+        for writer in (self.answer_writer, self.review_writer):
+            if not writer.flush(FLUSH_TIMEOUT):
+                break
+        else:
+            return True
+        logging.error(f"Svarene ble ikke lagret innen {FLUSH_TIMEOUT} sekunder: {writer.last_error}")
+        messagebox.showerror("Lagring", "Svarene er ikke lagret ennå. Sjekk at disken eller minnepinnen med "
+                                        "spillerdataene er koblet til, og prøv igjen.")
+        return False
+
+    def flush_attempts(self):
+        if self.attempt_log is not None:
+            self.attempt_log.flush()
+
     def load_categories(self):
-        categories_path = resource_path(self.base_folder)
-        self.categories = [d for d in os.listdir(categories_path) if os.path.isdir(os.path.join(categories_path, d))]
+        # Billig revalidering av bildemanifestet (mtime på mappene) før vi bruker det
+        self.assets.refresh()
+        self.assets.reload_aliases()
+        self.categories = self.assets.categories()
+        self.answer_index = AnswerIndex(self.assets.answers())  # Alias inkludert, knyttet til innholds-ID
         self.assign_category_colors()
 
     def assign_category_colors(self):
@@ -255,15 +404,58 @@ class SignGame:
 
     def load_category_stats(self):
         for category in self.categories:
-            if category not in self.category_stats:
-                self.category_stats[category] = 0
-            category_path = os.path.join(self.base_folder, category)
-            images = [f for f in os.listdir(category_path) if f.lower().endswith(('.png', '.jpg', '.jpeg'))]
-            self.total_images[category] = len(images)
+            if category not in self.progress.category_stats:
+                self.progress.category_stats[category] = 0
+            self.total_images[category] = self.assets.image_count(category)
+
+    def apply_asset_changes(self, changes):
+        """ Updates categories, counts, caches and the open pool after signs were added, removed or changed. """
+        for content_id in changes.stale_content_ids:
+            self.image_cache.discard(content_id)
+        if not self.player_name:
+            return  # Kategoriene lastes først når en spiller er valgt
+
+        self.categories = self.assets.categories()
+        self.assign_category_colors()
+        if changes.alias_categories:
+            # Aliasene kompileres på nytt; bildene trenger ikke skannes
+            self.answer_index = AnswerIndex(self.assets.answers())
+            if self.session is not None:
+                self.session.answer_index = self.answer_index
+        else:
+            # Fjernede svar blir liggende i vokabularet til neste oppstart; det gjør bare rettingen litt strengere
+            for category, image in changes.added + changes.changed:
+                content_id = self.assets.content_id(category, image)
+                for answer in self.assets.accepted_answers(category, image):
+                    self.answer_index.add(answer, content_id)
+        for category in changes.removed_categories:
+            self.total_images.pop(category, None)
+        for category in self.categories:
+            self.progress.category_stats.setdefault(category, 0)
+            self.total_images[category] = self.assets.image_count(category)
+
+        if self.session is not None:
+            self.update_image_pool(changes)
+        if self.current_screen == "start_menu":
+            self.show_start_menu()
+
+    def update_image_pool(self, changes):
+        all_categories = self.current_category == "Alle kategorier"
+        for category, image in changes.removed:
+            if all_categories or category == self.current_category:
+                entry = (image, category) if all_categories else image
+                self.session.remove(entry)
+        for category, image in changes.added:
+            if all_categories or category == self.current_category:
+                entry = (image, category) if all_categories else image
+                self.session.add(entry, self.assets.answer(category, image))
+        if self.current_screen == "quiz":
+            self.update_labels()
 
     def show_start_menu(self):
-        self.streak = 0
+        self.progress.streak = 0
         self.clear_window()
+        self.current_screen = "start_menu"
 
         tk.Label(self.root, text=f"Velkommen, {self.player_name}!", font=("Helvetica", 20, "bold"), bg="#b0bec5").pack(pady=20)
         tk.Label(self.root, text="Velg en kategori:", font=("Helvetica", 16), bg="#b0bec5").pack(pady=20)
@@ -274,6 +466,11 @@ class SignGame:
         tk.Button(self.root, text="Alle kategorier", command=self.use_all_categories, height=2, width=20,
                   font=("Helvetica", 14, "bold"), bg=self.button_bg_color).pack(pady=10)
         tk.Button(self.root, text="Tilbakestill progresjon", command=self.reset_progress, font=self.label_font, bg=self.button_bg_color).pack(pady=10)
+        tk.Button(self.root, text="Sikkerhetskopier", command=self.show_backups, font=self.label_font, bg=self.button_bg_color).pack(pady=10)
+        tk.Checkbutton(self.root, text="Vis forslag mens du skriver", variable=self.autocomplete_var,
+                       font=self.label_font, bg="#b0bec5").pack(pady=5)
+        tk.Checkbutton(self.root, text="Flervalg (velg riktig ord)", variable=self.multiple_choice_var,
+                       font=self.label_font, bg="#b0bec5").pack(pady=5)
         player_menu_button = tk.Button(self.root, text="Spiller meny", command=self.load_player_menu, font=self.label_font, bg=self.button_bg_color)
         player_menu_button.place(x=1100, y=850)
 
@@ -289,7 +486,7 @@ class SignGame:
                            bg=self.category_colors[category])
         button.pack(side=tk.LEFT)
 
-        correct = self.category_stats.get(category, 0)
+        correct = self.progress.category_stats.get(category, 0)
         total = self.total_images.get(category, 1)
         percentage = (correct / total) * 100 if total > 0 else 0
 
@@ -314,32 +511,49 @@ class SignGame:
             images = self.load_images_from_folder(category, add_to_pool=False)
             all_images.extend([(img, category) for img in images])
             for img in images:
-                self.image_to_answer[img] = os.path.splitext(img)[0]
-        self.image_pool = random.sample(all_images, len(all_images))
-        self.total_questions = len(self.image_pool)
-        self.answered_questions = 0
+                self.image_to_answer[img] = self.assets.answer(category, img)
+        self.image_pool = self.create_image_pool(all_images)
         self.start_quiz()
 
     def load_images_from_folder(self, category, add_to_pool=True):
-        folder_path = os.path.join(self.base_folder, category)
-        images = [f for f in os.listdir(folder_path) if f.lower().endswith(('.png', '.jpg', '.jpeg'))]
+        images = self.assets.list_images(category)
         if add_to_pool:
-            image_to_answer = {img: os.path.splitext(img)[0] for img in images}
+            image_to_answer = {img: self.assets.answer(category, img) for img in images}
             self.image_to_answer = image_to_answer
-            self.image_pool = random.sample(images, len(images))
-            self.total_questions = len(images)
-            self.answered_questions = 0
+            self.image_pool = self.create_image_pool(images)
         return images
 
+    def create_image_pool(self, entries, review=True):
+        """ Spaced-repetition queue for the current player, or a plain shuffled deck, seeded for replay. """
+        self.session_seed = new_seed()
+        rng = seeded_rng(self.session_seed, "pool")
+        if review and self.review_store is not None:
+            return self.review_store.queue(entries, self.get_sign_id, rng)
+        return ShuffledDeck(entries, rng=rng)
+
+    def get_sign_id(self, entry):
+        image, category = self.get_pool_entry(entry)
+        return self.assets.content_id(category, image)
+
     def start_quiz(self):
         logging.info("Starting quiz...")
 
-        self.streak = 0  
+        multiple_choice = self.multiple_choice_var.get()
+        self.session = QuizSession(self.image_pool, self.image_to_answer, self.progress, self.current_category,
+                                   answer_index=self.answer_index, sign_id_for=self.get_sign_id,
+                                   choice_count=self.choice_count if multiple_choice else None,
+                                   distractors=self.distractors, rng=seeded_rng(self.session_seed, "choices"))
+        self.session.on("question", self.show_question)
+        self.session.on("answered", self.show_answer_feedback)
+        self.session.on("hint", self.show_hint)
+        self.session.on("finished", self.show_end_screen)
+        self.record_session()
 
         self.clear_window()
+        self.current_screen = "quiz"
 
         tk.Label(self.root, text=f"Kategori: {self.current_category}", font=("Helvetica", 20, "bold"), bg="#b0bec5").pack(pady=10)
-        back_button = tk.Button(self.root, text="Tilbake", command=self.show_start_menu, font=self.label_font, bg=self.button_bg_color)
+        back_button = tk.Button(self.root, text="Tilbake", command=self.leave_quiz, font=self.label_font, bg=self.button_bg_color)
         back_button.pack(pady=5)
 
         self.feedback_label = tk.Label(self.root, text="", font=self.label_font, bg="#b0bec5")
@@ -349,83 +563,139 @@ class SignGame:
         self.image_label.pack(pady=20)
 
         self.entry_text = tk.StringVar()  
-        self.entry = tk.Entry(self.root, font=("Helvetica", 18), width=30, textvariable=self.entry_text)
-        self.entry.pack(pady=10)
-        self.entry.focus_set()
+        self.choice_buttons = []
+        self.chosen_button = None
+        self.suggestion_buttons = []
+        if multiple_choice:
+            self.entry = None
+            self.create_choice_buttons()
+        else:
+            self.entry = tk.Entry(self.root, font=("Helvetica", 18), width=30, textvariable=self.entry_text)
+            self.entry.pack(pady=10)
+            self.entry.focus_set()
 
-        self.submit_button = tk.Button(self.root, text="Submit", command=self.check_answer, height=2, width=10,
-                                       font=("Helvetica", 14, "bold"), bg=self.button_bg_color)
-        self.submit_button.pack(pady=10)
+            self.create_suggestion_strip()
 
-        self.score_label = tk.Label(self.root, text=f"Score: {self.score}", font=self.label_font, bg="#b0bec5")
+            self.submit_button = tk.Button(self.root, text="Submit", command=self.check_answer, height=2, width=10,
+                                           font=("Helvetica", 14, "bold"), bg=self.button_bg_color)
+            self.submit_button.pack(pady=10)
+
+        self.score_label = tk.Label(self.root, font=self.label_font, bg="#b0bec5")
         self.score_label.pack(pady=5)
 
-        self.streak_label = tk.Label(self.root, text=f"Streak: {self.streak}", font=self.label_font, bg="#b0bec5")
+        self.streak_label = tk.Label(self.root, font=self.label_font, bg="#b0bec5")
         self.streak_label.pack(pady=5)
 
-        self.high_score_label = tk.Label(self.root, text=f"High Score: {self.high_score}", font=self.label_font, bg="#b0bec5")
+        self.high_score_label = tk.Label(self.root, font=self.label_font, bg="#b0bec5")
         self.high_score_label.pack(pady=5)
 
-        progress_percentage = (self.answered_questions / self.total_questions) * 100 if self.total_questions > 0 else 0
-        self.progress_label = tk.Label(self.root, text=f"Progresjon: {progress_percentage:.1f}% ({self.answered_questions}/{self.total_questions})",
-                                       font=self.label_font, bg="#b0bec5")
+        self.progress_label = tk.Label(self.root, font=self.label_font, bg="#b0bec5")
         self.progress_label.pack()
 
-        self.root.bind('<Return>', self.enter_key_pressed)
+        if multiple_choice:
+            self.root.unbind('<Return>')
+        else:
+            self.root.bind('<Return>', self.enter_key_pressed)
         self.root.bind('<Button-1>', self.handle_click)
 
         self.hint_frame = None
-        self.load_new_image()
+        self.session.start()
+        self.update_labels()
+
+    def create_choice_buttons(self):
+        """ A fixed grid of answer buttons for multiple choice, relabelled for every question. """
+        choice_frame = tk.Frame(self.root, bg="#b0bec5")
+        choice_frame.pack(pady=10)
+        for i in range(self.choice_count):
+            button = tk.Button(choice_frame, font=("Helvetica", 16, "bold"), bg=self.button_bg_color, width=14)
+            button.config(command=lambda b=button: self.choose_answer(b))
+            button.grid(row=i // 3, column=i % 3, padx=5, pady=5)
+            self.choice_buttons.append(button)
+
+    def show_choices(self):
+        self.chosen_button = None
+        choices = self.session.choices
+        for i, button in enumerate(self.choice_buttons):
+            if i < len(choices):
+                button.config(text=choices[i], state=tk.NORMAL)
+                button.grid()
+            else:
+                button.grid_remove()
+
+    def choose_answer(self, button):
+        self.chosen_button = button
+        self.session.submit(button.cget("text"))
+
+    def create_suggestion_strip(self):
+        """ A fixed row of suggestion buttons that are relabelled and shown/hidden as the player types. """
+        if self.suggestion_job is not None:
+            self.root.after_cancel(self.suggestion_job)
+            self.suggestion_job = None
+        if not self.autocomplete_var.get():
+            return
+        suggestion_frame = tk.Frame(self.root, bg="#b0bec5")
+        suggestion_frame.pack(pady=5)
+        for i in range(self.suggestion_count):
+            button = tk.Button(suggestion_frame, font=self.label_font, bg="#eceff1")
+            button.config(command=lambda b=button: self.use_suggestion(b.cget("text")))
+            button.grid(row=0, column=i, padx=5)
+            button.grid_remove()
+            self.suggestion_buttons.append(button)
+        self.entry_text.trace_add("write", self.schedule_suggestions)
+
+    def schedule_suggestions(self, *args):
+        # Bare det siste tastetrykket i en rask serie fører til et oppslag
+        if self.suggestion_job is not None:
+            self.root.after_cancel(self.suggestion_job)
+        self.suggestion_job = self.root.after(self.suggestion_delay_ms, self.update_suggestions)
+
+    def update_suggestions(self):
+        self.suggestion_job = None
+        if self.current_screen != "quiz":
+            return
+        suggestions = self.session.suggest(self.entry_text.get(), len(self.suggestion_buttons))
+        for i, button in enumerate(self.suggestion_buttons):
+            if i < len(suggestions):
+                button.config(text=suggestions[i])
+                button.grid()
+            else:
+                button.grid_remove()
+
+    def use_suggestion(self, answer):
+        self.entry_text.set(answer)
+        self.entry.focus_set()
+        self.entry.icursor(tk.END)
 
     def check_answer(self):
-        user_input = self.entry_text.get().strip().lower()
-        self.answered_questions += 1
-
-        if user_input == self.correct_answer.lower():
-            self.score += self.get_score_increment()  
-            self.streak += 1  
-            self.category_stats[self.current_image_category] += 1
-            if self.score > self.high_score:
-                self.high_score = self.score
-            self.feedback_label.config(text="Riktig svar!", fg="#66bb6a")
+        self.session.submit(self.entry_text.get())
+
+    def show_answer_feedback(self, correct, almost=False):
+        if correct:
+            if almost:
+                self.feedback_label.config(text=f"Nesten riktig! Svaret er «{self.session.correct_answer}».", fg="#66bb6a")
+            else:
+                self.feedback_label.config(text="Riktig svar!", fg="#66bb6a")
             self.entry_text.set("")  
             self.update_labels()
-            self.save_progress()
-            self.adjust_difficulty()
-            self.load_new_image()
+            self.record_answer(True)
         else:
             self.feedback_label.config(text="Feil svar! Prøv igjen eller få et hint.", fg="#e57373")
-            self.streak = 0  
-            if self.score > self.high_score:
-                self.high_score = self.score
-            self.score = 0  # Reset score on incorrect answer
+            self.record_answer(False)
+            if self.chosen_button is not None:
+                self.chosen_button.config(state=tk.DISABLED)  # Det gale alternativet kan ikke velges igjen
             self.update_labels()
             self.show_hint_options()
 
-    def get_score_increment(self):
-        """ Determine score increment based on difficulty """
-        if self.current_difficulty == "easy":
-            return 1
-        elif self.current_difficulty == "medium":
-            return 2
-        else:
-            return 3
-
-    def adjust_difficulty(self):
-        if self.streak > 5:
-            self.current_difficulty = "hard"
-        elif self.streak > 2:
-            self.current_difficulty = "medium"
-        else:
-            self.current_difficulty = "easy"
-
     def update_labels(self):
-        self.score_label.config(text=f"Score: {self.score}")
-        self.streak_label.config(text=f"Streak: {self.streak}")
-        self.high_score_label.config(text=f"High Score: {self.high_score}")
+        if self.current_screen != "quiz":
+            return
+        session = self.session
+        self.score_label.config(text=f"Score: {self.progress.score}")
+        self.streak_label.config(text=f"Streak: {self.progress.streak}")
+        self.high_score_label.config(text=f"High Score: {self.progress.high_score}")
 
-        progress_percentage = (self.answered_questions / self.total_questions) * 100 if self.total_questions > 0 else 0
-        self.progress_label.config(text=f"Progresjon: {progress_percentage:.1f}% ({self.answered_questions}/{self.total_questions})")
+        progress_percentage = (session.answered_questions / session.total_questions) * 100 if session.total_questions > 0 else 0
+        self.progress_label.config(text=f"Progresjon: {progress_percentage:.1f}% ({session.answered_questions}/{session.total_questions})")
 
     def show_hint_options(self):
         if self.hint_frame:
@@ -435,7 +705,7 @@ class SignGame:
         self.hint_frame.pack(pady=10)
 
         hint_button = tk.Button(self.hint_frame, text="Ta et hint", font=self.label_font, bg=self.button_bg_color,
-                                command=lambda: [self.give_hint()])
+                                command=lambda: [self.session.hint()])
         hint_button.pack(side=tk.LEFT, padx=5)
 
         retry_button = tk.Button(self.hint_frame, text="Prøv igjen uten hint", font=self.label_font, bg=self.button_bg_color,
@@ -443,66 +713,55 @@ class SignGame:
         retry_button.pack(side=tk.LEFT, padx=5)
 
         skip_button = tk.Button(self.hint_frame, text="Gå videre", font=self.label_font, bg=self.button_bg_color,
-                                command=lambda: [self.entry_text.set(""), self.load_new_image(), self.hint_frame.destroy()])
+                                command=lambda: [self.entry_text.set(""), self.session.skip(), self.hint_frame.destroy()])
         skip_button.pack(side=tk.LEFT, padx=5)
 
-    def give_hint(self):
-        if self.current_difficulty == "easy":
-            hint_text = self.correct_answer[:3] + "..."
-        elif self.current_difficulty == "medium":
-            hint_text = self.correct_answer[:2] + "..."
-        else:
-            hint_text = self.correct_answer[0] + "..."
-
-        self.feedback_label.config(text=f"Hint: {hint_text}", fg="#fafafa")
-        self.hint_used = True
-
-    def load_new_image(self):
-        if not self.image_pool:
-            self.show_end_screen()
-            return
+    def show_hint(self, text):
+        self.feedback_label.config(text=f"Hint: {text}", fg="#fafafa")
 
+    def show_question(self, entry):
         if self.hint_frame:
             self.hint_frame.destroy()
 
-        if self.current_category == "Alle kategorier":
-            self.current_image, self.current_image_category = self.get_unique_image()
-        else:
-            self.current_image = self.get_unique_image_from_category()
-            self.current_image_category = self.current_category
-
-        self.correct_answer = self.image_to_answer.get(self.current_image, "Ingen svar funnet")
-
-        img_path = resource_path(os.path.join(self.base_folder, self.current_image_category, self.current_image))
-
-        if img_path not in self.image_cache:
-            img = Image.open(img_path)
-            img = img.resize((400, 400), Image.Resampling.LANCZOS)
-            self.image_cache[img_path] = ImageTk.PhotoImage(img)
-
-        self.image_label.configure(image=self.image_cache[img_path])
-        self.image_label.image = self.image_cache[img_path]
-        self.hint_used = False
-
-    def get_unique_image(self):
-        """ Get an image that has not been used yet, ensuring all images are used before repetition. """
-        remaining_images = [img for img in self.image_pool if img not in self.images_used]
-        if not remaining_images:
-            self.images_used.clear()  # Reset after all images have been used
-            remaining_images = self.image_pool
-        selected_image = random.choice(remaining_images)
-        self.images_used.add(selected_image)
-        return selected_image
-
-    def get_unique_image_from_category(self):
-        """ Get an image from the current category that has not been used yet. """
-        remaining_images = [img for img in self.image_pool if img not in self.images_used]
-        if not remaining_images:
-            self.images_used.clear()  # Reset after all images have been used
-            remaining_images = self.image_pool
-        selected_image = random.choice(remaining_images)
-        self.images_used.add(selected_image)
-        return selected_image
+        image, category = self.get_pool_entry(entry)
+        content_id = self.assets.content_id(category, image)
+
+        photo = self.image_cache.get(content_id, QUIZ_SIZE)
+        if photo is None:
+            img = self.prefetcher.take(content_id)
+            if img is None:
+                img = self.load_sign_image(content_id, QUIZ_SIZE)
+            photo = self.image_cache.put(content_id, QUIZ_SIZE, ImageTk.PhotoImage(img))
+
+        self.image_label.configure(image=photo)
+        self.image_label.image = photo
+        self.question_started = time.monotonic()
+        if self.choice_buttons:
+            self.show_choices()
+
+        self.prefetch_upcoming_images()
+
+    def get_pool_entry(self, entry):
+        """ Returns (image, category) for an image_pool entry in either quiz mode. """
+        return split_entry(entry, self.current_category)
+
+    def prefetch_upcoming_images(self):
+        upcoming_ids = []
+        for entry in self.session.peek(self.prefetcher.depth):
+            image, category = self.get_pool_entry(entry)
+            upcoming_ids.append(self.assets.content_id(category, image))
+        self.prefetcher.schedule([cid for cid in upcoming_ids if not self.image_cache.contains(cid, QUIZ_SIZE)])
+
+    def store_prefetched_image(self, content_id, img):
+        # Kalles på Tk-tråden når et forhåndslastet bilde er ferdig skalert
+        if not self.image_cache.contains(content_id, QUIZ_SIZE):
+            self.image_cache.put(content_id, QUIZ_SIZE, ImageTk.PhotoImage(img))
+
+    def leave_quiz(self):
+        self.prefetcher.cancel()
+        self.finish_recording()
+        self.flush_attempts()
+        self.show_start_menu()
 
     def enter_key_pressed(self, event):
         self.check_answer()
@@ -511,20 +770,6 @@ class SignGame:
         if event.widget != self.entry:
             self.root.focus()
 
-    def show_end_screen(self):
-        self.clear_window()
-
-        if hasattr(self, 'multiplayer_scores'):
-            winner = 1 if self.multiplayer_scores[0] > self.multiplayer_scores[1] else 2
-            tk.Label(self.root, text=f"Gratulerer! Spiller {winner} vant!", font=("Helvetica", 20, "bold"), bg="#b0bec5").pack(pady=20)
-        else:
-            tk.Label(self.root, text=f"Gratulerer! Du har fullført {self.current_category}.", font=("Helvetica", 20, "bold"), bg="#b0bec5").pack(pady=20)
-
-        tk.Button(self.root, text="Tilbake til hovedmeny", command=self.show_start_menu, height=2, width=20,
-                  font=("Helvetica", 14, "bold"), bg=self.button_bg_color).pack(pady=10)
-        tk.Button(self.root, text="Avslutt spillet", command=self.show_welcome_screen, height=2, width=20,
-                  font=("Helvetica", 14, "bold"), bg=self.button_bg_color).pack(pady=10)
-
     def multiplayer_mode(self):
         """Set up multiplayer mode where two players can compete."""
         self.clear_window()
@@ -542,12 +787,21 @@ class SignGame:
 
     def start_multiplayer_game(self):
         """Initialize a multiplayer quiz session."""
+        # Ny stokking og nytt frø for hvert spill. Flerspiller deler ikke repetisjonskøen til den valgte spilleren
+        self.image_pool = self.create_image_pool(list(self.image_pool), review=False)
+        self.session = MultiplayerSession(self.image_pool, self.image_to_answer, self.current_category,
+                                          answer_index=self.answer_index, sign_id_for=self.get_sign_id)
+        self.session.on("question", self.show_question)
+        self.session.on("answered", self.show_multiplayer_feedback)
+        self.session.on("turn", self.show_multiplayer_turn)
+        self.session.on("finished", self.show_end_screen)
+        self.record_session()
+
         self.clear_window()
-        self.multiplayer_scores = [0, 0]
-        self.current_player = 0
+        self.current_screen = "multiplayer"
 
         tk.Label(self.root, text="Flerspiller quiz", font=("Helvetica", 20, "bold"), bg="#b0bec5").pack(pady=20)
-        self.feedback_label = tk.Label(self.root, text=f"Spiller {self.current_player + 1} sin tur", font=("Helvetica", 16), bg="#b0bec5")
+        self.feedback_label = tk.Label(self.root, text=f"Spiller {self.session.current_player + 1} sin tur", font=("Helvetica", 16), bg="#b0bec5")
         self.feedback_label.pack(pady=10)
 
         self.image_label = tk.Label(self.root, bg="#b0bec5")
@@ -562,30 +816,31 @@ class SignGame:
                                        font=("Helvetica", 14, "bold"), bg=self.button_bg_color)
         self.submit_button.pack(pady=10)
 
-        self.load_new_image()
+        self.hint_frame = None
+        self.choice_buttons = []
+        self.session.start()
 
     def check_multiplayer_answer(self):
-        user_input = self.entry_text.get().strip().lower()
+        self.session.submit(self.entry_text.get())
 
-        if user_input == self.correct_answer.lower():
-            self.multiplayer_scores[self.current_player] += 1
-            self.feedback_label.config(text=f"Spiller {self.current_player + 1} svarte riktig!", fg="#66bb6a")
+    def show_multiplayer_feedback(self, player, correct):
+        if correct:
+            self.feedback_label.config(text=f"Spiller {player + 1} svarte riktig!", fg="#66bb6a")
         else:
-            self.feedback_label.config(text=f"Spiller {self.current_player + 1} svarte feil!", fg="#e57373")
+            self.feedback_label.config(text=f"Spiller {player + 1} svarte feil!", fg="#e57373")
 
-        # Switch to the next player
-        self.current_player = (self.current_player + 1) % 2
+    def show_multiplayer_turn(self, player):
         self.entry_text.set("")
-        self.feedback_label.config(text=f"Spiller {self.current_player + 1} sin tur")
-
-        # Load a new image for the next player
-        self.load_new_image()
+        self.feedback_label.config(text=f"Spiller {player + 1} sin tur")
 
     def show_end_screen(self):
+        self.prefetcher.cancel()
+        self.finish_recording()
+        self.flush_attempts()
         self.clear_window()
 
-        if hasattr(self, 'multiplayer_scores'):
-            winner = 1 if self.multiplayer_scores[0] > self.multiplayer_scores[1] else 2
+        if isinstance(self.session, MultiplayerSession):
+            winner = self.session.winner() + 1
             tk.Label(self.root, text=f"Gratulerer! Spiller {winner} vant!", font=("Helvetica", 20, "bold"), bg="#b0bec5").pack(pady=20)
         else:
             tk.Label(self.root, text=f"Gratulerer! Du har fullført {self.current_category}.", font=("Helvetica", 20, "bold"), bg="#b0bec5").pack(pady=20)
@@ -606,4 +861,13 @@ if not os.path.exists(base_folder):
 logging.info("Oppretter SignGame-objekt...")
 game = SignGame(root, base_folder)
 logging.info("Starter hovedløkke...")
-root.mainloop()
\ No newline at end of file
+root.mainloop()
+game.finish_recording()
+game.flush_attempts()
+game.answer_writer.close()
+game.review_writer.close()
+game.backup_progress()
+game.player_store.close()
+game.asset_watcher.stop()
+game.prefetcher.shutdown()
+logging.info(f"Bildecache: {game.image_cache.stats()}")
\ No newline at end of file
@@ -1,11 +1,17 @@
 # -*- mode: python ; coding: utf-8 -*-
+import os
+import sys
+sys.path.insert(0, SPECPATH)
+from assets import build_bundle_datas
 
+# Like bilder (f.eks. i Tilfeldig og manedens_tegn) pakkes bare én gang
+kategorier_datas = build_bundle_datas('Kategorier', os.path.join(workpath, 'asset_index'))
 
 a = Analysis(
     ['sign_game - V8.py'],
     pathex=[],
     binaries=[],
-    datas=[('Kategorier', 'Kategorier')],
+    datas=kategorier_datas,
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},